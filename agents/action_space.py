@@ -0,0 +1,162 @@
+"""Per-game action-space discovery.
+
+Many games only respond to a few of the seven `GameAction`s (locksmith
+ignores ACTION5 and ACTION6). `ActionSpaceProfile` counts how often each
+action was tried and how often it changed the frame, and is persisted per
+game so later runs can drop actions that never do anything from tool
+schemas, random sampling and exploration.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+from .masking import INACTIVE_STATES, state_key
+from .structs import FrameData, GameAction
+
+logger = logging.getLogger()
+
+
+def get_action_space_dir() -> str:
+    """Get the action-space profile directory from environment variable."""
+    return os.environ.get("ACTION_SPACE_DIR", "action_spaces")
+
+
+class ActionSpaceProfile:
+    """How often each action was tried in a game, and how often it had an effect.
+
+    An action is ineffective once it was tried `min_tries` times without
+    ever changing the frame, score or state; until then it is still being
+    discovered. RESET is always effective, and complex actions (clicks) are
+    never ineffective: a click on an empty cell says nothing about the others.
+
+    A verdict only holds until the next run or level: then every ineffective
+    action is reopened and masked again only after one more try without
+    effect, since many actions only work in some states.
+    """
+
+    game_id: str
+    min_tries: int
+    tries: dict[str, int]
+    effects: dict[str, int]
+
+    def __init__(self, game_id: str, min_tries: int = 5) -> None:
+        self.game_id = game_id
+        self.min_tries = min_tries
+        self.tries = {}
+        self.effects = {}
+        self._dirty = False
+
+    @property
+    def filename(self) -> str:
+        return os.path.join(get_action_space_dir(), f"{self.game_id}.actions.json")
+
+    @classmethod
+    def load(cls, game_id: str, min_tries: int = 5) -> "ActionSpaceProfile":
+        """The saved profile for a game, or an empty one."""
+        profile = cls(game_id, min_tries=min_tries)
+        if not os.path.isfile(profile.filename):
+            return profile
+        try:
+            with open(profile.filename, "r", encoding="utf-8") as f:
+                actions = json.load(f).get("actions", {})
+            profile.tries = {k: int(v["tries"]) for k, v in actions.items()}
+            profile.effects = {k: int(v["effects"]) for k, v in actions.items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable action space {profile.filename}: {e}")
+        profile.reopen()
+        return profile
+
+    def save(self) -> None:
+        """Write the profile if anything was learned since it was loaded."""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.filename) or "."
+        os.makedirs(directory, exist_ok=True)
+        # a temporary file of its own, agents of a swarm may save the same game
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=directory,
+            prefix=os.path.basename(self.filename),
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump(
+                {
+                    "game_id": self.game_id,
+                    "actions": {
+                        name: {"tries": tries, "effects": self.effects.get(name, 0)}
+                        for name, tries in sorted(self.tries.items())
+                    },
+                },
+                f,
+                indent=2,
+            )
+        try:
+            os.replace(f.name, self.filename)
+        except OSError:
+            os.unlink(f.name)
+            raise
+        self._dirty = False
+
+    def observe(self, previous: FrameData, latest: FrameData) -> None:
+        """Count the action that turned `previous` into `latest`."""
+        action = latest.action_input.id
+        if action is GameAction.RESET or previous.state in INACTIVE_STATES:
+            return
+        name = action.name
+        self.tries[name] = self.tries.get(name, 0) + 1
+        changed = (
+            previous.score != latest.score
+            or previous.state != latest.state
+            or state_key(previous) != state_key(latest)
+        )
+        if changed:
+            self.effects[name] = self.effects.get(name, 0) + 1
+        self._dirty = True
+        if latest.score > previous.score:
+            # a new level, where masked actions may work after all
+            self.reopen()
+
+    def reopen(self) -> None:
+        """Unmask every ineffective action until it is tried once more."""
+        for action in self.ineffective():
+            self.tries[action.name] = self.min_tries - 1
+
+    def is_effective(self, action: GameAction) -> bool:
+        return action is GameAction.RESET or self.effects.get(action.name, 0) > 0
+
+    def ineffective(self) -> set[GameAction]:
+        """Simple actions tried `min_tries` times without any effect."""
+        return {
+            a
+            for a in GameAction
+            if a.is_simple()
+            and not self.is_effective(a)
+            and self.tries.get(a.name, 0) >= self.min_tries
+        }
+
+    def undiscovered(self) -> list[GameAction]:
+        """Actions whose effect is still unknown, least tried first."""
+        pending = [
+            a
+            for a in GameAction
+            if not self.is_effective(a) and self.tries.get(a.name, 0) < self.min_tries
+        ]
+        return sorted(pending, key=lambda a: self.tries.get(a.name, 0))
+
+    def next_probe(
+        self, exclude: frozenset[GameAction] | set[GameAction] = frozenset()
+    ) -> Optional[GameAction]:
+        """The next action to try during discovery, or None once discovery is over."""
+        return next((a for a in self.undiscovered() if a not in exclude), None)
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "effective": [a.name for a in GameAction if self.is_effective(a)],
+            "ineffective": sorted(a.name for a in self.ineffective()),
+            "undiscovered": [a.name for a in self.undiscovered()],
+        }
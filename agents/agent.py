@@ -12,6 +12,9 @@ from pydantic import ValidationError
 from requests import Response
 from requests.cookies import RequestsCookieJar
 
+from .action_space import ActionSpaceProfile
+from .inference import CallUsage, UsageLedger
+from .masking import ActionMask
 from .recorder import Recorder
 from .structs import FrameData, GameAction, GameState, Scorecard
 from .tracing import trace_agent_session
@@ -33,6 +36,9 @@ class Agent(ABC):
     game_id: str
     guid: str
     frames: list[FrameData]
+    action_mask: ActionMask
+    action_space: ActionSpaceProfile
+    usage: UsageLedger
 
     recorder: Recorder
     headers: dict[str, str]
@@ -59,6 +65,9 @@ class Agent(ABC):
         self.agent_name = agent_name
         self.tags = tags or []
         self.frames = [FrameData(score=0)]
+        self.action_space = ActionSpaceProfile.load(game_id)
+        self.action_mask = ActionMask(self.action_space)
+        self.usage = UsageLedger.from_env(listener=self.record_llm_call)
         self._cleanup = True
         if record:
             self.start_recording()
@@ -79,6 +88,11 @@ class Agent(ABC):
             not self.is_done(self.frames, self.frames[-1])
             and self.action_counter <= self.MAX_ACTIONS
         ):
+            if reason := self.usage.over_budget():
+                logger.warning(
+                    f"{self.game_id} - stopping, LLM budget exceeded: {reason}"
+                )
+                break
             action = self.choose_action(self.frames, self.frames[-1])
             if frame := self.take_action(action):
                 self.append_frame(frame)
@@ -125,12 +139,21 @@ class Agent(ABC):
         )
 
     def append_frame(self, frame: FrameData) -> None:
+        self.action_mask.observe(self.frames[-1], frame)
         self.frames.append(frame)
         if frame.guid:
             self.guid = frame.guid
         if hasattr(self, "recorder") and not self.is_playback:
             self.recorder.record(json.loads(frame.model_dump_json()))
 
+    def record_llm_call(self, call: CallUsage) -> None:
+        if hasattr(self, "recorder") and not self.is_playback:
+            self.recorder.record({"llm_call": call.model_dump()})
+
+    def usage_report(self) -> dict[str, Any]:
+        """LLM usage of this game, with tokens and cost per action and score point."""
+        return self.usage.report(actions=self.action_counter, score=self.score)
+
     def do_action_request(self, action: GameAction) -> Response:
         data = action.action_data.model_dump()
         if action == GameAction.RESET:
@@ -178,6 +201,11 @@ class Agent(ABC):
         """Called after main loop is finished."""
         if self._cleanup:
             self._cleanup = False  # only cleanup once per agent
+            if self.usage.calls:
+                usage = self.usage_report()
+                logger.info(f"{self.game_id} - LLM usage: {json.dumps(usage)}")
+                if hasattr(self, "recorder") and not self.is_playback:
+                    self.recorder.record({"llm_usage": usage})
             if hasattr(self, "recorder") and not self.is_playback:
                 if scorecard:
                     self.recorder.record(scorecard.get(self.game_id))
@@ -187,6 +215,8 @@ class Agent(ABC):
                 logger.info(
                     f"recording for {self.name} is available in {self.recorder.filename}"
                 )
+            if not self.is_playback:
+                self.action_space.save()
             if self.action_counter >= self.MAX_ACTIONS:
                 logger.info(
                     f"Exiting: agent reached MAX_ACTIONS of {self.MAX_ACTIONS}, took {self.seconds} seconds ({self.fps} average fps)"
@@ -0,0 +1,23 @@
+"""Offline benchmarks for the agent templates.
+
+Each benchmark is a runnable module, e.g.:
+
+    uv run -m agents.benchmarks.prompts
+"""
+
+from .corpus import load_corpus, recorded_frames, synthetic_frames
+from .report import format_table, load_results, save_results
+from .tokens import PromptSample, TokenCounter, image_tokens, measure_request
+
+__all__ = [
+    "PromptSample",
+    "TokenCounter",
+    "format_table",
+    "image_tokens",
+    "load_corpus",
+    "load_results",
+    "measure_request",
+    "recorded_frames",
+    "save_results",
+    "synthetic_frames",
+]
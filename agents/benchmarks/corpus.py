@@ -0,0 +1,130 @@
+"""A fixed corpus of frames to feed through the benchmarks.
+
+Frames come from recordings when any are given, otherwise from a seeded,
+locksmith-like synthetic game so every run sees exactly the same input.
+"""
+
+import random
+from typing import Iterable, Optional
+
+from ..inference.local_policy import read_events, recording_files
+from ..structs import ActionInput, FrameData, GameAction, GameState
+
+MOVES = {
+    GameAction.ACTION1: (0, -4),
+    GameAction.ACTION2: (0, 4),
+    GameAction.ACTION3: (-4, 0),
+    GameAction.ACTION4: (4, 0),
+}
+
+FLOOR, WALL, DOOR, PLAYER_HEAD, PLAYER_BODY = 3, 4, 5, 12, 9
+ENERGY, ENERGY_USED = 6, 8
+KEY_SHAPE = [[9, 0, 9], [9, 9, 9], [0, 9, 0]]
+
+
+def recorded_frames(
+    paths: Iterable[str], game: Optional[str] = None, limit: Optional[int] = None
+) -> list[FrameData]:
+    """The NOT_FINISHED frames of the given recording files or directories."""
+    frames: list[FrameData] = []
+    for filename in recording_files(paths):
+        for event in read_events(filename):
+            data = event.get("data", {})
+            if not isinstance(data, dict) or "frame" not in data:
+                continue
+            try:
+                frame = FrameData.model_validate(data)
+            except ValueError:
+                continue
+            if game and not frame.game_id.startswith(game):
+                continue
+            if frame.state is GameState.NOT_FINISHED and not frame.is_empty():
+                frames.append(frame)
+            if limit is not None and len(frames) >= limit:
+                return frames
+    return frames
+
+
+def _level(rng: random.Random) -> list[list[int]]:
+    grid = [[FLOOR] * 64 for _ in range(64)]
+    for y in range(64):
+        for x in range(64):
+            if y < 5 or y > 52 or x < 4 or x > 59:
+                grid[y][x] = WALL
+    for x in range(54):
+        grid[2][x] = ENERGY
+    # a few interior wall blocks on the 4-cell movement lattice
+    for _ in range(6):
+        bx, by = rng.randrange(2, 14) * 4, rng.randrange(2, 12) * 4
+        for y in range(by, by + 4):
+            for x in range(bx, bx + 4):
+                grid[y][x] = WALL
+    # exit door with a shape inside, and a rotator
+    for y in range(8, 17):
+        for x in range(44, 53):
+            border = y in (8, 16) or x in (44, 52)
+            grid[y][x] = DOOR if border else FLOOR
+    for y, row in enumerate(KEY_SHAPE):
+        for x, value in enumerate(row):
+            grid[11 + y][47 + x] = value
+    grid[40][20] = grid[40][21] = grid[41][20] = grid[41][21] = 9
+    # the matching key in the bottom-left corner, twice the size
+    for y in range(6):
+        for x in range(6):
+            grid[56 + y][3 + x] = KEY_SHAPE[y // 2][x // 2]
+    return grid
+
+
+def _draw_player(grid: list[list[int]], x: int, y: int) -> list[list[int]]:
+    frame = [row[:] for row in grid]
+    for dy in range(4):
+        for dx in range(4):
+            frame[y + dy][x + dx] = PLAYER_HEAD if dy == 0 else PLAYER_BODY
+    return frame
+
+
+def synthetic_frames(n: int = 20, seed: int = 0) -> list[FrameData]:
+    """`n` frames of a player wandering a walled level, one move per frame.
+
+    Every tenth frame is a three-grid animation burst, like the ones real
+    games send for level transitions.
+    """
+    rng = random.Random(seed)
+    level = _level(rng)
+    x, y = 8, 24
+    while level[y][x] != FLOOR:
+        x += 4
+    frames: list[FrameData] = []
+    action = GameAction.RESET
+    for i in range(n):
+        if i:
+            action = rng.choice(list(MOVES))
+            dx, dy = MOVES[action]
+            cells = [level[y + dy + j][x + dx + k] for j in range(4) for k in range(4)]
+            if all(c == FLOOR for c in cells):
+                x, y = x + dx, y + dy
+            level[2][53 - (i - 1) % 54] = ENERGY_USED
+        grid = _draw_player(level, x, y)
+        grids = [grid]
+        if i and i % 10 == 0:
+            grids = [_draw_player(level, x, y - 4), _draw_player(level, x, y - 2), grid]
+        frames.append(
+            FrameData(
+                game_id="ls20-synthetic",
+                frame=grids,
+                state=GameState.NOT_FINISHED,
+                score=0,
+                action_input=ActionInput(id=action),
+            )
+        )
+    return frames
+
+
+def load_corpus(
+    paths: Iterable[str] = (), game: Optional[str] = None, limit: int = 20
+) -> list[FrameData]:
+    """Recorded frames when `paths` are given, otherwise the synthetic game."""
+    paths = list(paths)
+    if paths:
+        return recorded_frames(paths, game=game, limit=limit)
+    return synthetic_frames(limit)
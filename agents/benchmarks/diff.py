@@ -0,0 +1,154 @@
+"""Wall time of the frame comparisons.
+
+Each comparison runs on every pair of consecutive frames of the corpus, as
+does its per-cell reference implementation from `agents.benchmarks.reference`
+if it has one, and the two outputs are compared.
+
+    uv run -m agents.benchmarks.diff --save-baseline diff.json
+    uv run -m agents.benchmarks.diff --baseline diff.json
+    uv run -m agents.benchmarks.diff recordings/ --game ls20 --frames 40
+"""
+
+import argparse
+import statistics
+import time
+from typing import Any, Callable, Optional
+
+from ..bursts import summarize_burst
+from ..diffing import diff_frames
+from ..specialist.change_detection_specialist import ChangeDetectionSpecialist
+from ..structs import FrameData
+from ..templates.langgraph.nodes import describe_frame_delta
+from . import reference
+from .corpus import load_corpus
+from .report import format_table, load_results, save_results
+
+COLUMNS = [
+    ("ms", "ms"),
+    ("ms_p95", "p95 ms"),
+    ("reference_ms", "reference ms"),
+    ("speedup", "speedup"),
+    ("identical", "identical"),
+]
+
+Compare = Callable[[FrameData, FrameData], Any]
+
+
+def _detect_delta(before: FrameData, after: FrameData) -> dict[str, Any]:
+    delta = ChangeDetectionSpecialist().detect_delta(before, after)
+    return {key: delta[key] for key in ("pixels_changed", "specific_changes")}
+
+
+def _moved_objects(before: FrameData, after: FrameData) -> list[dict[str, Any]]:
+    specialist = ChangeDetectionSpecialist()
+    specialist.TRACK_OBJECTS = True
+    moved: list[dict[str, Any]] = specialist.detect_delta(before, after)[
+        "moved_objects"
+    ]
+    return moved
+
+
+def _reference_frame_delta(before: FrameData, after: FrameData) -> str:
+    text = reference.frame_delta(
+        before.frame[-1] if before.frame else [],
+        after.frame[-1] if after.frame else [],
+    )
+    if burst := summarize_burst(after.frame).describe():
+        text += f"\n\n{burst}"
+    return text
+
+
+# name -> (comparison, reference implementation or None)
+COMPARISONS: dict[str, tuple[Compare, Optional[Compare]]] = {
+    "diff_frames": (
+        lambda before, after: diff_frames(before.frame, after.frame).report(),
+        None,
+    ),
+    "detect_delta": (
+        _detect_delta,
+        lambda before, after: reference.detect_delta(before.frame[-1], after.frame[-1]),
+    ),
+    "detect_delta(objects)": (_moved_objects, None),
+    "frame_delta": (describe_frame_delta, _reference_frame_delta),
+}
+
+
+def time_compare(
+    compare: Compare, pairs: list[tuple[FrameData, FrameData]], repeat: int
+) -> list[float]:
+    """Milliseconds per pair of frames, the best of `repeat` runs."""
+    times = []
+    for before, after in pairs:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compare(before, after)
+            best = min(best, time.perf_counter() - start)
+        times.append(best * 1000)
+    return times
+
+
+def run_benchmark(
+    corpus: list[FrameData],
+    comparisons: Optional[list[str]] = None,
+    repeat: int = 3,
+    with_reference: bool = True,
+) -> dict[str, Any]:
+    """Time each comparison (and its reference) on consecutive frame pairs."""
+    pairs = list(zip(corpus, corpus[1:]))
+    rows: dict[str, dict[str, float]] = {}
+    for name in comparisons or list(COMPARISONS):
+        compare, slow = COMPARISONS[name]
+        ms = sorted(time_compare(compare, pairs, repeat))
+        row = {
+            "ms": statistics.mean(ms),
+            "ms_p95": ms[min(len(ms) - 1, len(ms) * 95 // 100)],
+        }
+        if slow is not None and with_reference:
+            row["reference_ms"] = statistics.mean(time_compare(slow, pairs, 1))
+            row["speedup"] = row["reference_ms"] / row["ms"]
+            row["identical"] = float(all(compare(*p) == slow(*p) for p in pairs))
+        rows[name] = row
+    return {"pairs": len(pairs), "comparisons": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the frame comparisons")
+    parser.add_argument("paths", nargs="*", help="recordings to take frames from")
+    parser.add_argument("--game", help="only use frames whose game_id starts with this")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--comparisons",
+        help=f"comma separated subset of: {', '.join(COMPARISONS)}",
+    )
+    parser.add_argument(
+        "--no-reference",
+        action="store_true",
+        help="skip the (slow) reference implementations",
+    )
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    args = parser.parse_args()
+
+    comparisons = args.comparisons.split(",") if args.comparisons else None
+    if unknown := set(comparisons or []) - set(COMPARISONS):
+        parser.error(f"unknown comparisons: {', '.join(sorted(unknown))}")
+    corpus = load_corpus(args.paths, game=args.game, limit=args.frames)
+    if len(corpus) < 2:
+        parser.error("need at least two playable frames in the given recordings")
+
+    results = run_benchmark(
+        corpus, comparisons, repeat=args.repeat, with_reference=not args.no_reference
+    )
+    baseline = load_results(args.baseline)["comparisons"] if args.baseline else None
+
+    print(f"{results['pairs']} frame pairs, milliseconds per pair")
+    print(format_table(results["comparisons"], COLUMNS, baseline, title="comparison"))
+    if args.save_baseline:
+        save_results(args.save_baseline, results)
+        print(f"Saved results to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
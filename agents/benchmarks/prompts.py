@@ -0,0 +1,304 @@
+"""Token and CPU cost of every prompt builder, on a fixed corpus of frames.
+
+Each builder runs its real code path against a `StubBackend`, and every
+request it sends is measured before the stub answers: text tokens, image
+tokens, image count and payload size. Build time is the CPU time of the
+turn minus the time spent inside the backend. Per-turn caches are turned
+off so every frame is priced. The "(overlay)" builders show the changes
+on one image (`agents.rendering.overlay_changes`) where the others attach
+the previous and the current screen.
+
+    uv run -m agents.benchmarks.prompts --save-baseline prompts.json
+    uv run -m agents.benchmarks.prompts --baseline prompts.json
+    uv run -m agents.benchmarks.prompts recordings/ --game ls20 --frames 40
+"""
+
+import argparse
+import itertools
+import logging
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from langgraph.graph import END, START, StateGraph
+from langgraph.store.memory import InMemoryStore
+
+from ..inference import ChatBackend, StubBackend, set_backend
+from ..structs import FrameData
+from ..templates.langgraph import nodes
+from ..templates.langgraph.explanations import ExplanationCache
+from ..templates.langgraph.keys import KeyMatcher
+from ..templates.langgraph.schema import LLM as GraphLLM
+from ..templates.langgraph.schema import AgentState
+from ..templates.langgraph.vision import RenderCache
+from ..templates.langgraph_functional_agent import SYS_PROMPT, format_frame
+from ..templates.llm_agents import LLM, FastLLM, GuidedLLM
+from ..templates.reasoning_agent import ReasoningAgent
+from .corpus import load_corpus
+from .report import format_table, load_results, save_results
+from .tokens import PromptSample, TokenCounter, measure_request
+
+logger = logging.getLogger()
+
+COLUMNS = [
+    ("calls", "calls"),
+    ("text_tokens", "text tok"),
+    ("image_tokens", "image tok"),
+    ("total_tokens", "total tok"),
+    ("images", "images"),
+    ("payload_kb", "KB"),
+    ("build_ms", "build ms"),
+    ("build_ms_p95", "p95 ms"),
+]
+
+
+class PromptSampler(ChatBackend):
+    """Backend wrapper that measures each request and the time spent building it."""
+
+    samples: dict[str, list[PromptSample]]
+
+    def __init__(
+        self, counter: TokenCounter, inner: Optional[ChatBackend] = None
+    ) -> None:
+        self.counter = counter
+        self.inner = inner or StubBackend()
+        self.samples = {}
+        self._current: Optional[PromptSample] = None
+        self._excluded = 0.0
+
+    @contextmanager
+    def measure(self, builder: str) -> Iterator[None]:
+        """Attribute the requests made inside the block to `builder`."""
+        self._current, self._excluded = PromptSample(), 0.0
+        start = time.process_time()
+        try:
+            yield
+        finally:
+            sample = self._current
+            sample.build_seconds = time.process_time() - start - self._excluded
+            self.samples.setdefault(builder, []).append(sample)
+            self._current = None
+
+    def submit(self, request: dict[str, Any]) -> None:
+        """Measure a request without sending it (for builders that only build)."""
+        start = time.process_time()
+        if self._current is not None:
+            self._current.add(measure_request(request, self.counter))
+        self._excluded += time.process_time() - start
+
+    def create(self, **kwargs: Any) -> Any:
+        # measured now: agents keep mutating their message lists after sending
+        self.submit(kwargs)
+        start = time.process_time()
+        try:
+            return self.inner.create(**kwargs)
+        finally:
+            self._excluded += time.process_time() - start
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Mean per-turn numbers for each builder, ignoring turns without requests."""
+        rows: dict[str, dict[str, float]] = {}
+        for builder, samples in self.samples.items():
+            turns = [s for s in samples if s.calls]
+            if not turns:
+                continue
+            build_ms = sorted(s.build_seconds * 1000 for s in turns)
+            rows[builder] = {
+                "turns": len(turns),
+                "calls": statistics.mean(s.calls for s in turns),
+                "text_tokens": statistics.mean(s.text_tokens for s in turns),
+                "image_tokens": statistics.mean(s.image_tokens for s in turns),
+                "total_tokens": statistics.mean(
+                    s.text_tokens + s.image_tokens for s in turns
+                ),
+                "images": statistics.mean(s.images for s in turns),
+                "payload_kb": statistics.mean(s.payload_bytes for s in turns) / 1024,
+                "build_ms": statistics.mean(build_ms),
+                "build_ms_p95": build_ms[
+                    min(len(build_ms) - 1, len(build_ms) * 95 // 100)
+                ],
+            }
+        return rows
+
+
+Builder = Callable[[list[FrameData], PromptSampler, str], None]
+
+
+def _agent_builder(cls: type[LLM], **settings: Any) -> Builder:
+    """Runs an agent, with class attributes overridden by `settings`."""
+
+    def run(corpus: list[FrameData], sampler: PromptSampler, name: str) -> None:
+        agent = cls(
+            card_id="benchmark",
+            game_id=corpus[0].game_id or "benchmark",
+            agent_name="benchmark",
+            ROOT_URL="http://localhost",
+            record=False,
+        )
+        for setting, value in settings.items():
+            setattr(agent, setting, value)
+        agent.backend = sampler
+        agent.decision_cache = None
+        agent.local_policy = None
+        for frame in corpus:
+            agent.append_frame(frame)
+            with sampler.measure(name):
+                agent.choose_action(agent.frames, frame)
+
+    return run
+
+
+def _langgraph_nodes(diff_overlay: bool = False) -> Builder:
+    def run(corpus: list[FrameData], sampler: PromptSampler, name: str) -> None:
+        _run_langgraph_nodes(corpus, sampler, name, diff_overlay)
+
+    return run
+
+
+def _run_langgraph_nodes(
+    corpus: list[FrameData], sampler: PromptSampler, prefix: str, diff_overlay: bool
+) -> None:
+    """check_key, analyze_frame_delta and act, wired up like the LangGraph agent."""
+
+    def timed(name: str, node: Callable[[AgentState], AgentState]) -> Any:
+        def run(state: AgentState) -> AgentState:
+            with sampler.measure(f"{prefix}.{name}"):
+                return node(state)
+
+        return run
+
+    graph = StateGraph(AgentState)
+    for name in ("check_key", "analyze_frame_delta", "act"):
+        graph.add_node(name, timed(name, getattr(nodes, name)))
+    graph.add_edge(START, "check_key")
+    graph.add_edge("check_key", "analyze_frame_delta")
+    graph.add_edge("analyze_frame_delta", "act")
+    graph.add_edge("act", END)
+    workflow = graph.compile(store=InMemoryStore())
+
+    moves = itertools.cycle(["ACTION1", "ACTION4", "ACTION2", "ACTION3"])
+    sampler.inner = StubBackend(
+        script=({"name": "act", "arguments": {"action": {"type": m}}} for m in moves)
+    )
+    set_backend(sampler)
+    # one render cache, key matcher and explanation cache per game, like the agent
+    config: Any = {
+        "configurable": {
+            "render_cache": RenderCache(),
+            "key_matcher": KeyMatcher(),
+            "explanation_cache": ExplanationCache(),
+            "diff_overlay": diff_overlay,
+        }
+    }
+    try:
+        latest: Optional[FrameData] = None
+        for frame in corpus:
+            state: AgentState = {
+                "action": frame.action_input.id,
+                "context": [],
+                "key_matches_door": False,
+                "llm": GraphLLM.OPENAI_GPT_41,
+                "thoughts": [],
+                "frames": [],
+                "latest_frame": frame,
+                "previous_frame": latest,
+            }
+            workflow.invoke(state, config)  # type: ignore[arg-type]
+            latest = frame
+    finally:
+        set_backend(None)
+
+
+def _format_frame(as_image: bool) -> Builder:
+    def run(corpus: list[FrameData], sampler: PromptSampler, name: str) -> None:
+        for frame in corpus:
+            with sampler.measure(name):
+                content = format_frame(frame, as_image)
+                sampler.submit(
+                    {
+                        "messages": [
+                            {"role": "system", "content": SYS_PROMPT},
+                            {"role": "user", "content": content},
+                        ]
+                    }
+                )
+
+    return run
+
+
+BUILDERS: dict[str, Builder] = {
+    "LLM": _agent_builder(LLM),
+    "FastLLM": _agent_builder(FastLLM),
+    "GuidedLLM": _agent_builder(GuidedLLM),
+    "ReasoningAgent": _agent_builder(ReasoningAgent),
+    "ReasoningAgent(overlay)": _agent_builder(ReasoningAgent, DIFF_OVERLAY=True),
+    "langgraph": _langgraph_nodes(),
+    "langgraph(overlay)": _langgraph_nodes(diff_overlay=True),
+    "format_frame(text)": _format_frame(as_image=False),
+    "format_frame(image)": _format_frame(as_image=True),
+}
+
+
+def run_benchmark(
+    corpus: list[FrameData],
+    builders: Optional[list[str]] = None,
+    counter: Optional[TokenCounter] = None,
+) -> dict[str, Any]:
+    """Feed `corpus` through each builder and summarize what it sent."""
+    sampler = PromptSampler(counter or TokenCounter())
+    for name in builders or list(BUILDERS):
+        sampler.inner = StubBackend()
+        BUILDERS[name](corpus, sampler, name)
+    return {
+        "tokenizer": sampler.counter.name,
+        "frames": len(corpus),
+        "builders": sampler.summary(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the prompt builders")
+    parser.add_argument("paths", nargs="*", help="recordings to take frames from")
+    parser.add_argument("--game", help="only use frames whose game_id starts with this")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument(
+        "--builders",
+        help=f"comma separated subset of: {', '.join(BUILDERS)}",
+    )
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    args = parser.parse_args()
+
+    builders = args.builders.split(",") if args.builders else None
+    if unknown := set(builders or []) - set(BUILDERS):
+        parser.error(f"unknown builders: {', '.join(sorted(unknown))}")
+    corpus = load_corpus(args.paths, game=args.game, limit=args.frames)
+    if not corpus:
+        parser.error("no playable frames found in the given recordings")
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run_benchmark(corpus, builders)
+
+    baseline = None
+    if args.baseline:
+        base = load_results(args.baseline)
+        if base.get("tokenizer") != results["tokenizer"]:
+            print(
+                f"Warning: baseline was counted with {base.get('tokenizer')}, "
+                f"this run with {results['tokenizer']}"
+            )
+        baseline = base.get("builders")
+
+    print(
+        f"{results['frames']} frames, tokens counted with {results['tokenizer']}, "
+        "means per turn"
+    )
+    print(format_table(results["builders"], COLUMNS, baseline))
+    if args.save_baseline:
+        save_results(args.save_baseline, results)
+        print(f"Saved results to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""The per-cell code the templates used before it was vectorized.
+
+It is kept as the speed baseline and correctness oracle of
+`agents.benchmarks.render` and `agents.benchmarks.diff`: the vectorized
+versions must produce the same pixels and the same changes.
+"""
+
+import base64
+from io import BytesIO
+from typing import Any, Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from ..templates.langgraph.vision import COLOR_PALETTE, SCALE_FACTOR, add_highlight
+
+
+def render_frame(
+    array_3d: list[list[list[int]]], description: str, with_highlights: bool = True
+) -> str:
+    """`langgraph.vision.render_frame` filling one pixel at a time."""
+    default_color = (255, 255, 255)
+    np_array = np.array(array_3d[-1], dtype=np.uint8)
+    orig_height, orig_width = np_array.shape
+    scaled_width = (orig_width + 1) * SCALE_FACTOR
+    scaled_height = (orig_height + 1) * SCALE_FACTOR
+    description_height = 40
+    img = Image.new("RGB", (scaled_width, scaled_height + description_height))
+    pixels = img.load()
+    assert pixels is not None
+
+    for y in range(orig_height):
+        for x in range(orig_width):
+            color_num = np_array[y, x]
+            color = COLOR_PALETTE.get(color_num, default_color)
+            for i in range(SCALE_FACTOR):
+                for j in range(SCALE_FACTOR):
+                    pixels[
+                        (x * SCALE_FACTOR + j) + SCALE_FACTOR,
+                        (y * SCALE_FACTOR + i) + SCALE_FACTOR,
+                    ] = color
+
+    draw = ImageDraw.Draw(img)
+    line_color = (128, 128, 128)
+    for k_h in range(orig_height + 1):
+        y = k_h * SCALE_FACTOR
+        draw.line([(0, y), (scaled_width - 1, y)], fill=line_color, width=1)
+    draw.line(
+        [(0, scaled_height - 1), (scaled_width - 1, scaled_height - 1)],
+        fill=line_color,
+        width=1,
+    )
+    for k_v in range(orig_width + 1):
+        x = k_v * SCALE_FACTOR
+        draw.line([(x, 0), (x, scaled_height - 1)], fill=line_color, width=1)
+    draw.line(
+        [(scaled_width - 1, 0), (scaled_width - 1, scaled_height - 1)],
+        fill=line_color,
+        width=1,
+    )
+
+    font = ImageFont.load_default()
+    text_color = (255, 255, 255)
+    for col_idx in range(orig_width):
+        draw.text(
+            (
+                (col_idx * SCALE_FACTOR + SCALE_FACTOR / 2.0) + SCALE_FACTOR,
+                SCALE_FACTOR / 2.0,
+            ),
+            str(col_idx),
+            font=font,
+            fill=text_color,
+            anchor="mm",
+        )
+    for row_idx in range(orig_height):
+        draw.text(
+            (
+                SCALE_FACTOR / 2.0,
+                (row_idx * SCALE_FACTOR + SCALE_FACTOR / 2.0) + SCALE_FACTOR,
+            ),
+            str(row_idx),
+            font=font,
+            fill=text_color,
+            anchor="mm",
+        )
+
+    if with_highlights:
+        add_highlight(draw, ((2, 2), (47, 5)), "Health")
+        add_highlight(draw, ((52, 1), (64, 5)), "Lives")
+        found_player = found_door = found_rotator = False
+        for y in range(orig_height):
+            if found_player and found_door and found_rotator:
+                break
+            for x in range(orig_width):
+                if np_array[y, x] == 12 and not found_player:
+                    found_player = True
+                    add_highlight(draw, ((x + 1, y + 1), (x + 9, y + 9)), "Player")
+                    break
+                if np_array[y, x] == 5 and not found_door:
+                    found_door = True
+                    add_highlight(draw, ((x + 1, y + 1), (x + 9, y + 9)), "Door")
+                    break
+                if (
+                    np_array[y, x] == 9
+                    and np_array[y - 1, x] == 3
+                    and not found_rotator
+                ):
+                    found_rotator = True
+                    add_highlight(draw, ((x + 1, y + 1), (x + 9, y + 9)), "Rotator")
+                    break
+        add_highlight(draw, ((2, 55), (11, 64)), "Key")
+
+    draw.text(
+        (scaled_width / 2, scaled_height + (description_height / 2)),
+        description,
+        font=font,
+        fill=text_color,
+        anchor="mm",
+    )
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+ZONE_COLORS = {
+    0: "#FFFFFF",
+    1: "#CCCCCC",
+    2: "#999999",
+    3: "#666666",
+    4: "#333333",
+    5: "#000000",
+    6: "#E53AA3",
+    7: "#FF7BCC",
+    8: "#F93C31",
+    9: "#1E93FF",
+    10: "#88D8F1",
+    11: "#FFDC00",
+    12: "#FF851B",
+    13: "#921231",
+    14: "#4FCC30",
+    15: "#A356D6",
+}
+
+
+def generate_grid_image_with_zone(
+    grid: list[list[int]], cell_size: int = 40, zone_size: int = 16
+) -> bytes:
+    """`ReasoningAgent.generate_grid_image_with_zone` drawing one rectangle per cell."""
+    height, width = len(grid), len(grid[0])
+    img = Image.new("RGB", (width * cell_size, height * cell_size), color="white")
+    draw = ImageDraw.Draw(img)
+    for y in range(height):
+        for x in range(width):
+            draw.rectangle(
+                [
+                    x * cell_size,
+                    y * cell_size,
+                    (x + 1) * cell_size,
+                    (y + 1) * cell_size,
+                ],
+                fill=ZONE_COLORS.get(grid[y][x], "#888888"),
+                outline="#000000",
+                width=1,
+            )
+    font: Optional[ImageFont.ImageFont | ImageFont.FreeTypeFont] = None
+    for y in range(0, height, zone_size):
+        for x in range(0, width, zone_size):
+            font = font or ImageFont.load_default()
+            draw.text(
+                (x * cell_size + 2, y * cell_size + 2),
+                f"({x},{y})",
+                fill="#FFFFFF",
+                font=font,
+            )
+            zone_width = min(zone_size, width - x) * cell_size
+            zone_height = min(zone_size, height - y) * cell_size
+            draw.rectangle(
+                [
+                    x * cell_size,
+                    y * cell_size,
+                    x * cell_size + zone_width,
+                    y * cell_size + zone_height,
+                ],
+                fill=None,
+                outline="#FFD700",
+                width=2,
+            )
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def detect_delta(
+    grid_before: list[list[int]], grid_after: list[list[int]]
+) -> dict[str, Any]:
+    """The cell loop of `ChangeDetectionSpecialist.detect_delta`."""
+    pixels_changed = 0
+    changes = []
+    for y in range(len(grid_before)):
+        for x in range(len(grid_before[y])):
+            if grid_before[y][x] != grid_after[y][x]:
+                pixels_changed += 1
+                changes.append(
+                    {
+                        "pos": (x, y),
+                        "before": grid_before[y][x],
+                        "after": grid_after[y][x],
+                    }
+                )
+    return {"pixels_changed": pixels_changed, "specific_changes": changes[:20]}
+
+
+def frame_delta(previous_grid: list[list[int]], latest_grid: list[list[int]]) -> str:
+    """The cell loop of the langgraph `analyze_frame_delta` node, without the
+    animation summary."""
+    movements: list[str] = []
+    state_changes: list[str] = []
+    for j in range(min(len(latest_grid), len(previous_grid))):
+        for k in range(min(len(latest_grid[j]), len(previous_grid[j]))):
+            if latest_grid[j][k] != previous_grid[j][k]:
+                if j == 1:
+                    state_changes.append("Change in heath indicator")
+                elif j == 2 and k < 54:
+                    if latest_grid[j][k] == 8:
+                        state_changes.append("1 energy unit used")
+                    elif latest_grid[j][k] == 6:
+                        state_changes.append("1 energy unit added")
+                else:
+                    movements.append(
+                        f"<{j},{k}>: {previous_grid[j][k]} -> {latest_grid[j][k]}"
+                    )
+
+    deltas_str = "\n".join(state_changes)
+    if movements:
+        deltas_str += "\n\nChanged pixels:\n" + ",".join(movements)
+    else:
+        deltas_str += "\n\nCharacter did not move. Maybe an action was taken towards an unmovable area?"
+    return deltas_str
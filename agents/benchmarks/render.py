@@ -0,0 +1,181 @@
+"""Wall time and image size of the frame renderers.
+
+Every renderer runs on each frame of the corpus, as does its reference
+implementation from `agents.benchmarks.reference` if it has one, and the
+two outputs are compared pixel by pixel. PNG size and the estimated
+`detail: high` image tokens are reported for each renderer.
+
+    uv run -m agents.benchmarks.render --save-baseline render.json
+    uv run -m agents.benchmarks.render --baseline render.json
+    uv run -m agents.benchmarks.render recordings/ --game ls20 --frames 40
+"""
+
+import argparse
+import base64
+import io
+import statistics
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+from PIL import Image
+
+from ..rendering import render_zones
+from ..structs import FrameData
+from ..templates.langgraph.vision import render_frame
+from ..templates.reasoning_agent import KEY_PALETTE
+from . import reference
+from .corpus import load_corpus
+from .report import format_table, load_results, save_results
+from .tokens import image_tokens
+
+COLUMNS = [
+    ("ms", "ms"),
+    ("ms_p95", "p95 ms"),
+    ("kb", "KB"),
+    ("image_tokens", "image tok"),
+    ("reference_ms", "reference ms"),
+    ("speedup", "speedup"),
+    ("identical", "identical"),
+]
+
+Render = Callable[[FrameData], Any]
+
+# name -> (renderer, reference implementation or None)
+RENDERERS: dict[str, tuple[Render, Optional[Render]]] = {
+    "render_frame": (
+        lambda frame: render_frame(frame.frame, "Current frame"),
+        lambda frame: reference.render_frame(frame.frame, "Current frame"),
+    ),
+}
+
+
+def _zones(cell_size: int, palette_mode: bool) -> tuple[Render, Optional[Render]]:
+    def render(frame: FrameData) -> bytes:
+        return render_zones(
+            frame.frame[-1], KEY_PALETTE, cell_size, palette_mode=palette_mode
+        ).png
+
+    def slow(frame: FrameData) -> bytes:
+        return reference.generate_grid_image_with_zone(frame.frame[-1], cell_size)
+
+    # palette images have crisp labels, so only RGB ones match the reference
+    return render, None if palette_mode else slow
+
+
+for _size in (40, 12):
+    for _mode in (False, True):
+        RENDERERS[f"zones({_size}px {'palette' if _mode else 'rgb'})"] = _zones(
+            _size, _mode
+        )
+
+
+def pixels(image: Any) -> Any:
+    """`image` (a PIL image, PNG bytes or base64 PNG) as an array for comparison."""
+    if isinstance(image, str):
+        image = base64.b64decode(image)
+    if isinstance(image, bytes):
+        image = Image.open(io.BytesIO(image))
+    if isinstance(image, Image.Image):
+        return np.asarray(image.convert("RGB"))
+    return image
+
+
+def image_size(output: Any) -> Optional[tuple[int, tuple[int, int]]]:
+    """The PNG bytes and (width, height) of a rendered image, if it is one."""
+    if isinstance(output, str):
+        output = base64.b64decode(output)
+    if not isinstance(output, bytes):
+        return None
+    with Image.open(io.BytesIO(output)) as image:
+        return len(output), image.size
+
+
+def same_output(first: Any, second: Any) -> bool:
+    return bool(np.array_equal(pixels(first), pixels(second)))
+
+
+def time_render(render: Render, corpus: list[FrameData], repeat: int) -> list[float]:
+    """Milliseconds per frame, the best of `repeat` runs."""
+    times = []
+    for frame in corpus:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(frame)
+            best = min(best, time.perf_counter() - start)
+        times.append(best * 1000)
+    return times
+
+
+def run_benchmark(
+    corpus: list[FrameData],
+    renderers: Optional[list[str]] = None,
+    repeat: int = 3,
+    with_reference: bool = True,
+) -> dict[str, Any]:
+    """Time each renderer (and its reference) on `corpus` and compare outputs."""
+    rows: dict[str, dict[str, float]] = {}
+    for name in renderers or list(RENDERERS):
+        render, slow = RENDERERS[name]
+        ms = sorted(time_render(render, corpus, repeat))
+        row = {
+            "ms": statistics.mean(ms),
+            "ms_p95": ms[min(len(ms) - 1, len(ms) * 95 // 100)],
+        }
+        sizes = [image_size(render(frame)) for frame in corpus]
+        if all(size is not None for size in sizes):
+            row["kb"] = statistics.mean(s[0] for s in sizes if s) / 1024
+            row["image_tokens"] = statistics.mean(
+                image_tokens(*s[1]) for s in sizes if s
+            )
+        if slow is not None and with_reference:
+            row["reference_ms"] = statistics.mean(time_render(slow, corpus, 1))
+            row["speedup"] = row["reference_ms"] / row["ms"]
+            row["identical"] = float(
+                all(same_output(render(f), slow(f)) for f in corpus)
+            )
+        rows[name] = row
+    return {"frames": len(corpus), "renderers": rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the frame renderers")
+    parser.add_argument("paths", nargs="*", help="recordings to take frames from")
+    parser.add_argument("--game", help="only use frames whose game_id starts with this")
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--renderers",
+        help=f"comma separated subset of: {', '.join(RENDERERS)}",
+    )
+    parser.add_argument(
+        "--no-reference",
+        action="store_true",
+        help="skip the (slow) reference implementations",
+    )
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this file")
+    args = parser.parse_args()
+
+    renderers = args.renderers.split(",") if args.renderers else None
+    if unknown := set(renderers or []) - set(RENDERERS):
+        parser.error(f"unknown renderers: {', '.join(sorted(unknown))}")
+    corpus = load_corpus(args.paths, game=args.game, limit=args.frames)
+    if not corpus:
+        parser.error("no playable frames found in the given recordings")
+
+    results = run_benchmark(
+        corpus, renderers, repeat=args.repeat, with_reference=not args.no_reference
+    )
+    baseline = load_results(args.baseline)["renderers"] if args.baseline else None
+
+    print(f"{results['frames']} frames, milliseconds per frame")
+    print(format_table(results["renderers"], COLUMNS, baseline, title="renderer"))
+    if args.save_baseline:
+        save_results(args.save_baseline, results)
+        print(f"Saved results to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
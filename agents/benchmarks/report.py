@@ -0,0 +1,63 @@
+"""Comparison tables and baseline files shared by the benchmarks."""
+
+import json
+import os
+from typing import Any, Optional
+
+Rows = dict[str, dict[str, float]]
+
+
+def save_results(path: str, results: dict[str, Any]) -> None:
+    if directory := os.path.dirname(path):
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        results: dict[str, Any] = json.load(f)
+    return results
+
+
+def _cell(value: float, base: Optional[float]) -> str:
+    text = f"{value:,.0f}" if abs(value) >= 100 else f"{value:,.2f}"
+    if base:
+        text += f" ({(value - base) / base:+.0%})"
+    return text
+
+
+def format_table(
+    rows: Rows,
+    columns: list[tuple[str, str]],
+    baseline: Optional[Rows] = None,
+    title: str = "builder",
+) -> str:
+    """A plain-text table of `rows`, with the change from `baseline` in brackets.
+
+    `columns` are (key, header) pairs; rows missing from the baseline get
+    no comparison, and values missing from a row are shown as "-".
+    """
+    baseline = baseline or {}
+    header = [title, *(h for _, h in columns)]
+    body = [
+        [
+            name,
+            *(
+                _cell(row[k], baseline.get(name, {}).get(k)) if k in row else "-"
+                for k, _ in columns
+            ),
+        ]
+        for name, row in rows.items()
+    ]
+    widths = [max(len(r[i]) for r in [header, *body]) for i in range(len(header))]
+    lines = []
+    for i, r in enumerate([header, *body]):
+        cells = [
+            r[0].ljust(widths[0]),
+            *(c.rjust(w) for c, w in zip(r[1:], widths[1:])),
+        ]
+        lines.append("  ".join(cells))
+        if i == 0:
+            lines.append("  ".join("-" * w for w in widths))
+    return "\n".join(lines)
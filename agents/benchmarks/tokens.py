@@ -0,0 +1,131 @@
+"""Local estimates of what a chat completion request costs in tokens.
+
+Text is counted with tiktoken when its encoding is available (it ships with
+langchain-openai, but downloads the encoding on first use). Without it the
+counter falls back to a regex estimate and says so in its `name`, so
+results are only compared against baselines made with the same counter.
+Images are priced with OpenAI's published tile formula.
+"""
+
+import base64
+import json
+import logging
+import math
+import re
+from io import BytesIO
+from typing import Any, Optional
+
+from PIL import Image
+from pydantic import BaseModel
+
+logger = logging.getLogger()
+
+# per-message and reply-priming overhead of the chat format
+MESSAGE_TOKENS = 3
+REPLY_TOKENS = 3
+
+# roughly one token per word, digit triple or punctuation mark
+_APPROX = re.compile(r"\d{1,3}|[^\W\d_]+|[^\w\s]")
+
+
+class TokenCounter:
+    """Counts text tokens with tiktoken, or estimates them if it is unavailable."""
+
+    name: str
+
+    def __init__(self, encoding: str = "o200k_base") -> None:
+        self._encoding: Optional[Any] = None
+        try:
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(encoding)
+            self.name = f"tiktoken/{encoding}"
+        except Exception as e:
+            logger.warning(f"tiktoken {encoding} unavailable, estimating tokens: {e}")
+            self.name = "approx"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(_APPROX.findall(text))
+
+
+def image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """Tokens billed for one image input (`auto` is priced like `high`)."""
+    if detail == "low":
+        return 85
+    # fit within 2048 x 2048, then shrink the short side to 768, in 512px tiles
+    scale = min(1.0, 2048 / max(width, height))
+    scale *= min(1.0, 768 / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+    return 85 + 170 * tiles
+
+
+class PromptSample(BaseModel):
+    """Size of the request(s) one builder produced for one frame."""
+
+    calls: int = 0
+    text_tokens: int = 0
+    image_tokens: int = 0
+    images: int = 0
+    payload_bytes: int = 0
+    build_seconds: float = 0.0
+
+    def add(self, other: "PromptSample") -> None:
+        self.calls += other.calls
+        self.text_tokens += other.text_tokens
+        self.image_tokens += other.image_tokens
+        self.images += other.images
+        self.payload_bytes += other.payload_bytes
+
+
+def _image_part(part: dict[str, Any]) -> int:
+    """Tokens of an `image_url` content part."""
+    image_url = part.get("image_url", {})
+    url = image_url if isinstance(image_url, str) else image_url.get("url", "")
+    detail = "high" if isinstance(image_url, str) else image_url.get("detail", "auto")
+    if url.startswith("data:") and "," in url:
+        with Image.open(BytesIO(base64.b64decode(url.split(",", 1)[1]))) as img:
+            width, height = img.size
+            return image_tokens(width, height, detail)
+    return image_tokens(512, 512, detail=detail)
+
+
+def _message(message: Any) -> dict[str, Any]:
+    if isinstance(message, dict):
+        return message
+    dumped: dict[str, Any] = message.model_dump(exclude_none=True)
+    return dumped
+
+
+def measure_request(request: dict[str, Any], counter: TokenCounter) -> PromptSample:
+    """Token and payload size of one `chat.completions.create` request."""
+    sample = PromptSample(calls=1)
+    messages = [_message(m) for m in request.get("messages", [])]
+    for message in messages:
+        sample.text_tokens += MESSAGE_TOKENS
+        content = message.get("content")
+        parts = content if isinstance(content, list) else [content]
+        for part in parts:
+            if isinstance(part, str):
+                sample.text_tokens += counter.count(part)
+            elif isinstance(part, dict) and part.get("type") == "image_url":
+                sample.images += 1
+                sample.image_tokens += _image_part(part)
+            elif isinstance(part, dict) and part.get("type") == "text":
+                sample.text_tokens += counter.count(part.get("text", ""))
+        for key in ("name", "tool_calls", "function_call"):
+            if message.get(key):
+                sample.text_tokens += counter.count(
+                    json.dumps(message[key], default=str)
+                )
+    for key in ("tools", "functions", "response_format"):
+        if request.get(key):
+            sample.text_tokens += counter.count(json.dumps(request[key], default=str))
+    sample.text_tokens += REPLY_TOKENS
+    sample.payload_bytes = len(
+        json.dumps({**request, "messages": messages}, default=str)
+    )
+    return sample
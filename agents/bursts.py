@@ -0,0 +1,100 @@
+"""Collapsing multi-grid frames.
+
+One action can produce several sequential grids (an animation burst, e.g.
+a level transition or an object sliding). Only the final grid is the state
+the next action applies to, so prompt builders and renderers show that
+grid and describe the motion before it in one line instead of paying
+tokens and render time for every intermediate grid.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+
+
+class Burst:
+    """The final grid of a frame plus a summary of how it got there.
+
+    `net_changed` counts cells that differ between the first and final
+    grid, `transient_changed` cells that changed during the burst but ended
+    as they started. `steps` holds (changed cells, centroid row, centroid
+    column) for each transition between consecutive grids.
+    """
+
+    grids: int
+    final: list[list[int]]
+    net_changed: int
+    transient_changed: int
+    bbox: Optional[tuple[int, int, int, int]]
+    steps: list[tuple[int, float, float]]
+
+    def __init__(self, frame: list[list[list[int]]]) -> None:
+        self.grids = len(frame)
+        self.final = frame[-1] if frame else []
+        self.net_changed = self.transient_changed = 0
+        self.bbox = None
+        self.steps = []
+        if self.grids < 2 or not self.final:
+            return
+        final = np.asarray(self.final)
+        # grids of another shape (rare, e.g. a resize mid-burst) cannot be diffed
+        stack = np.stack(
+            [np.asarray(g) for g in frame if np.shape(g) == final.shape]
+        ).astype(np.int16)
+        changes = stack[1:] != stack[:-1]
+        net = stack[0] != stack[-1]
+        touched = changes.any(axis=0)
+        self.net_changed = int(net.sum())
+        self.transient_changed = int((touched & ~net).sum())
+        if touched.any():
+            rows, cols = np.nonzero(touched)
+            self.bbox = (
+                int(rows.min()),
+                int(cols.min()),
+                int(rows.max()),
+                int(cols.max()),
+            )
+        for step in changes:
+            rows, cols = np.nonzero(step)
+            if len(rows):
+                self.steps.append(
+                    (
+                        len(rows),
+                        round(float(rows.mean()), 1),
+                        round(float(cols.mean()), 1),
+                    )
+                )
+            else:
+                self.steps.append((0, 0.0, 0.0))
+
+    @property
+    def is_burst(self) -> bool:
+        return self.grids > 1
+
+    def describe(self) -> str:
+        """One line of text for prompts; empty for single-grid frames."""
+        if not self.is_burst:
+            return ""
+        text = f"Animation of {self.grids} grids, only the final grid is shown."
+        if self.bbox is None:
+            return f"{text} Nothing moved during the animation."
+        top, left, bottom, right = self.bbox
+        text += (
+            f" {self.net_changed} cells differ from the first grid"
+            f" and {self.transient_changed} more changed only in between,"
+            f" all within rows {top}-{bottom}, columns {left}-{right}."
+        )
+        moves = [f"{n} around ({r:g}, {c:g})" for n, r, c in self.steps if n]
+        return f"{text} Changed cells per step (row, column): {'; '.join(moves)}."
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "grids": self.grids,
+            "net_changed": self.net_changed,
+            "transient_changed": self.transient_changed,
+            "bbox": self.bbox,
+        }
+
+
+def summarize_burst(frame: list[list[list[int]]]) -> Burst:
+    return Burst(frame)
@@ -0,0 +1,176 @@
+"""Vectorized comparison of consecutive frames.
+
+A frame is one or more grids; the last one is the state the next action
+applies to. `diff_frames` compares the final grid of the earlier frame
+with every grid of the later one in a single NumPy pass, so callers get
+the net changes, what changed only during an animation, bounding boxes,
+per-colour transitions and the split between status (HUD) rows and the
+board without looping over cells in Python.
+"""
+
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+Grid = Sequence[Sequence[int]]
+Box = tuple[int, int, int, int]
+
+
+def bounding_box(mask: np.ndarray, row_offset: int = 0) -> Optional[Box]:
+    """(top, left, bottom, right) of the True cells of `mask`, inclusive."""
+    rows, cols = np.nonzero(mask)
+    return _box(rows + row_offset, cols)
+
+
+def _box(rows: np.ndarray, cols: np.ndarray) -> Optional[Box]:
+    if not len(rows):
+        return None
+    return int(rows.min()), int(cols.min()), int(rows.max()), int(cols.max())
+
+
+def _rows(grid: Any) -> Grid:
+    """`grid` as rows that compare with `==` at C speed."""
+    return grid.tolist() if isinstance(grid, np.ndarray) else grid  # type: ignore[no-any-return]
+
+
+class FrameDiff:
+    """The changes from the final grid of one frame to the grids of the next.
+
+    `mask` marks the cells whose final value differs (the net change),
+    `touched` the cells that changed at any step of the later frame's
+    grids. Grids of different sizes are compared where they overlap, like
+    the templates always did. The first `hud_rows` rows are status bars:
+    their changes are counted apart from the board's.
+
+    Whole rows are compared first (list equality runs in C) and only the
+    rows that differ anywhere in the burst are turned into arrays, so a
+    move that touches a few rows costs little more than the comparison.
+    """
+
+    grids: int
+    mask: np.ndarray
+    touched: np.ndarray
+    rows: np.ndarray
+    steps: list[int]
+    hud_rows: int
+
+    def __init__(
+        self, before: Sequence[Grid], after: Sequence[Grid], hud_rows: int = 0
+    ):
+        self.hud_rows = hud_rows
+        self.grids = len(after)
+        grids: list[Grid] = [[], []]  # nothing to compare
+        height = width = 0
+        if before and after and len(before[-1]) and len(after[-1]):
+            start, final = _rows(before[-1]), _rows(after[-1])
+            height = min(len(start), len(final))
+            width = min(len(start[0]), len(final[0]))
+            # grids of another size than the final one (rare) cannot be stacked
+            grids = [start] + [
+                rows
+                for rows in map(_rows, after)
+                if len(rows) == len(final) and len(rows[0]) == len(final[0])
+            ]
+        if any(len(grid[y]) != width for grid in grids for y in range(height)):
+            grids = [[row[:width] for row in grid[:height]] for grid in grids]
+
+        changed_rows = {
+            y
+            for first, second in zip(grids, grids[1:])
+            for y in range(height)
+            if first[y] != second[y]
+        }
+        self.rows = np.array(sorted(changed_rows), dtype=np.intp)
+        stack = np.array(
+            [[grid[y] for y in self.rows.tolist()] for grid in grids], dtype=np.int16
+        ).reshape(len(grids), len(self.rows), width)
+        changes = stack[1:] != stack[:-1]
+        self._before, self._after = stack[0], stack[-1]
+        self.mask = np.zeros((height, width), dtype=bool)
+        self.mask[self.rows] = self._before != self._after
+        self.touched = np.zeros((height, width), dtype=bool)
+        self.touched[self.rows] = changes.any(axis=0)
+        self.steps = [int(n) for n in changes.sum(axis=(1, 2))]
+
+    @property
+    def changed(self) -> int:
+        return int(self.mask.sum())
+
+    @property
+    def transient_changed(self) -> int:
+        """Cells that changed during the animation but ended as they started."""
+        return int((self.touched & ~self.mask).sum())
+
+    @property
+    def hud_changed(self) -> int:
+        return int(self.mask[: self.hud_rows].sum())
+
+    @property
+    def board_changed(self) -> int:
+        return int(self.mask[self.hud_rows :].sum())
+
+    @property
+    def bbox(self) -> Optional[Box]:
+        rows, cols, _, _ = self.cells()
+        return _box(rows, cols)
+
+    @property
+    def board_bbox(self) -> Optional[Box]:
+        rows, cols, _, _ = self.cells()
+        board = rows >= self.hud_rows
+        return _box(rows[board], cols[board])
+
+    def cells(
+        self, mask: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(rows, columns, values before, values after) of the changed cells
+        (or those of `mask`), in row-major order."""
+        changed = self._before != self._after
+        if mask is not None:
+            changed &= mask[self.rows]
+        rows, cols = np.nonzero(changed)
+        return self.rows[rows], cols, self._before[rows, cols], self._after[rows, cols]
+
+    def transitions(self) -> dict[tuple[int, int], int]:
+        """How many cells went from each colour to each other colour."""
+        _, _, before, after = self.cells()
+        if not len(before):
+            return {}
+        base = int(max(before.max(), after.max())) + 1
+        codes, counts = np.unique(
+            before.astype(np.int64) * base + after, return_counts=True
+        )
+        return {
+            (int(code) // base, int(code) % base): int(count)
+            for code, count in zip(codes, counts)
+        }
+
+    def report(self, limit: int = 20) -> dict[str, Any]:
+        """A JSON-ready summary, with the first `limit` changed cells."""
+        rows, cols, before, after = self.cells()
+        return {
+            "grids": self.grids,
+            "changed": self.changed,
+            "transient_changed": self.transient_changed,
+            "hud_changed": self.hud_changed,
+            "board_changed": self.board_changed,
+            "bbox": self.bbox,
+            "board_bbox": self.board_bbox,
+            "transitions": {f"{a}->{b}": n for (a, b), n in self.transitions().items()},
+            "cells": [
+                {"pos": (x, y), "before": a, "after": b}
+                for y, x, a, b in zip(
+                    rows[:limit].tolist(),
+                    cols[:limit].tolist(),
+                    before[:limit].tolist(),
+                    after[:limit].tolist(),
+                )
+            ],
+        }
+
+
+def diff_frames(
+    before: Sequence[Grid], after: Sequence[Grid], hud_rows: int = 0
+) -> FrameDiff:
+    """Compare the final grid of `before` with every grid of `after`."""
+    return FrameDiff(before, after, hud_rows)
@@ -0,0 +1,50 @@
+from .backends import (
+    BACKENDS,
+    BackendClient,
+    BatchingBackend,
+    ChatBackend,
+    OpenAIBackend,
+    StubBackend,
+    current_backend,
+    get_backend,
+    set_backend,
+)
+from .batching import (
+    BatchStats,
+    HTTPBatchTransport,
+    RequestBatcher,
+    get_shared_batcher,
+    shutdown_shared_batcher,
+)
+from .decision_cache import CachedDecision, DecisionCache
+from .hedging import HedgedBackend
+from .local_policy import LocalPolicy
+from .router import ModelRouter, ModelTier, TurnSignals
+from .usage import CallUsage, MeteredBackend, UsageLedger
+
+__all__ = [
+    "BACKENDS",
+    "BackendClient",
+    "BatchStats",
+    "BatchingBackend",
+    "CachedDecision",
+    "CallUsage",
+    "ChatBackend",
+    "DecisionCache",
+    "HTTPBatchTransport",
+    "HedgedBackend",
+    "LocalPolicy",
+    "MeteredBackend",
+    "ModelRouter",
+    "ModelTier",
+    "OpenAIBackend",
+    "RequestBatcher",
+    "StubBackend",
+    "TurnSignals",
+    "UsageLedger",
+    "current_backend",
+    "get_backend",
+    "get_shared_batcher",
+    "set_backend",
+    "shutdown_shared_batcher",
+]
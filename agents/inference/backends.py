@@ -0,0 +1,395 @@
+"""Pluggable LLM backends.
+
+Every template talks to its model through a `ChatBackend`, an object with the
+same `create(**kwargs)` shape as `openai.OpenAI().chat.completions`. The
+backend in use is picked with the LLM_BACKEND environment variable:
+
+* `openai` (default) - any OpenAI-compatible HTTP endpoint, honouring
+  OPENAI_API_KEY and OPENAI_BASE_URL.
+* `stub` - an in-process, deterministic fake model with configurable latency
+  and scripted tool calls, so full agent loops run offline.
+"""
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Optional
+
+from openai import NOT_GIVEN
+from openai import OpenAI as OpenAIClient
+from openai.lib._parsing import parse_chat_completion, type_to_response_format_param
+from openai.types.chat import ChatCompletion, ParsedChatCompletion
+
+from .batching import RequestBatcher, get_shared_batcher
+
+
+class ChatBackend(ABC):
+    """Interface for anything that can answer an OpenAI-style chat completion request."""
+
+    _client: Optional["BackendClient"] = None
+
+    @abstractmethod
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        """Answer one request, taking the same kwargs as `chat.completions.create`."""
+        raise NotImplementedError
+
+    def parse(self, **kwargs: Any) -> ParsedChatCompletion[Any]:
+        """Like `beta.chat.completions.parse`: a pydantic `response_format` is
+        sent as a JSON schema and the answer comes back in `message.parsed`."""
+        response_format = kwargs.pop("response_format", NOT_GIVEN)
+        response = self.create(
+            **kwargs,
+            **(
+                {"response_format": type_to_response_format_param(response_format)}
+                if response_format is not NOT_GIVEN
+                else {}
+            ),
+        )
+        return parse_chat_completion(
+            response_format=response_format,
+            input_tools=kwargs.get("tools", NOT_GIVEN),
+            chat_completion=response,
+        )
+
+    def create_batch(self, requests: list[dict[str, Any]]) -> list[Any]:
+        """Answer several requests, returning a response or an Exception for each."""
+        responses: list[Any] = []
+        for request in requests:
+            try:
+                responses.append(self.create(**request))
+            except Exception as e:
+                responses.append(e)
+        return responses
+
+    def report(self) -> dict[str, Any]:
+        """Backend-specific metrics for the end-of-run log (empty if none)."""
+        return {}
+
+    @property
+    def client(self) -> "BackendClient":
+        """An `openai.OpenAI` look-alike for libraries that want a client object."""
+        if self._client is None:
+            self._client = BackendClient(self)
+        return self._client
+
+
+class BackendClient:
+    """Minimal stand-in for `openai.OpenAI` that routes chat completions to a backend.
+
+    Enough for LangChain's `ChatOpenAI(client=..., root_client=...)` and
+    smolagents' `OpenAIServerModel`, which only use `chat.completions.create`
+    and `beta.chat.completions.parse`.
+    """
+
+    class _Completions:
+        def __init__(self, backend: ChatBackend) -> None:
+            self._backend = backend
+
+        def create(self, **kwargs: Any) -> ChatCompletion:
+            return self._backend.create(**kwargs)
+
+        def parse(self, **kwargs: Any) -> ParsedChatCompletion[Any]:
+            return self._backend.parse(**kwargs)
+
+    class _Chat:
+        def __init__(self, backend: ChatBackend) -> None:
+            self.completions = BackendClient._Completions(backend)
+
+    class _Beta:
+        def __init__(self, chat: "BackendClient._Chat") -> None:
+            self.chat = chat
+
+    def __init__(self, backend: ChatBackend) -> None:
+        self.backend = backend
+        self.api_key = getattr(backend, "api_key", None) or "unused"
+        self.chat = BackendClient._Chat(backend)
+        self.beta = BackendClient._Beta(self.chat)
+
+
+class OpenAIBackend(ChatBackend):
+    """Any OpenAI-compatible HTTP endpoint (OpenAI, vLLM, Ollama, LM Studio, ...)."""
+
+    api_key: str
+    base_url: Optional[str]
+
+    def __init__(
+        self, api_key: Optional[str] = None, base_url: Optional[str] = None
+    ) -> None:
+        self.api_key = (
+            api_key if api_key is not None else os.environ.get("OPENAI_API_KEY", "")
+        )
+        self.base_url = base_url or os.environ.get("OPENAI_BASE_URL") or None
+        self._openai = OpenAIClient(api_key=self.api_key, base_url=self.base_url)
+
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        response: ChatCompletion = self._openai.chat.completions.create(**kwargs)
+        return response
+
+    def parse(self, **kwargs: Any) -> ParsedChatCompletion[Any]:
+        return self._openai.beta.chat.completions.parse(**kwargs)
+
+
+class BatchingBackend(ChatBackend):
+    """Sends every request through a shared `RequestBatcher`."""
+
+    def __init__(self, batcher: RequestBatcher) -> None:
+        self.batcher = batcher
+
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        response: ChatCompletion = self.batcher.create(**kwargs)
+        return response
+
+
+ScriptedCall = dict[str, Any]
+"""A tool call the stub should make: `{"name": "ACTION1", "arguments": {...}}`."""
+
+
+class StubBackend(ChatBackend):
+    """Deterministic in-process model for offline runs and benchmarks.
+
+    * Requests with `tools` or `functions` get exactly one call. Calls from
+      `script` are used in order first; after that a tool is picked with a
+      seeded RNG and its arguments are filled in from the JSON schema.
+    * Requests with a JSON-schema `response_format` get a conforming object.
+    * Anything else gets `content` back as plain text.
+
+    Each request sleeps `latency` seconds, plus up to `jitter` seconds drawn
+    from the same seeded RNG. A batch sleeps once, like a batching server.
+    """
+
+    model: str = "stub"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        script: Optional[Iterable[ScriptedCall]] = None,
+        content: str = "Nothing notable changed, I will keep exploring.",
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.content = content
+        self._script = iter(script) if script is not None else iter(())
+        self._rng = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> "StubBackend":
+        return cls(
+            latency=float(os.getenv("LLM_STUB_LATENCY_MS", "0")) / 1000,
+            jitter=float(os.getenv("LLM_STUB_JITTER_MS", "0")) / 1000,
+            seed=int(os.getenv("LLM_STUB_SEED", "0")),
+        )
+
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        with self._lock:
+            delay = self._delay()
+            response = self._respond(kwargs)
+        if delay > 0:
+            self._sleep(delay)
+        return response
+
+    def create_batch(self, requests: list[dict[str, Any]]) -> list[Any]:
+        with self._lock:
+            delay = self._delay()
+            responses = [self._respond(request) for request in requests]
+        if delay > 0:
+            self._sleep(delay)
+        return responses
+
+    def _delay(self) -> float:
+        return self.latency + (self._rng.random() * self.jitter if self.jitter else 0)
+
+    def _respond(self, request: dict[str, Any]) -> ChatCompletion:
+        self.calls += 1
+        n = next(self._ids)
+        message: dict[str, Any] = {"role": "assistant", "content": None}
+
+        if request.get("tools"):
+            specs = [t["function"] for t in request["tools"] if t.get("function")]
+            name, arguments = self._pick_call(specs, request.get("tool_choice"))
+            message["tool_calls"] = [
+                {
+                    "id": f"call_stub_{n}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)},
+                }
+            ]
+        elif request.get("functions"):
+            name, arguments = self._pick_call(
+                request["functions"], request.get("function_call")
+            )
+            message["function_call"] = {
+                "name": name,
+                "arguments": json.dumps(arguments),
+            }
+        elif (fmt := request.get("response_format")) and isinstance(fmt, dict):
+            schema = fmt.get("json_schema", {}).get("schema", {})
+            message["content"] = json.dumps(
+                self._example(schema, schema.get("$defs", {}))
+            )
+        else:
+            message["content"] = self.content
+
+        prompt_tokens = len(json.dumps(request.get("messages", []), default=str)) // 4
+        completion_tokens = max(1, len(json.dumps(message)) // 4)
+        return ChatCompletion.model_validate(
+            {
+                "id": f"chatcmpl-stub-{n}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": request.get("model", self.model),
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "tool_calls"
+                        if "tool_calls" in message
+                        else "stop",
+                        "message": message,
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        )
+
+    def _pick_call(
+        self, specs: list[dict[str, Any]], choice: Any
+    ) -> tuple[str, dict[str, Any]]:
+        by_name = {spec["name"]: spec for spec in specs}
+        scripted = next(self._script, None)
+        if scripted is not None:
+            spec = by_name.get(scripted["name"], {})
+            arguments = scripted.get("arguments")
+            if arguments is None:
+                arguments = self._example(spec.get("parameters", {}))
+            return scripted["name"], arguments
+
+        if isinstance(choice, dict):
+            # {"type": "function", "function": {"name": ...}} or {"name": ...}
+            forced = choice.get("function", choice).get("name")
+            if forced in by_name:
+                return forced, self._example(by_name[forced].get("parameters", {}))
+
+        spec = self._rng.choice(specs)
+        return spec["name"], self._example(spec.get("parameters", {}))
+
+    def _example(
+        self, schema: dict[str, Any], defs: Optional[dict[str, Any]] = None
+    ) -> Any:
+        """Build a value that satisfies a (simple) JSON schema.
+
+        `defs` holds the `$defs` that `$ref`s point to, as in the schemas
+        generated from pydantic models.
+        """
+        defs = defs or {}
+        if "$ref" in schema:
+            return self._example(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+        if "enum" in schema:
+            return self._rng.choice(schema["enum"])
+        if "const" in schema:
+            return schema["const"]
+        for key in ("anyOf", "oneOf"):
+            if key in schema:
+                return self._example(self._rng.choice(schema[key]), defs)
+        if "allOf" in schema:
+            return self._example(schema["allOf"][0], defs)
+
+        kind = schema.get("type", "object")
+        if isinstance(kind, list):
+            kind = next((k for k in kind if k != "null"), "null")
+        if kind == "object":
+            return {
+                key: self._example(value, defs)
+                for key, value in schema.get("properties", {}).items()
+            }
+        if kind == "array":
+            return [self._example(schema.get("items", {}), defs)]
+        if kind == "integer":
+            return self._rng.randint(
+                schema.get("minimum", 0), schema.get("maximum", 63)
+            )
+        if kind == "number":
+            return float(schema.get("minimum", 0))
+        if kind == "boolean":
+            return self._rng.random() < 0.5
+        if kind == "null":
+            return None
+        if "Int<" in schema.get("description", ""):
+            # coordinates are sent as strings, e.g. "Coordinate X which must be Int<0,63>"
+            return str(self._rng.randint(0, 63))
+        text = "stub"
+        text = text.ljust(schema.get("minLength", 0), ".")
+        return text[: schema.get("maxLength", len(text))]
+
+
+BACKENDS: dict[str, Callable[[], ChatBackend]] = {
+    "openai": OpenAIBackend,
+    "stub": StubBackend.from_env,
+}
+
+_backend: Optional[ChatBackend] = None
+_backend_batcher: Optional[RequestBatcher] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> ChatBackend:
+    """The process-wide backend, created from LLM_BACKEND on first use.
+
+    When LLM_BATCH_URL is set, requests are routed through the shared
+    `RequestBatcher` instead. When LLM_HEDGE_PERCENTILE is set, the backend
+    (batching or not) is wrapped in a `HedgedBackend`.
+    """
+    global _backend, _backend_batcher
+    batcher = get_shared_batcher()
+    with _backend_lock:
+        # a new shared batcher (after `shutdown_shared_batcher`) needs a new backend
+        if _backend is None or _backend_batcher is not batcher:
+            _backend = _create_backend(batcher)
+            _backend_batcher = batcher
+        return _backend
+
+
+def _create_backend(batcher: Optional[RequestBatcher]) -> ChatBackend:
+    from .hedging import HedgedBackend
+
+    backend: ChatBackend
+    if batcher is not None:
+        backend = BatchingBackend(batcher)
+    else:
+        name = os.getenv("LLM_BACKEND", "openai")
+        if name not in BACKENDS:
+            raise ValueError(
+                f"Unknown LLM_BACKEND '{name}', expected one of {list(BACKENDS)}"
+            )
+        backend = BACKENDS[name]()
+    if os.getenv("LLM_HEDGE_PERCENTILE"):
+        backend = HedgedBackend.from_env(backend)
+    return backend
+
+
+def current_backend() -> Optional[ChatBackend]:
+    """The process-wide backend if it was created, without creating it."""
+    with _backend_lock:
+        return _backend
+
+
+def set_backend(backend: Optional[ChatBackend]) -> None:
+    """Override the process-wide backend (None resets it to LLM_BACKEND)."""
+    global _backend, _backend_batcher
+    batcher = get_shared_batcher()
+    with _backend_lock:
+        _backend = backend
+        _backend_batcher = batcher
@@ -0,0 +1,302 @@
+"""Cross-agent batching of chat completion requests.
+
+In a swarm every LLM agent runs in its own thread and issues one blocking
+chat request per turn. A `RequestBatcher` briefly holds concurrent requests
+and hands them to a transport as a single batch, then routes each response
+back to the thread that submitted it.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import httpx
+import openai
+import requests
+from openai.types.chat import ChatCompletion
+
+logger = logging.getLogger()
+
+BatchTransport = Callable[[list[dict[str, Any]]], list[Any]]
+"""Takes a list of chat request kwargs and returns one response (or Exception) per request."""
+
+
+class BatchStats:
+    """Running counters for a `RequestBatcher`."""
+
+    max_batch_size: int
+    batches: int = 0
+    requests: int = 0
+    total_queue_delay: float = 0.0
+    max_queue_delay: float = 0.0
+
+    def __init__(self, max_batch_size: int) -> None:
+        self.max_batch_size = max_batch_size
+
+    @property
+    def fill_rate(self) -> float:
+        """Average batch size as a fraction of the maximum batch size."""
+        if self.batches == 0:
+            return 0.0
+        return self.requests / (self.batches * self.max_batch_size)
+
+    @property
+    def avg_queue_delay(self) -> float:
+        """Average seconds a request waited before its batch was sent."""
+        if self.requests == 0:
+            return 0.0
+        return self.total_queue_delay / self.requests
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2)
+            if self.batches
+            else 0.0,
+            "fill_rate": round(self.fill_rate, 3),
+            "avg_queue_delay_ms": round(self.avg_queue_delay * 1000, 2),
+            "max_queue_delay_ms": round(self.max_queue_delay * 1000, 2),
+        }
+
+
+class RequestBatcher:
+    """Collects chat requests from many threads and submits them together.
+
+    A request waits at most `max_wait` seconds for others to join its batch,
+    and a batch is sent as soon as it holds `max_batch_size` requests. Up to
+    `max_in_flight` batches are sent at once, so requests arriving during a
+    slow round trip go out in the next batch without waiting for it.
+    """
+
+    transport: BatchTransport
+    max_batch_size: int
+    max_wait: float
+    max_in_flight: int
+    stats: BatchStats
+
+    def __init__(
+        self,
+        transport: BatchTransport,
+        max_batch_size: int = 16,
+        max_wait: float = 0.05,
+        max_in_flight: int = 4,
+    ) -> None:
+        self.transport = transport
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.max_in_flight = max(1, max_in_flight)
+        self.stats = BatchStats(self.max_batch_size)
+        self._queue: queue.Queue[tuple[dict[str, Any], Future[Any], float]] = (
+            queue.Queue()
+        )
+        self._lock = threading.Lock()
+        self._closed = False
+        self._senders = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="llm-batch"
+        )
+        self._worker = threading.Thread(
+            target=self._run, name="llm-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, request: dict[str, Any]) -> Future[Any]:
+        """Queue a request and return a future for its response."""
+        future: Future[Any] = Future()
+        # under the lock, so no request is queued after the worker saw closed
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RequestBatcher is closed")
+            self._queue.put((request, future, time.monotonic()))
+        return future
+
+    def create(self, **kwargs: Any) -> Any:
+        """Blocking call with the same shape as `client.chat.completions.create`."""
+        return self.submit(kwargs).result()
+
+    def close(self) -> None:
+        """Stop the worker once the queued requests are sent."""
+        with self._lock:
+            self._closed = True
+        self._worker.join(timeout=max(1.0, self.max_wait * 10))
+        if not self._worker.is_alive():
+            # nothing will send these any more
+            while True:
+                try:
+                    _, future, _ = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                future.set_exception(RuntimeError("RequestBatcher is closed"))
+        self._senders.shutdown(wait=False)
+
+    def _collect(self) -> list[tuple[dict[str, Any], Future[Any], float]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not (self._closed and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._senders.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list[tuple[dict[str, Any], Future[Any], float]]) -> None:
+        sent_at = time.monotonic()
+        with self._lock:
+            self.stats.batches += 1
+            self.stats.requests += len(batch)
+            for _, _, queued_at in batch:
+                delay = sent_at - queued_at
+                self.stats.total_queue_delay += delay
+                self.stats.max_queue_delay = max(self.stats.max_queue_delay, delay)
+
+        try:
+            responses = self.transport([request for request, _, _ in batch])
+            if len(responses) != len(batch):
+                raise ValueError(
+                    f"Batch transport returned {len(responses)} responses for {len(batch)} requests"
+                )
+        except Exception as e:
+            logger.warning(f"LLM batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), response in zip(batch, responses):
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
+
+
+class HTTPBatchTransport:
+    """Sends a batch to an OpenAI-compatible server in a single POST.
+
+    The server receives `{"requests": [<chat.completions kwargs>, ...]}` and
+    must answer with `{"responses": [<chat.completion or {"error": ...}>, ...]}`
+    in the same order. An error item may carry the `status_code` the request
+    would have had on its own; it is raised as the matching openai error
+    (500 if there is none), so retry logic works as without batching.
+    """
+
+    url: str
+    timeout: float
+
+    def __init__(
+        self, url: str, api_key: Optional[str] = None, timeout: float = 600
+    ) -> None:
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+        api_key = api_key if api_key is not None else os.getenv("OPENAI_API_KEY", "")
+        if api_key:
+            self._session.headers.update({"Authorization": f"Bearer {api_key}"})
+
+    def __call__(self, batch: list[dict[str, Any]]) -> list[Any]:
+        r = self._session.post(
+            self.url,
+            data=json.dumps({"requests": batch}, default=_to_jsonable),
+            headers={"Content-Type": "application/json"},
+            timeout=self.timeout,
+        )
+        r.raise_for_status()
+        responses: list[Any] = []
+        for item in r.json()["responses"]:
+            if "error" in item:
+                responses.append(self._error(item))
+            else:
+                responses.append(ChatCompletion.model_validate(item))
+        return responses
+
+    def _error(self, item: dict[str, Any]) -> openai.APIStatusError:
+        status = int(item.get("status_code") or 500)
+        error = item["error"]
+        message = error.get("message", str(error)) if isinstance(error, dict) else error
+        response = httpx.Response(status, request=httpx.Request("POST", self.url))
+        if status >= 500:
+            error_class: type[openai.APIStatusError] = openai.InternalServerError
+        else:
+            error_class = _STATUS_ERRORS.get(status, openai.APIStatusError)
+        return error_class(
+            f"Batched request failed: {message}",
+            response=response,
+            body={"error": error},
+        )
+
+
+_STATUS_ERRORS: dict[int, type[openai.APIStatusError]] = {
+    400: openai.BadRequestError,
+    401: openai.AuthenticationError,
+    403: openai.PermissionDeniedError,
+    404: openai.NotFoundError,
+    409: openai.ConflictError,
+    422: openai.UnprocessableEntityError,
+    429: openai.RateLimitError,
+}
+
+
+def _to_jsonable(obj: Any) -> Any:
+    # assistant messages pushed back into history are pydantic models
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_shared_batcher: Optional[RequestBatcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_batcher() -> Optional[RequestBatcher]:
+    """Process-wide batcher configured from the environment.
+
+    Returns None unless LLM_BATCH_URL is set; LLM_BATCH_URL=stub sends the
+    batches to an in-process `StubBackend`, so batching runs offline.
+    LLM_BATCH_SIZE and LLM_BATCH_WAIT_MS tune the batch size and the
+    collection window,
+    LLM_BATCH_IN_FLIGHT how many batches are sent at once.
+    """
+    global _shared_batcher
+    with _shared_lock:
+        if _shared_batcher is None and (url := os.getenv("LLM_BATCH_URL")):
+            transport: BatchTransport
+            if url == "stub":
+                from .backends import StubBackend
+
+                transport = StubBackend.from_env().create_batch
+            else:
+                transport = HTTPBatchTransport(url)
+            _shared_batcher = RequestBatcher(
+                transport,
+                max_batch_size=int(os.getenv("LLM_BATCH_SIZE", "16")),
+                max_wait=float(os.getenv("LLM_BATCH_WAIT_MS", "50")) / 1000,
+                max_in_flight=int(os.getenv("LLM_BATCH_IN_FLIGHT", "4")),
+            )
+        return _shared_batcher
+
+
+def shutdown_shared_batcher() -> Optional[BatchStats]:
+    """Close the process-wide batcher, if any, and return its final stats."""
+    global _shared_batcher
+    with _shared_lock:
+        batcher, _shared_batcher = _shared_batcher, None
+    if batcher is None:
+        return None
+    batcher.close()
+    return batcher.stats
@@ -0,0 +1,179 @@
+"""Per-game cache of LLM decisions.
+
+Agents often end up in a state they have already decided on, e.g. bumping
+into the same wall again. `DecisionCache` remembers which action the model
+chose for a frame and the actions that led to it, and serves that decision
+again instead of calling the model.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+import numpy as np
+
+from ..structs import FrameData
+
+logger = logging.getLogger()
+
+CacheKey = tuple[str, tuple[str, ...]]
+"""(frame hash, action-context signature)"""
+
+
+class CachedDecision:
+    """An action chosen by the model, stored with the frame it was chosen for."""
+
+    action: str
+    data: dict[str, Any]
+    grid: np.ndarray
+    reuses: int = 0
+
+    def __init__(self, action: str, data: dict[str, Any], grid: np.ndarray) -> None:
+        self.action = action
+        self.data = data
+        self.grid = grid
+
+
+def _grids(frame: FrameData) -> Optional[np.ndarray]:
+    if frame.is_empty():
+        return None
+    try:
+        return np.asarray(frame.frame, dtype=np.int16)
+    except ValueError:  # grids of different sizes
+        return None
+
+
+class DecisionCache:
+    """Maps (frame hash, recent actions) to the action the model chose.
+
+    With `similarity` below 1.0, a frame whose cells match a cached frame at
+    least that fraction of the time (same action context and shape) also
+    counts as a hit. A decision is served at most `max_reuses` times before
+    the model is asked again, and is dropped if replaying it left the frame
+    unchanged, so a cached mistake cannot loop forever.
+    """
+
+    similarity: float
+    context_length: int
+    max_entries: int
+    max_reuses: int
+
+    def __init__(
+        self,
+        similarity: float = 1.0,
+        context_length: int = 2,
+        max_entries: int = 256,
+        max_reuses: int = 2,
+    ) -> None:
+        self.similarity = similarity
+        self.context_length = context_length
+        self.max_entries = max_entries
+        self.max_reuses = max_reuses
+        self._entries: OrderedDict[CacheKey, CachedDecision] = OrderedDict()
+        self._last_key: Optional[CacheKey] = None
+
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def context(self, frames: list[FrameData]) -> tuple[str, ...]:
+        """Signature of the actions that produced the last few frames."""
+        signature = []
+        for frame in frames[-self.context_length :]:
+            action = frame.action_input
+            args = ",".join(f"{k}={v}" for k, v in sorted(action.data.items()))
+            signature.append(f"{action.id.name}({args})" if args else action.id.name)
+        return tuple(signature)
+
+    def key(self, frames: list[FrameData]) -> Optional[CacheKey]:
+        grid = _grids(frames[-1])
+        if grid is None:
+            return None
+        digest = hashlib.blake2b(grid.tobytes(), digest_size=16)
+        digest.update(str(grid.shape).encode())
+        return digest.hexdigest(), self.context(frames)
+
+    def lookup(self, frames: list[FrameData]) -> Optional[CachedDecision]:
+        """The cached decision for the latest frame, or None on a miss."""
+        self._forget_noop(frames)
+        key = self.key(frames)
+        if key is None:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+        elif self.similarity < 1.0:
+            key, entry = self._nearest(key[1], _grids(frames[-1]))
+            if entry is not None:
+                self.hits += 1
+                self.near_hits += 1
+        if entry is None or key is None:
+            self.misses += 1
+            self._last_key = None
+            return None
+
+        entry.reuses += 1
+        if entry.reuses >= self.max_reuses:
+            del self._entries[key]
+        else:
+            self._entries.move_to_end(key)
+        self._last_key = key
+        logger.debug(f"Decision cache hit: {entry.action} {entry.data}")
+        return entry
+
+    def store(self, frames: list[FrameData], action: str, data: dict[str, Any]) -> None:
+        """Remember the model's decision for the latest frame."""
+        key = self.key(frames)
+        grid = _grids(frames[-1])
+        if key is None or grid is None:
+            return
+        self._entries[key] = CachedDecision(action, dict(data), grid)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._last_key = key
+
+    def _nearest(
+        self, context: tuple[str, ...], grid: Optional[np.ndarray]
+    ) -> tuple[Optional[CacheKey], Optional[CachedDecision]]:
+        if grid is None:
+            return None, None
+        best: tuple[Optional[CacheKey], Optional[CachedDecision]] = (None, None)
+        best_score = self.similarity
+        for key, entry in self._entries.items():
+            if key[1] != context or entry.grid.shape != grid.shape:
+                continue
+            score = float(np.mean(entry.grid == grid))
+            if score >= best_score:
+                best, best_score = (key, entry), score
+        return best
+
+    def _forget_noop(self, frames: list[FrameData]) -> None:
+        # the last served or stored decision did nothing: don't hand it out again
+        if self._last_key is None or len(frames) < 2:
+            return
+        previous, latest = _grids(frames[-2]), _grids(frames[-1])
+        if (
+            previous is not None
+            and latest is not None
+            and previous.shape == latest.shape
+            and np.array_equal(previous, latest)
+        ):
+            self._entries.pop(self._last_key, None)
+        self._last_key = None
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+            "entries": len(self._entries),
+        }
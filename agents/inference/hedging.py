@@ -0,0 +1,185 @@
+"""Hedged LLM requests.
+
+A hedged request is sent once; if it has not come back by a high percentile
+of recently observed latency, a duplicate is sent (optionally to another
+backend or model) and whichever answers first wins. This trims the long
+tail of slow calls that otherwise sets the wall-clock time of a game.
+
+The losing request is abandoned, not stopped: it runs to the end and is
+billed like any other. `max_hedge_rate` and `max_extra_tokens` are the only
+limits on what hedging costs.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Optional
+
+from openai.types.chat import ChatCompletion
+
+from .backends import ChatBackend
+
+logger = logging.getLogger()
+
+
+def _spawn(fn: Callable[[], ChatCompletion]) -> Future[ChatCompletion]:
+    """Run fn on a daemon thread so an abandoned request never blocks exit."""
+    future: Future[ChatCompletion] = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="llm-hedge", daemon=True).start()
+    return future
+
+
+class HedgedBackend(ChatBackend):
+    """Wraps a backend and hedges requests that run past a latency percentile.
+
+    Hedging only starts once `min_samples` latencies have been observed, and
+    stops for good once the tokens burnt by abandoned requests reach
+    `max_extra_tokens`. At most `max_hedge_rate` of requests are hedged.
+    """
+
+    backend: ChatBackend
+    alternate: Optional[ChatBackend]
+    alternate_model: Optional[str]
+    percentile: float
+    min_samples: int
+    max_extra_tokens: Optional[int]
+    max_hedge_rate: float
+
+    def __init__(
+        self,
+        backend: ChatBackend,
+        percentile: float = 95,
+        alternate: Optional[ChatBackend] = None,
+        alternate_model: Optional[str] = None,
+        min_samples: int = 10,
+        window: int = 200,
+        max_extra_tokens: Optional[int] = None,
+        max_hedge_rate: float = 0.2,
+    ) -> None:
+        self.backend = backend
+        self.alternate = alternate
+        self.alternate_model = alternate_model
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_tokens = max_extra_tokens
+        self.max_hedge_rate = max_hedge_rate
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.abandoned = 0
+        self.extra_tokens = 0
+
+    @classmethod
+    def from_env(cls, backend: ChatBackend) -> "HedgedBackend":
+        max_extra = os.getenv("LLM_HEDGE_MAX_EXTRA_TOKENS")
+        return cls(
+            backend,
+            percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+            alternate_model=os.getenv("LLM_HEDGE_MODEL") or None,
+            max_extra_tokens=int(max_extra) if max_extra else None,
+            max_hedge_rate=float(os.getenv("LLM_HEDGE_MAX_RATE", "0.2")),
+        )
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off right now."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            if (
+                self.max_extra_tokens is not None
+                and self.extra_tokens >= self.max_extra_tokens
+            ):
+                return None
+            if self.requests and self.hedged / self.requests >= self.max_hedge_rate:
+                return None
+            ordered = sorted(self._latencies)
+        idx = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return ordered[idx]
+
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        with self._lock:
+            self.requests += 1
+        delay = self.hedge_delay()
+        start = time.monotonic()
+        primary = _spawn(lambda: self.backend.create(**kwargs))
+
+        def observe(f: Future[ChatCompletion]) -> None:
+            # every primary latency is observed, even when a hedge beat it
+            if not f.cancelled() and f.exception() is None:
+                with self._lock:
+                    self._latencies.append(time.monotonic() - start)
+
+        primary.add_done_callback(observe)
+
+        if delay is None or wait([primary], timeout=delay).done:
+            return primary.result()
+
+        hedge_kwargs = dict(kwargs)
+        if self.alternate_model:
+            hedge_kwargs["model"] = self.alternate_model
+        hedge_backend = self.alternate or self.backend
+        duplicate = _spawn(lambda: hedge_backend.create(**hedge_kwargs))
+        with self._lock:
+            self.hedged += 1
+        logger.debug(f"Hedging LLM request after {delay:.2f}s")
+
+        pending = {primary, duplicate}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for winner in done:
+                if winner.exception() is not None:
+                    error = winner.exception()
+                    continue
+                for loser in pending:
+                    self._abandon(loser)
+                if winner is duplicate:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return winner.result()
+        assert error is not None
+        raise error
+
+    def _abandon(self, loser: Future[ChatCompletion]) -> None:
+        """Stop waiting for the losing request; it still runs to the end, and
+        its tokens are counted once it finishes."""
+        with self._lock:
+            self.abandoned += 1
+
+        def count(f: Future[ChatCompletion]) -> None:
+            if f.exception() is None and (usage := f.result().usage):
+                with self._lock:
+                    self.extra_tokens += usage.total_tokens
+
+        loser.add_done_callback(count)
+
+    def report(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": round(self.hedged / self.requests, 3)
+                if self.requests
+                else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "abandoned": self.abandoned,
+                "win_rate": round(self.hedge_wins / self.hedged, 3)
+                if self.hedged
+                else 0.0,
+                "extra_tokens": self.extra_tokens,
+            }
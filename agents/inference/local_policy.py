@@ -0,0 +1,256 @@
+"""A small NumPy-only policy distilled from recorded LLM decisions.
+
+Recordings hold every frame an agent saw together with the action that
+produced it, so consecutive frame events give (frame, chosen action) pairs.
+`LocalPolicy` embeds frames as per-block colour histograms and answers with
+a distance-weighted k-nearest-neighbour vote. A query is one matrix-vector
+product (about 2 ms for 2,000 recorded decisions on a CPU), so an LLM agent
+can answer states it has confidently seen before locally and only call the
+model for the rest.
+
+Train a policy from recordings with:
+
+    uv run -m agents.inference.local_policy recordings/ -o policy.npz --game ls20
+"""
+
+import argparse
+import json
+import logging
+import os
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from ..recorder import RECORDING_SUFFIX
+from ..structs import FrameData, GameAction, GameState
+
+logger = logging.getLogger()
+
+GRID_SIZE = 64
+NUM_COLORS = 16
+ACTIONS = list(GameAction)
+
+
+def frame_features(frame: list[list[list[int]]], block: int = 4) -> np.ndarray:
+    """Colour histogram of each `block` x `block` cell of the frame's last grid."""
+    grid = np.asarray(frame[-1], dtype=np.int64)[:GRID_SIZE, :GRID_SIZE]
+    padded = np.zeros((GRID_SIZE, GRID_SIZE), dtype=np.int64)
+    padded[: grid.shape[0], : grid.shape[1]] = grid
+    n = GRID_SIZE // block
+    onehot = np.eye(NUM_COLORS, dtype=np.float32)[padded & (NUM_COLORS - 1)]
+    features: np.ndarray = onehot.reshape(n, block, n, block, NUM_COLORS).mean(
+        axis=(1, 3)
+    )
+    return features.ravel()
+
+
+def decision_pairs(
+    events: Iterable[dict[str, Any]], game: Optional[str] = None
+) -> list[tuple[FrameData, GameAction, dict[str, Any]]]:
+    """(frame, action taken from it, action data) for each step of a recording."""
+    pairs: list[tuple[FrameData, GameAction, dict[str, Any]]] = []
+    previous: Optional[FrameData] = None
+    for event in events:
+        data = event.get("data", {})
+        if (
+            not isinstance(data, dict)
+            or "frame" not in data
+            or "action_input" not in data
+        ):
+            continue
+        try:
+            frame = FrameData.model_validate(data)
+        except ValueError:
+            continue
+        if game and not frame.game_id.startswith(game):
+            previous = None
+            continue
+        if (
+            previous is not None
+            and previous.state is GameState.NOT_FINISHED
+            and not previous.is_empty()
+        ):
+            action_input = frame.action_input
+            action_data = {
+                k: v for k, v in action_input.data.items() if k in ("x", "y")
+            }
+            pairs.append((previous, action_input.id, action_data))
+        previous = frame
+    return pairs
+
+
+def recording_files(paths: Iterable[str]) -> list[str]:
+    files: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, f)
+                for f in sorted(os.listdir(path))
+                if f.endswith(RECORDING_SUFFIX)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def read_events(filename: str) -> list[dict[str, Any]]:
+    events: list[dict[str, Any]] = []
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                events.append(json.loads(line))
+    return events
+
+
+class LocalPolicy:
+    """Distance-weighted k-nearest-neighbour policy over frame embeddings.
+
+    Neighbours farther than `max_distance` (Euclidean between block
+    histograms; one block changing colour completely is about 1.41) do not
+    vote. Confidence is the share of the k possible votes won by the
+    predicted action.
+    """
+
+    features: np.ndarray
+    actions: np.ndarray
+    action_data: list[dict[str, Any]]
+    k: int
+    max_distance: float
+    block: int
+
+    def __init__(
+        self,
+        features: np.ndarray,
+        actions: np.ndarray,
+        action_data: list[dict[str, Any]],
+        k: int = 5,
+        max_distance: float = 1.0,
+        block: int = 4,
+    ) -> None:
+        self.features = features.astype(np.float32)
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, so each query is a single matvec
+        self._norms = np.einsum("ij,ij->i", self.features, self.features)
+        self.actions = actions.astype(np.int64)
+        self.action_data = action_data
+        self.k = k
+        self.max_distance = max_distance
+        self.block = block
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    @classmethod
+    def fit(
+        cls,
+        pairs: list[tuple[FrameData, GameAction, dict[str, Any]]],
+        **kwargs: Any,
+    ) -> "LocalPolicy":
+        block = kwargs.get("block", 4)
+        features = np.stack([frame_features(f.frame, block) for f, _, _ in pairs])
+        actions = np.array([ACTIONS.index(a) for _, a, _ in pairs])
+        return cls(features, actions, [d for _, _, d in pairs], **kwargs)
+
+    def predict_features(
+        self, x: np.ndarray, exclude: Optional[int] = None
+    ) -> tuple[int, dict[str, Any], float]:
+        """(index into ACTIONS, action data, confidence) for one embedded frame."""
+        x = x.astype(np.float32)
+        squared = self._norms + x @ x - 2 * (self.features @ x)
+        distances = np.sqrt(np.maximum(squared, 0))
+        if exclude is not None:
+            distances[exclude] = np.inf
+        k = min(self.k, len(distances) - (exclude is not None))
+        if k <= 0:
+            return ACTIONS.index(GameAction.RESET), {}, 0.0
+        nearest = np.argpartition(distances, k - 1)[:k]
+        weights = np.clip(1 - distances[nearest] / self.max_distance, 0, None)
+        votes = np.bincount(
+            self.actions[nearest], weights=weights, minlength=len(ACTIONS)
+        )
+        if not votes.any():
+            return int(self.actions[nearest[0]]), {}, 0.0
+        action = int(np.argmax(votes))
+        confidence = float(votes[action] / k)
+        # use the data (click coordinates) of the closest neighbour that chose it
+        voters = nearest[self.actions[nearest] == action]
+        closest = int(voters[np.argmin(distances[voters])])
+        return action, dict(self.action_data[closest]), confidence
+
+    def predict(self, frame: FrameData) -> tuple[GameAction, dict[str, Any], float]:
+        action, data, confidence = self.predict_features(
+            frame_features(frame.frame, self.block)
+        )
+        return ACTIONS[action], data, confidence
+
+    def evaluate(self, threshold: float) -> dict[str, Any]:
+        """Leave-one-out accuracy of the answers given at `threshold`."""
+        answered = correct = 0
+        for i in range(len(self)):
+            action, _, confidence = self.predict_features(self.features[i], exclude=i)
+            if confidence >= threshold:
+                answered += 1
+                correct += int(action == self.actions[i])
+        return {
+            "samples": len(self),
+            "coverage": round(answered / len(self), 3) if len(self) else 0.0,
+            "accuracy": round(correct / answered, 3) if answered else 0.0,
+        }
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            features=self.features,
+            actions=self.actions,
+            action_data=np.array([json.dumps(d) for d in self.action_data]),
+            params=np.array([self.k, self.max_distance, self.block], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalPolicy":
+        with np.load(path) as f:
+            k, max_distance, block = f["params"]
+            return cls(
+                f["features"],
+                f["actions"],
+                [json.loads(d) for d in f["action_data"]],
+                k=int(k),
+                max_distance=float(max_distance),
+                block=int(block),
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Distill a local policy from agent recordings"
+    )
+    parser.add_argument("paths", nargs="+", help="recording files or directories")
+    parser.add_argument("-o", "--output", default="policy.npz")
+    parser.add_argument("--game", help="only use frames whose game_id starts with this")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--max-distance", type=float, default=1.0)
+    parser.add_argument("--block", type=int, default=4, choices=[1, 2, 4, 8, 16])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    pairs = []
+    for filename in recording_files(args.paths):
+        pairs.extend(decision_pairs(read_events(filename), game=args.game))
+    if not pairs:
+        parser.error("no (frame, action) pairs found in the given recordings")
+
+    policy = LocalPolicy.fit(
+        pairs, k=args.k, max_distance=args.max_distance, block=args.block
+    )
+    policy.save(args.output)
+    counts = {
+        ACTIONS[int(a)].name: int(n)
+        for a, n in zip(*np.unique(policy.actions, return_counts=True))
+    }
+    print(f"Saved policy with {len(policy)} decisions to {args.output}: {counts}")
+    print(
+        f"Leave-one-out at threshold {args.threshold}: {policy.evaluate(args.threshold)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
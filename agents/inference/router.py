@@ -0,0 +1,182 @@
+"""Per-turn model routing.
+
+Most turns of a game are routine (walking down a corridor, resetting after
+GAME_OVER) and do not need the strongest, slowest model. `ModelRouter`
+looks at cheap local signals from the frame history and picks a fast tier
+for routine turns, escalating to the strong tier only when something new
+or unexpected happens.
+"""
+
+import logging
+from typing import Any, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..structs import FrameData, GameState
+
+logger = logging.getLogger()
+
+
+class ModelTier(BaseModel):
+    """A model and the reasoning effort to run it with."""
+
+    model: str
+    reasoning_effort: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return (
+            f"{self.model}:{self.reasoning_effort}"
+            if self.reasoning_effort
+            else self.model
+        )
+
+
+class TurnSignals(BaseModel):
+    """Cheap features of the latest transition used to route a turn."""
+
+    cells_changed: int = 0
+    last_noop: bool = False
+    noop_streak: int = 0
+    novel: bool = True
+    score_changed: bool = False
+    budget_left: float = 1.0
+    state: GameState = GameState.NOT_PLAYED
+
+
+class TierUsage(BaseModel):
+    calls: int = 0
+    tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def avg_tokens(self) -> float:
+        return self.tokens / self.calls if self.calls else 0.0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+def _grid(frame: FrameData) -> Optional[np.ndarray]:
+    if frame.is_empty():
+        return None
+    return np.asarray(frame.frame[-1], dtype=np.int16)
+
+
+class ModelRouter:
+    """Picks a `ModelTier` per turn from frame-change, no-op, novelty and budget signals.
+
+    Escalates to `strong` when the layout is new, the score changed, the
+    frame changed a lot, the agent keeps bumping into walls, or few actions
+    are left. Everything else goes to `fast`.
+    """
+
+    strong: ModelTier
+    fast: ModelTier
+    large_change: int
+    escalate_after_noops: int
+    low_budget: float
+
+    def __init__(
+        self,
+        strong: ModelTier,
+        fast: ModelTier,
+        large_change: int = 256,
+        escalate_after_noops: int = 2,
+        low_budget: float = 0.1,
+    ) -> None:
+        self.strong = strong
+        self.fast = fast
+        self.large_change = large_change
+        self.escalate_after_noops = escalate_after_noops
+        self.low_budget = low_budget
+        self.usage: dict[str, TierUsage] = {}
+        self.decisions: dict[str, int] = {}
+        self._seen_layouts: set[bytes] = set()
+        self._noop_streak = 0
+        self.last_tier: ModelTier = strong
+
+    def layout_signature(self, grid: np.ndarray) -> bytes:
+        """Coarse colour histogram, stable while only the player moves around."""
+        counts = np.bincount(grid.ravel() & 15, minlength=16)
+        return (counts // 32).astype(np.int16).tobytes()
+
+    def signals(
+        self, frames: list[FrameData], actions_taken: int, max_actions: int
+    ) -> TurnSignals:
+        latest = frames[-1]
+        signals = TurnSignals(
+            state=latest.state,
+            budget_left=max(0.0, 1 - actions_taken / max_actions)
+            if max_actions
+            else 1.0,
+        )
+        current = _grid(latest)
+        if current is None:
+            return signals
+
+        signature = self.layout_signature(current)
+        signals.novel = signature not in self._seen_layouts
+        self._seen_layouts.add(signature)
+
+        previous = _grid(frames[-2]) if len(frames) > 1 else None
+        if previous is not None and previous.shape == current.shape:
+            signals.cells_changed = int(np.count_nonzero(previous != current))
+            signals.score_changed = frames[-2].score != latest.score
+            signals.last_noop = signals.cells_changed == 0 and not signals.score_changed
+        self._noop_streak = self._noop_streak + 1 if signals.last_noop else 0
+        signals.noop_streak = self._noop_streak
+        return signals
+
+    def route(self, signals: TurnSignals) -> ModelTier:
+        if signals.state in (GameState.NOT_PLAYED, GameState.GAME_OVER):
+            tier, reason = self.fast, "reset"
+        elif signals.score_changed:
+            tier, reason = self.strong, "score"
+        elif signals.novel:
+            tier, reason = self.strong, "novel"
+        elif signals.cells_changed >= self.large_change:
+            tier, reason = self.strong, "large_change"
+        elif signals.noop_streak >= self.escalate_after_noops:
+            tier, reason = self.strong, "stuck"
+        elif signals.budget_left <= self.low_budget:
+            tier, reason = self.strong, "low_budget"
+        else:
+            tier, reason = self.fast, "routine"
+        self.decisions[reason] = self.decisions.get(reason, 0) + 1
+        self.last_tier = tier
+        logger.debug(f"Routing turn to {tier.label} ({reason})")
+        return tier
+
+    def record(self, tier: ModelTier, tokens: int, seconds: float) -> None:
+        usage = self.usage.setdefault(tier.label, TierUsage())
+        usage.calls += 1
+        usage.tokens += tokens
+        usage.seconds += seconds
+
+    def report(self) -> dict[str, Any]:
+        """Calls per tier and the tokens/latency saved versus always using `strong`."""
+        strong = self.usage.get(self.strong.label, TierUsage())
+        fast = self.usage.get(self.fast.label, TierUsage())
+        report: dict[str, Any] = {
+            "strong": self.strong.label,
+            "fast": self.fast.label,
+            "decisions": dict(self.decisions),
+            "tiers": {
+                label: {
+                    "calls": u.calls,
+                    "avg_tokens": round(u.avg_tokens, 1),
+                    "avg_seconds": round(u.avg_seconds, 3),
+                }
+                for label, u in self.usage.items()
+            },
+        }
+        if strong.calls and fast.calls:
+            # estimate what the fast-tier calls would have cost on the strong tier
+            report["tokens_saved"] = round(fast.calls * strong.avg_tokens - fast.tokens)
+            report["seconds_saved"] = round(
+                fast.calls * strong.avg_seconds - fast.seconds, 2
+            )
+        return report
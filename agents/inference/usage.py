@@ -0,0 +1,267 @@
+"""Token, cost and latency accounting for LLM calls.
+
+Every agent owns a `UsageLedger`. Its requests go through a
+`MeteredBackend`, which records the prompt, completion, cached and
+reasoning tokens and the wall latency of each call. The ledger can stop a
+game once it goes over LLM_MAX_TOKENS_PER_GAME or LLM_MAX_COST_PER_GAME,
+and the ledgers of a swarm are combined for the final report.
+
+Costs use `MODEL_PRICES` (USD per million input, cached input and output
+tokens), extended or overridden by the LLM_PRICES environment variable,
+e.g. `LLM_PRICES='{"my-model": [0.5, 0.25, 1.5]}'`. Reasoning tokens are
+billed as output. Calls to models without a price count as zero cost and
+are listed under `unpriced_models`.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional
+
+from openai.types.chat import ChatCompletion
+from pydantic import BaseModel
+
+from .backends import ChatBackend
+
+logger = logging.getLogger()
+
+MODEL_PRICES: dict[str, tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "o4-mini": (1.10, 0.275, 4.40),
+    "o3-mini": (1.10, 0.55, 4.40),
+    "o3": (2.00, 0.50, 8.00),
+}
+
+COUNTERS = (
+    "calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "cached_tokens",
+    "reasoning_tokens",
+    "total_tokens",
+)
+
+
+def get_prices() -> dict[str, tuple[float, float, float]]:
+    prices = dict(MODEL_PRICES)
+    if raw := os.getenv("LLM_PRICES"):
+        try:
+            for model, (prompt, cached, completion) in json.loads(raw).items():
+                prices[model] = (float(prompt), float(cached), float(completion))
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid LLM_PRICES: {e}")
+    return prices
+
+
+def price_for(
+    model: str, prices: dict[str, tuple[float, float, float]]
+) -> Optional[tuple[float, float, float]]:
+    """The price of `model`, matching dated snapshots like gpt-4o-2024-08-06."""
+    if model in prices:
+        return prices[model]
+    matches = [name for name in prices if model.startswith(f"{name}-")]
+    return prices[max(matches, key=len)] if matches else None
+
+
+class CallUsage(BaseModel):
+    """What one chat completion cost."""
+
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    reasoning_tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_response(cls, response: Any, model: str, seconds: float) -> "CallUsage":
+        usage = getattr(response, "usage", None)
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        completion_details = getattr(usage, "completion_tokens_details", None)
+        return cls(
+            model=model or getattr(response, "model", "") or "unknown",
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=getattr(prompt_details, "cached_tokens", 0) or 0,
+            reasoning_tokens=getattr(completion_details, "reasoning_tokens", 0) or 0,
+            seconds=round(seconds, 3),
+        )
+
+    def cost(self, prices: dict[str, tuple[float, float, float]]) -> Optional[float]:
+        """USD cost of the call, or None if the model has no price."""
+        price = price_for(self.model, prices)
+        if price is None:
+            return None
+        prompt, cached, completion = price
+        uncached = self.prompt_tokens - self.cached_tokens
+        return (
+            uncached * prompt
+            + self.cached_tokens * cached
+            + self.completion_tokens * completion
+        ) / 1_000_000
+
+
+class UsageLedger:
+    """Running totals of the LLM calls made for one game (or a whole swarm).
+
+    `listener` is called with every recorded call, e.g. to write it to the
+    game's recording.
+    """
+
+    max_tokens: Optional[int]
+    max_cost: Optional[float]
+    by_model: dict[str, dict[str, float]]
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        max_cost: Optional[float] = None,
+        listener: Optional[Callable[[CallUsage], None]] = None,
+        prices: Optional[dict[str, tuple[float, float, float]]] = None,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.max_cost = max_cost
+        self.listener = listener
+        self.prices = prices if prices is not None else get_prices()
+        self.by_model = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(
+        cls, listener: Optional[Callable[[CallUsage], None]] = None
+    ) -> "UsageLedger":
+        max_tokens = os.getenv("LLM_MAX_TOKENS_PER_GAME")
+        max_cost = os.getenv("LLM_MAX_COST_PER_GAME")
+        return cls(
+            max_tokens=int(max_tokens) if max_tokens else None,
+            max_cost=float(max_cost) if max_cost else None,
+            listener=listener,
+        )
+
+    @classmethod
+    def combine(cls, ledgers: Iterable["UsageLedger"]) -> "UsageLedger":
+        """One ledger holding the totals of all of `ledgers`."""
+        combined = cls(prices={})
+        for ledger in ledgers:
+            combined.prices.update(ledger.prices)
+            with ledger._lock:
+                for model, totals in ledger.by_model.items():
+                    into = combined.by_model.setdefault(model, {})
+                    for key, value in totals.items():
+                        into[key] = into.get(key, 0) + value
+        return combined
+
+    def record(self, call: CallUsage) -> None:
+        cost = call.cost(self.prices)
+        with self._lock:
+            totals = self.by_model.setdefault(
+                call.model, {**dict.fromkeys(COUNTERS, 0), "seconds": 0.0}
+            )
+            totals["calls"] += 1
+            totals["prompt_tokens"] += call.prompt_tokens
+            totals["completion_tokens"] += call.completion_tokens
+            totals["cached_tokens"] += call.cached_tokens
+            totals["reasoning_tokens"] += call.reasoning_tokens
+            totals["total_tokens"] += call.total_tokens
+            totals["seconds"] += call.seconds
+            if cost is not None:
+                totals["cost_usd"] = totals.get("cost_usd", 0.0) + cost
+        if self.listener is not None:
+            self.listener(call)
+
+    def _sum(self, key: str) -> float:
+        with self._lock:
+            return sum(totals.get(key, 0) for totals in self.by_model.values())
+
+    @property
+    def calls(self) -> int:
+        return int(self._sum("calls"))
+
+    @property
+    def total_tokens(self) -> int:
+        return int(self._sum("total_tokens"))
+
+    @property
+    def cost(self) -> float:
+        return self._sum("cost_usd")
+
+    def over_budget(self) -> Optional[str]:
+        """Why the game should stop, or None while it is within budget."""
+        if self.max_tokens is not None and self.total_tokens >= self.max_tokens:
+            return f"used {self.total_tokens} of {self.max_tokens} LLM tokens"
+        if self.max_cost is not None and self.cost >= self.max_cost:
+            return f"spent ${self.cost:.4f} of ${self.max_cost:.4f} on LLM calls"
+        return None
+
+    def report(self, actions: int = 0, score: int = 0) -> dict[str, Any]:
+        """Totals, per-model breakdown and efficiency for `actions` and `score`."""
+        with self._lock:
+            by_model = {
+                model: {
+                    k: round(v, 6) if isinstance(v, float) else v
+                    for k, v in totals.items()
+                }
+                for model, totals in self.by_model.items()
+            }
+        report: dict[str, Any] = {
+            key: sum(int(t.get(key, 0)) for t in by_model.values()) for key in COUNTERS
+        }
+        calls, tokens = report["calls"], report["total_tokens"]
+        seconds = sum(t.get("seconds", 0) for t in by_model.values())
+        cost = sum(t.get("cost_usd", 0) for t in by_model.values())
+        report.update(
+            {
+                "seconds": round(seconds, 3),
+                "seconds_per_call": round(seconds / calls, 3) if calls else 0.0,
+                "cost_usd": round(cost, 6),
+                "actions": actions,
+                "score": score,
+                "tokens_per_action": round(tokens / actions, 1) if actions else None,
+                "tokens_per_score_point": round(tokens / score, 1) if score else None,
+                "cost_per_action_usd": round(cost / actions, 6) if actions else None,
+                "by_model": by_model,
+            }
+        )
+        if unpriced := sorted(m for m, t in by_model.items() if "cost_usd" not in t):
+            report["unpriced_models"] = unpriced
+        if self.max_tokens is not None or self.max_cost is not None:
+            report["budget"] = {
+                "max_tokens": self.max_tokens,
+                "max_cost_usd": self.max_cost,
+                "exceeded": self.over_budget(),
+            }
+        return report
+
+
+class MeteredBackend(ChatBackend):
+    """Records the usage and latency of every request in a `UsageLedger`."""
+
+    backend: ChatBackend
+    ledger: UsageLedger
+
+    def __init__(self, backend: ChatBackend, ledger: UsageLedger) -> None:
+        self.backend = backend
+        self.ledger = ledger
+
+    def create(self, **kwargs: Any) -> ChatCompletion:
+        start = time.monotonic()
+        response = self.backend.create(**kwargs)
+        self.ledger.record(
+            CallUsage.from_response(
+                response, kwargs.get("model", ""), time.monotonic() - start
+            )
+        )
+        return response
+
+    def report(self) -> dict[str, Any]:
+        return self.backend.report()
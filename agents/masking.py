@@ -0,0 +1,104 @@
+"""Rule-based action masking.
+
+Some actions are provably useless given the frames seen so far: while a game
+is not running only RESET does anything, and a simple action that left every
+pixel unchanged from a state will do so again from that same state. Agents
+use `ActionMask` to drop those actions from what they offer a model or
+sample from, and to take forced moves without asking a model at all.
+"""
+
+import hashlib
+from typing import TYPE_CHECKING, Any, Optional
+
+import numpy as np
+
+from .structs import FrameData, GameAction, GameState
+
+if TYPE_CHECKING:
+    from .action_space import ActionSpaceProfile
+
+INACTIVE_STATES = (GameState.NOT_PLAYED, GameState.GAME_OVER)
+
+
+def state_key(frame: FrameData) -> Optional[str]:
+    """Hash of every grid in the frame, or None for an empty frame."""
+    if frame.is_empty():
+        return None
+    try:
+        grids = np.asarray(frame.frame, dtype=np.int16)
+    except ValueError:  # grids of different sizes
+        return hashlib.blake2b(repr(frame.frame).encode(), digest_size=16).hexdigest()
+    digest = hashlib.blake2b(grids.tobytes(), digest_size=16)
+    digest.update(str(grids.shape).encode())
+    return digest.hexdigest()
+
+
+class ActionMask:
+    """Tracks which actions are no-ops from which states.
+
+    With a `profile`, actions the game never responds to are masked everywhere.
+    """
+
+    noops: dict[str, set[GameAction]]
+    profile: Optional["ActionSpaceProfile"]
+    forced_count: int = 0
+
+    def __init__(self, profile: Optional["ActionSpaceProfile"] = None) -> None:
+        self.noops = {}
+        self.profile = profile
+
+    def observe(self, previous: FrameData, latest: FrameData) -> None:
+        """Learn from the transition `previous` -> `latest` caused by `latest.action_input`."""
+        if self.profile is not None:
+            self.profile.observe(previous, latest)
+        action = latest.action_input.id
+        if action is GameAction.RESET or not action.is_simple():
+            # clicks depend on their coordinates, so one no-op proves nothing
+            return
+        if previous.state in INACTIVE_STATES or latest.state != previous.state:
+            return
+        if previous.score != latest.score:
+            return
+        key = state_key(previous)
+        if key is not None and key == state_key(latest):
+            self.noops.setdefault(key, set()).add(action)
+
+    def masked(self, latest: FrameData) -> set[GameAction]:
+        """Actions that cannot do anything from the latest frame."""
+        if latest.state in INACTIVE_STATES:
+            return {a for a in GameAction if a is not GameAction.RESET}
+        return self.noop_actions(latest)
+
+    def noop_actions(self, latest: FrameData) -> set[GameAction]:
+        """Actions known to do nothing in this game or from this exact frame.
+
+        Unlike `masked`, this ignores the game state, so it suits tool
+        schemas that are built once, before the game starts.
+        """
+        noops = self.profile.ineffective() if self.profile is not None else set()
+        key = state_key(latest)
+        if key is not None:
+            noops |= self.noops.get(key, set())
+        return noops
+
+    def allowed(self, latest: FrameData) -> list[GameAction]:
+        """Actions that are not masked, in `GameAction` order."""
+        masked = self.masked(latest)
+        return [a for a in GameAction if a not in masked]
+
+    def forced(self, latest: FrameData) -> Optional[GameAction]:
+        """The only sensible action, if there is one."""
+        if latest.state in INACTIVE_STATES:
+            self.forced_count += 1
+            return GameAction.RESET
+        return None
+
+    def report(self) -> dict[str, Any]:
+        report: dict[str, Any] = {
+            "noop_states": len(self.noops),
+            "noop_actions": sum(len(actions) for actions in self.noops.values()),
+            "forced": self.forced_count,
+        }
+        if self.profile is not None:
+            report["action_space"] = self.profile.report()
+        return report
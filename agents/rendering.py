@@ -0,0 +1,328 @@
+"""Rendering grids to images, shared by the agent templates.
+
+Cells are colored with a palette lookup table and scaled with NumPy, and
+the pixels become a PIL image through `Image.fromarray`, so no template
+loops over pixels. `GridImage` encodes the PNG only when something reads
+it, e.g. a prompt that actually attaches the image.
+"""
+
+import base64
+import io
+import logging
+from functools import cached_property, lru_cache
+from typing import Any, Mapping, Optional, Sequence, Union
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+logger = logging.getLogger()
+
+Color = Union[str, tuple[int, int, int]]
+
+# the 16 colors of the ARC-AGI-3 games
+ARC_COLORS: list[Color] = [
+    (0, 0, 0),
+    (0, 0, 170),
+    (0, 170, 0),
+    (0, 170, 170),
+    (170, 0, 0),
+    (170, 0, 170),
+    (170, 85, 0),
+    (170, 170, 170),
+    (85, 85, 85),
+    (85, 85, 255),
+    (85, 255, 85),
+    (85, 255, 255),
+    (255, 85, 85),
+    (255, 85, 255),
+    (255, 255, 85),
+    (255, 255, 255),
+]
+
+
+def to_rgb(color: Color) -> tuple[int, int, int]:
+    if isinstance(color, str):
+        r, g, b = ImageColor.getrgb(color)[:3]
+        return r, g, b
+    return color
+
+
+class Palette:
+    """Maps cell values to RGB colors.
+
+    `colors` is a list (value i gets colors[i]) or a dict of value to color.
+    Values without a color get `default`; without a default, values wrap
+    around a list palette (value 17 gets colors[1]).
+    """
+
+    def __init__(
+        self,
+        colors: Union[Sequence[Color], Mapping[int, Color]],
+        default: Optional[Color] = None,
+    ) -> None:
+        if not isinstance(colors, Mapping):
+            colors = dict(enumerate(colors))
+        if default is None and sorted(colors) != list(range(len(colors))):
+            raise ValueError("a palette without a default needs colors 0..n-1")
+        self.size = max(colors) + 1
+        self.wraps = default is None
+        fill = to_rgb(default) if default is not None else (0, 0, 0)
+        # the extra last entry holds the default color
+        self.lut = np.array([fill] * (self.size + 1), dtype=np.uint8)
+        for value, color in colors.items():
+            self.lut[value] = to_rgb(color)
+
+    def indices(self, grid: Any) -> np.ndarray:
+        """The row of `lut` holding the color of each cell of `grid`."""
+        values = np.asarray(grid, dtype=np.int64)
+        if self.wraps:
+            values = values % self.size
+        else:
+            inside = (values >= 0) & (values < self.size)
+            values = np.where(inside, values, self.size)
+        return values.astype(np.uint8 if self.size < 256 else np.int64)
+
+    def __call__(self, grid: Any) -> np.ndarray:
+        """An (height, width, 3) array of the colors of `grid`."""
+        colors: np.ndarray = self.lut[self.indices(grid)]
+        return colors
+
+
+ARC_PALETTE = Palette(ARC_COLORS)
+
+
+def render_grid(
+    grid: Any,
+    palette: Palette = ARC_PALETTE,
+    scale: int = 1,
+    gridlines: Optional[Color] = None,
+) -> np.ndarray:
+    """The pixels of `grid`, each cell a `scale` by `scale` square.
+
+    With `gridlines`, the first row and column of pixels of every cell are
+    drawn in that color.
+    """
+    pixels = palette(grid)
+    if scale > 1:
+        pixels = pixels.repeat(scale, axis=0).repeat(scale, axis=1)
+    if gridlines is not None:
+        pixels[::scale, :] = to_rgb(gridlines)
+        pixels[:, ::scale] = to_rgb(gridlines)
+    return pixels
+
+
+class GridImage:
+    """A rendered image whose PNG encoding is made on first use and kept."""
+
+    def __init__(self, image: Image.Image) -> None:
+        self.image = image
+
+    @cached_property
+    def png(self) -> bytes:
+        buffer = io.BytesIO()
+        self.image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @property
+    def base64(self) -> str:
+        return base64.b64encode(self.png).decode("ascii")
+
+    @property
+    def data_url(self) -> str:
+        return f"data:image/png;base64,{self.base64}"
+
+
+def render_grids(
+    grids: Sequence[Any],
+    palette: Palette = ARC_PALETTE,
+    scale: int = 1,
+    gridlines: Optional[Color] = None,
+    separator: int = 5,
+    background: Color = "white",
+) -> GridImage:
+    """The grids of a frame side by side, `separator` pixels apart.
+
+    Grids whose size differs from the first one are skipped.
+    """
+    arrays = [np.asarray(grid) for grid in grids]
+    if not arrays or arrays[0].ndim != 2 or not arrays[0].size:
+        return GridImage(Image.new("RGB", (1, 1), background))
+    shape = arrays[0].shape
+    good = []
+    for i, array in enumerate(arrays):
+        if array.shape != shape:
+            logger.warning(f"Skipping grid {i} of size {array.shape}, not {shape}")
+            continue
+        good.append(render_grid(array, palette, scale, gridlines))
+    height, width = good[0].shape[:2]
+    gap = separator if len(good) > 1 else 0
+    pixels = np.empty(
+        (height, width * len(good) + gap * (len(good) - 1), 3), dtype=np.uint8
+    )
+    pixels[:] = to_rgb(background)
+    for i, block in enumerate(good):
+        pixels[:, i * (width + gap) : i * (width + gap) + width] = block
+    return GridImage(Image.fromarray(pixels))
+
+
+@lru_cache(maxsize=None)
+def get_font() -> ImageFont.ImageFont | ImageFont.FreeTypeFont:
+    return ImageFont.load_default()
+
+
+def zone_edges(cells: int, cell_size: int, zone_size: int) -> np.ndarray:
+    """Pixel offsets of 2 pixel wide borders around zones of `zone_size` cells."""
+    starts = np.arange(0, cells, zone_size) * cell_size
+    ends = np.minimum(starts + zone_size * cell_size, cells * cell_size)
+    edges = np.unique(np.concatenate([starts, starts + 1, ends - 1, ends]))
+    return edges[edges < cells * cell_size]
+
+
+def render_zones(
+    grid: Any,
+    palette: Palette,
+    cell_size: int = 40,
+    zone_size: int = 16,
+    gridlines: Color = "#000000",
+    border: Color = "#FFD700",
+    label: Color = "#FFFFFF",
+    palette_mode: bool = False,
+) -> GridImage:
+    """`grid` with outlined cells, split into labelled zones of `zone_size` cells.
+
+    Each zone gets a 2 pixel `border` and its top-left cell coordinates as
+    `label`. With `palette_mode` the image is a palette ("P") image, which
+    encodes to a much smaller PNG; its labels are not anti-aliased.
+    """
+    values = np.asarray(grid)
+    if values.ndim != 2 or not values.size:
+        return GridImage(Image.new("RGB", (200, 200), color="black"))
+    height, width = values.shape
+
+    # rows of the lookup table: the palette, then the lines, borders and labels
+    extra = np.array([to_rgb(c) for c in (gridlines, border, label)], dtype=np.uint8)
+    lut = np.vstack([palette.lut, extra])
+    line, edge, text = len(palette.lut), len(palette.lut) + 1, len(palette.lut) + 2
+    ink: Any
+    if palette_mode and len(lut) <= 256:
+        cells, ink = palette.indices(values).astype(np.uint8), text
+        colors: dict[int, Any] = {line: line, edge: edge}
+    else:
+        cells, ink = palette(values), to_rgb(label)
+        colors = {line: lut[line], edge: lut[edge]}
+
+    pixels = cells.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+    pixels[::cell_size, :] = colors[line]
+    pixels[:, ::cell_size] = colors[line]
+    pixels[zone_edges(height, cell_size, zone_size), :] = colors[edge]
+    pixels[:, zone_edges(width, cell_size, zone_size)] = colors[edge]
+
+    image = Image.fromarray(pixels)
+    if pixels.ndim == 2:
+        # an "L" image given a palette becomes a "P" image
+        image.putpalette(lut.flatten().tolist())
+    draw = ImageDraw.Draw(image)
+    font = get_font()
+    for y in range(0, height, zone_size):
+        for x in range(0, width, zone_size):
+            draw.text(
+                (x * cell_size + 2, y * cell_size + 2),
+                f"({x},{y})",
+                fill=ink,
+                font=font,
+            )
+    return GridImage(image)
+
+
+# what `overlay_changes` draws, for prompts that attach such an image
+CHANGES_CAPTION = (
+    "Cells that changed since the previous screen are outlined in magenta;"
+    " the faint square in their middle shows their previous color."
+)
+
+
+def overlay_changes(
+    image: Image.Image,
+    grid: Any,
+    previous: Any,
+    palette: Palette,
+    cell_size: int,
+    offset: int = 0,
+    outline: Color = "#FF00FF",
+    ghost: float = 0.4,
+) -> Image.Image:
+    """A copy of the rendered `grid` with the cells that differ from `previous`
+    outlined and a faint ghost of their previous color in their middle.
+
+    `image` has cell (0, 0) at (`offset`, `offset`) pixels. One such image
+    replaces showing the previous and the current screen side by side.
+    Only the pixels of the changed cells are touched, and palette images
+    stay palette images while the new colors fit in their palette.
+    """
+    values, before = np.asarray(grid), np.asarray(previous)
+    if values.ndim != 2 or values.shape != before.shape or (values == before).all():
+        return image.copy()
+    rows, cols = np.nonzero(values != before)
+    top, left = int(rows.min()), int(cols.min())
+    bottom, right = int(rows.max()) + 1, int(cols.max()) + 1
+    changed = (values != before)[top:bottom, left:right]
+    box = (
+        slice(offset + top * cell_size, offset + bottom * cell_size),
+        slice(offset + left * cell_size, offset + right * cell_size),
+    )
+
+    def per_pixel(cells: np.ndarray) -> np.ndarray:
+        return cells.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+
+    # the middle half of each changed cell gets the previous color, blended
+    inside = np.arange(cell_size * max(changed.shape)) % cell_size
+    rows_in = inside[: changed.shape[0] * cell_size, None]
+    cols_in = inside[None, : changed.shape[1] * cell_size]
+    quarter = cell_size // 4
+    touched = per_pixel(changed)
+    middle = (rows_in >= quarter) & (rows_in < cell_size - quarter)
+    middle = middle & (cols_in >= quarter) & (cols_in < cell_size - quarter)
+    # and lines go along the edges of the changed areas, not between their cells
+    padded = np.pad(changed, 1)
+    line = max(1, cell_size // 6)
+    edges = (
+        per_pixel(~padded[:-2, 1:-1]) & (rows_in < line)
+        | per_pixel(~padded[2:, 1:-1]) & (rows_in >= cell_size - line)
+        | per_pixel(~padded[1:-1, :-2]) & (cols_in < line)
+        | per_pixel(~padded[1:-1, 2:]) & (cols_in >= cell_size - line)
+    )
+
+    # only the pixels of changed cells are read and recolored
+    lut: Optional[np.ndarray] = None
+    if image.mode == "P":
+        pixels = np.array(image)
+        area = pixels[box]
+        lut = np.array(image.getpalette() or [], dtype=np.uint8).reshape(-1, 3)
+        colors = lut[area[touched]]
+    else:
+        corner = (box[1].start, box[0].start)
+        area = np.array(image.crop((*corner, box[1].stop, box[0].stop)).convert("RGB"))
+        colors = area[touched]
+    ghost_colors = per_pixel(palette(before[top:bottom, left:right]))[touched]
+    blend = middle[touched]
+    mixed = colors[blend] * (1 - ghost) + ghost_colors[blend] * ghost
+    colors[blend] = mixed.astype(np.uint8)
+    colors[edges[touched]] = to_rgb(outline)
+
+    if lut is None:
+        area[touched] = colors
+        overlaid = image.convert("RGB")
+        overlaid.paste(Image.fromarray(area), corner)
+        return overlaid
+    # one number per color, as np.unique is much faster on those than on rows
+    codes = colors.astype(np.int32) @ np.array([1 << 16, 1 << 8, 1], dtype=np.int32)
+    added, inverse = np.unique(codes, return_inverse=True)
+    if len(lut) + len(added) > 256:
+        rgb = lut[pixels]
+        rgb[box][touched] = colors
+        return Image.fromarray(rgb)
+    area[touched] = len(lut) + inverse
+    overlaid = Image.fromarray(pixels)
+    added = np.stack([added >> 16, added >> 8 & 255, added & 255], axis=1)
+    overlaid.putpalette(np.vstack([lut, added]).astype(np.uint8).flatten().tolist())
+    return overlaid
@@ -0,0 +1,179 @@
+"""Region-of-interest images for vision prompts.
+
+Most turns only change a small part of the board: the player moves a few
+cells and a status bar ticks down. Instead of the whole board at high
+detail on every turn, `find_region` picks the cells worth a close look
+(the player and whatever changed since the previous grid) and
+`roi_images` turns an already rendered board into a high-detail crop of
+them plus a low-detail overview. How much is sent adapts to how much
+changed: nothing gets only the overview, a lot gets the whole board.
+
+This is opt-in: set `VISION_ROI=on`; by default the whole board is sent.
+"""
+
+import os
+from typing import Any, Literal, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+from .rendering import GridImage
+
+Mode = Literal["full", "crop", "still"]
+
+# the largest side of the overview image, what `detail: low` looks at
+OVERVIEW_SIZE = 512
+
+
+def roi_enabled() -> bool:
+    return os.getenv("VISION_ROI", "off").lower() in ("on", "true", "1")
+
+
+class Region:
+    """Cells `top`..`bottom` and `left`..`right` (inclusive) of a grid.
+
+    `mode` says what to send: "full" for the whole board at high detail
+    (the first look at a board, or too much changed for a crop to pay
+    off), "crop" for a close-up of the region plus an overview, "still"
+    for just the overview when nothing outside the status rows changed.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        top: int,
+        left: int,
+        bottom: int,
+        right: int,
+        mode: Mode,
+        changed: int = 0,
+        hud_changed: int = 0,
+        hud_rows: int = 0,
+    ) -> None:
+        self.shape = shape
+        self.top, self.left, self.bottom, self.right = top, left, bottom, right
+        self.mode = mode
+        self.changed = changed
+        self.hud_changed = hud_changed
+        self.hud_rows = hud_rows
+
+    @property
+    def cells(self) -> int:
+        return (self.bottom - self.top + 1) * (self.right - self.left + 1)
+
+    def box(self, cell_size: int, offset: int = 0) -> tuple[int, int, int, int]:
+        """The (left, top, right, bottom) pixel box of the region in an image
+        whose cell (0, 0) starts at (`offset`, `offset`)."""
+        return (
+            offset + self.left * cell_size,
+            offset + self.top * cell_size,
+            offset + (self.right + 1) * cell_size,
+            offset + (self.bottom + 1) * cell_size,
+        )
+
+    def describe(self) -> str:
+        """One line of text to go with the close-up."""
+        text = (
+            f"Close-up of rows {self.top}-{self.bottom}, columns"
+            f" {self.left}-{self.right}: the player and the {self.changed} cells"
+            " that changed since the previous screen."
+        )
+        if self.hud_changed:
+            text += (
+                f" {self.hud_changed} cells of the status rows 0-{self.hud_rows - 1}"
+                " changed too, see the overview."
+            )
+        return text
+
+
+def _span(
+    low: int, high: int, size: int, margin: int, min_size: int
+) -> tuple[int, int]:
+    """`low`..`high` padded by `margin`, grown to `min_size` and kept in 0..size-1."""
+    low, high = low - margin, high + margin
+    if (grow := min(min_size, size) - (high - low + 1)) > 0:
+        low -= grow // 2
+        high += grow - grow // 2
+    shift = max(0, -low) - max(0, high - size + 1)
+    return max(0, low + shift), min(size - 1, high + shift)
+
+
+def find_region(
+    grid: Any,
+    previous: Optional[Any] = None,
+    focus: Sequence[int] = (12,),
+    hud_rows: int = 0,
+    margin: int = 4,
+    min_size: int = 16,
+    max_fraction: float = 0.25,
+) -> Region:
+    """The region of `grid` worth a high-detail look.
+
+    It covers the cells with a `focus` value (the player) and the cells
+    that differ from `previous`, padded by `margin` and at least `min_size`
+    cells on each side. Changes in the first `hud_rows` rows (the status
+    bars) are counted but do not widen the region: the overview shows them.
+    Regions over `max_fraction` of the board are sent whole.
+    """
+    values = np.asarray(grid)
+    if values.ndim != 2 or not values.size:
+        return Region((0, 0), 0, 0, -1, -1, "full")
+    height, width = values.shape
+    whole = Region((height, width), 0, 0, height - 1, width - 1, "full")
+    if previous is None or np.shape(previous) != values.shape:
+        return whole
+
+    changed = values != np.asarray(previous)
+    hud_changed = int(changed[:hud_rows].sum())
+    changed[:hud_rows] = False
+    count = int(changed.sum())
+    if not count:
+        return Region(
+            whole.shape, 0, 0, height - 1, width - 1, "still", 0, hud_changed, hud_rows
+        )
+
+    rows, cols = np.nonzero(changed | np.isin(values, focus))
+    top, bottom = _span(int(rows.min()), int(rows.max()), height, margin, min_size)
+    left, right = _span(int(cols.min()), int(cols.max()), width, margin, min_size)
+    region = Region(
+        whole.shape, top, left, bottom, right, "crop", count, hud_changed, hud_rows
+    )
+    if region.cells > max_fraction * values.size:
+        region.mode = "full"
+    return region
+
+
+def overview(image: Image.Image, size: int = OVERVIEW_SIZE) -> Image.Image:
+    """`image` shrunk to fit `size` pixels, all `detail: low` looks at anyway.
+
+    Palette images stay palette images (cheap to encode), so they are not
+    smoothed; others are averaged.
+    """
+    small = image.copy()
+    if image.mode == "P":
+        small.thumbnail((size, size), Image.Resampling.NEAREST)
+    else:
+        small.thumbnail((size, size), Image.Resampling.BOX)
+    return small
+
+
+def roi_images(
+    image: Image.Image,
+    region: Region,
+    cell_size: int,
+    offset: int = 0,
+) -> list[tuple[str, GridImage, str]]:
+    """(caption, image, detail) for each image to send of the rendered board.
+
+    `image` is the whole board with cell (0, 0) at (`offset`, `offset`)
+    pixels and `cell_size` pixel cells. The whole board has no caption.
+    """
+    if region.mode == "full":
+        return [("", GridImage(image), "high")]
+    if region.mode == "still":
+        caption = "Nothing changed on the board since the previous screen:"
+        return [(caption, GridImage(overview(image)), "low")]
+    images = [("Overview of the whole board:", GridImage(overview(image)), "low")]
+    crop = image.crop(region.box(cell_size, offset))
+    images.append((region.describe(), GridImage(crop), "high"))
+    return images
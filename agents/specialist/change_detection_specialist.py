@@ -1,31 +1,70 @@
 # agents/specialist/change_detection_specialist.py
+from typing import Any
+
+from agents.diffing import FrameDiff, diff_frames
+from agents.objects import GridObject, extract_objects, match_objects
 from agents.structs import FrameData
 
+
 class ChangeDetectionSpecialist:
     """Compares frames before and after an action to find the exact effect."""
-    def detect_delta(self, frame_before: FrameData, frame_after: FrameData) -> dict:
+
+    # rows at the top of the grid holding status bars, for games that have them
+    HUD_ROWS = 0
+    # also report the objects that moved, several times the cost of the diff
+    TRACK_OBJECTS = False
+    # objects are only looked for this many cells around what changed
+    OBJECT_MARGIN = 4
+
+    def detect_delta(
+        self, frame_before: FrameData, frame_after: FrameData
+    ) -> dict[str, Any]:
         """
         Calculates a detailed, data-driven 'delta' between two frames.
-        """
-        pixels_changed = 0
-        changes = []
-        
-        grid_before = frame_before.frame[0]
-        grid_after = frame_after.frame[0]
 
-        for y in range(len(grid_before)):
-            for x in range(len(grid_before[y])):
-                if grid_before[y][x] != grid_after[y][x]:
-                    pixels_changed += 1
-                    changes.append({
-                        "pos": (x, y),
-                        "before": grid_before[y][x],
-                        "after": grid_after[y][x]
-                    })
-        
-        return {
-            "pixels_changed": pixels_changed,
+        The final grid of `frame_before` is compared with every grid of
+        `frame_after`, so changes during an animation are seen too. With
+        `TRACK_OBJECTS`, objects of the final grids around the changed cells
+        are matched to say which ones moved or changed ("moved_objects").
+        """
+        diff = diff_frames(frame_before.frame, frame_after.frame, self.HUD_ROWS)
+        report = diff.report(limit=20)
+        delta = {
+            "pixels_changed": diff.changed,
+            "transient_pixels_changed": diff.transient_changed,
+            "hud_pixels_changed": diff.hud_changed,
+            "board_pixels_changed": diff.board_changed,
+            "bbox": report["bbox"],
+            "transitions": report["transitions"],
             "score_change": frame_after.score - frame_before.score,
-            "game_state_change": frame_after.state.name if frame_before.state != frame_after.state else None,
-            "specific_changes": changes[:20]
-        }
\ No newline at end of file
+            "game_state_change": frame_after.state.name
+            if frame_before.state != frame_after.state
+            else None,
+            "specific_changes": report["cells"],
+        }
+        if self.TRACK_OBJECTS:
+            delta["moved_objects"] = [
+                o.to_dict() for o in self.moved_objects(diff, frame_before, frame_after)
+            ]
+        return delta
+
+    def moved_objects(
+        self, diff: FrameDiff, frame_before: FrameData, frame_after: FrameData
+    ) -> list[GridObject]:
+        """The objects around the changed cells that moved or changed shape."""
+        moved: list[GridObject] = []
+        if (box := diff.bbox) is not None:
+            before, after = frame_before.frame[-1], frame_after.frame[-1]
+            margin = self.OBJECT_MARGIN
+            window = (
+                max(box[0] - margin, 0),
+                max(box[1] - margin, 0),
+                min(box[2] + margin, len(after) - 1),
+                min(box[3] + margin, len(after[0]) - 1),
+            )
+            objects = match_objects(
+                extract_objects(before, window=window),
+                extract_objects(after, window=window),
+            )
+            moved = [o for o in objects if o.moved or o.reshaped]
+        return moved[:20]
@@ -0,0 +1,214 @@
+# agents/specialist/event_store.py
+import base64
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Optional
+
+from agents.structs import GameAction
+
+ACTIONS = [action.name for action in GameAction]
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+# column name -> array typecode; turns are implicit, first_turn + row
+COLUMNS = {
+    "action": "b",
+    "x": "b",  # -1 for actions without coordinates
+    "y": "b",
+    "success": "b",
+    "pixels_changed": "i",
+    "score_change": "i",
+}
+
+
+class EventStore:
+    """
+    Cause-and-effect events stored as typed columns, one row per turn.
+
+    Rows are indexed by action, by clicked position and by success, so
+    queries do not scan the whole history. At most `max_events` rows are
+    kept (the oldest are dropped in batches), and the full effect deltas
+    only for the last `max_details` turns; older events keep the numbers
+    in the columns.
+    """
+
+    def __init__(self, max_events: int = 100_000, max_details: int = 1_000) -> None:
+        self.max_events = max_events
+        self.first_turn = 1
+        self.turn_number = 0
+        self.columns = {name: array(code) for name, code in COLUMNS.items()}
+        self.details: deque[dict[str, Any]] = deque(maxlen=max_details)
+        self._by_action: dict[str, list[int]] = {}
+        self._by_position: dict[tuple[int, int], list[int]] = {}
+        self._successes: list[int] = []
+
+    def __len__(self) -> int:
+        return self.turn_number - self.first_turn + 1
+
+    def append(
+        self,
+        action: str,
+        success: bool,
+        delta: dict[str, Any],
+        position: Optional[tuple[int, int]] = None,
+    ) -> int:
+        """Store the event of the next turn and return its turn number."""
+        self.turn_number += 1
+        turn = self.turn_number
+        x, y = position if position is not None else (-1, -1)
+        row = {
+            "action": ACTION_CODES[action],
+            "x": x,
+            "y": y,
+            "success": int(success),
+            "pixels_changed": int(delta.get("pixels_changed", 0)),
+            "score_change": int(delta.get("score_change", 0)),
+        }
+        for name, value in row.items():
+            self.columns[name].append(value)
+        self.details.append(delta)
+        self._by_action.setdefault(action, []).append(turn)
+        if position is not None:
+            self._by_position.setdefault(position, []).append(turn)
+        if success:
+            self._successes.append(turn)
+        if len(self) > self.max_events:
+            self._evict(len(self) - self.max_events + self.max_events // 10)
+        return turn
+
+    def _evict(self, count: int) -> None:
+        for column in self.columns.values():
+            del column[:count]
+        self.first_turn += count
+        for index in [*self._by_action.values(), *self._by_position.values()]:
+            del index[: bisect_left(index, self.first_turn)]
+        del self._successes[: bisect_left(self._successes, self.first_turn)]
+
+    def event(self, turn: int) -> dict[str, Any]:
+        """The event of `turn`, in the format `MemorySpecialist` always used."""
+        row = turn - self.first_turn
+        if not 0 <= row < len(self):
+            raise IndexError(f"turn {turn} is not in the store")
+        x, y = self.columns["x"][row], self.columns["y"][row]
+        detail = self.turn_number - turn
+        if detail < len(self.details):
+            delta = self.details[len(self.details) - 1 - detail]
+        else:
+            delta = {
+                "pixels_changed": self.columns["pixels_changed"][row],
+                "score_change": self.columns["score_change"][row],
+            }
+        return {
+            "turn": turn,
+            "action": {
+                "name": ACTIONS[self.columns["action"][row]],
+                "data": {"x": x, "y": y} if x >= 0 else None,
+            },
+            "effect_delta": delta,
+            "success": bool(self.columns["success"][row]),
+        }
+
+    def recent(self, count: int) -> list[dict[str, Any]]:
+        start = max(self.first_turn, self.turn_number - count + 1)
+        return [self.event(turn) for turn in range(start, self.turn_number + 1)]
+
+    def turns(
+        self,
+        action: Optional[str] = None,
+        success: Optional[bool] = None,
+        position: Optional[tuple[int, int]] = None,
+        limit: Optional[int] = None,
+    ) -> list[int]:
+        """The turns matching every given filter, oldest first; with `limit`,
+        only the most recent ones."""
+        candidates: Optional[list[int]] = None
+        if action is not None:
+            candidates = self._by_action.get(action, [])
+        if position is not None:
+            at = self._by_position.get(position, [])
+            candidates = at if candidates is None else _intersect(candidates, at)
+        if success:
+            candidates = (
+                self._successes
+                if candidates is None
+                else _intersect(candidates, self._successes)
+            )
+        if candidates is None:
+            candidates = list(range(self.first_turn, self.turn_number + 1))
+        if success is False:
+            candidates = [
+                t
+                for t in candidates
+                if not self.columns["success"][t - self.first_turn]
+            ]
+        matches = candidates[bisect_left(candidates, self.first_turn) :]
+        return matches[-limit:] if limit else list(matches)
+
+    def query(self, **filters: Any) -> list[dict[str, Any]]:
+        """The events of `turns(**filters)`."""
+        return [self.event(turn) for turn in self.turns(**filters)]
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        """Tries and successes of each action still in the store."""
+        success = set(self._successes)
+        return {
+            action: {
+                "tries": len(turns),
+                "successes": sum(1 for t in turns if t in success),
+            }
+            for action, turns in self._by_action.items()
+            if turns
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """A JSON-ready copy: each column as base64 of its raw values."""
+        return {
+            "format": "columns",
+            "byteorder": sys.byteorder,
+            "actions": ACTIONS,
+            "first_turn": self.first_turn,
+            "turn_number": self.turn_number,
+            "columns": {
+                name: base64.b64encode(column.tobytes()).decode()
+                for name, column in self.columns.items()
+            },
+            "details": list(self.details),
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], max_events: int = 100_000, max_details: int = 1_000
+    ) -> "EventStore":
+        store = cls(max_events=max_events, max_details=max_details)
+        store.first_turn, store.turn_number = data["first_turn"], data["turn_number"]
+        for name, code in COLUMNS.items():
+            column = array(code, base64.b64decode(data["columns"][name]))
+            if data["byteorder"] != sys.byteorder:
+                column.byteswap()
+            store.columns[name] = column
+        # the file's action codes, in case GameAction was reordered since
+        codes = [ACTION_CODES[name] for name in data["actions"]]
+        store.columns["action"] = array(
+            "b", (codes[code] for code in store.columns["action"])
+        )
+        store.details.extend(data["details"])
+        for row in range(len(store)):
+            turn = store.first_turn + row
+            store._by_action.setdefault(
+                ACTIONS[store.columns["action"][row]], []
+            ).append(turn)
+            x, y = store.columns["x"][row], store.columns["y"][row]
+            if x >= 0:
+                store._by_position.setdefault((x, y), []).append(turn)
+            if store.columns["success"][row]:
+                store._successes.append(turn)
+        return store
+
+
+def _intersect(first: list[int], second: list[int]) -> list[int]:
+    """The common values of two sorted lists, sorted."""
+    if len(first) > len(second):
+        first, second = second, first
+    members = set(second)
+    return [value for value in first if value in members]
@@ -11,21 +11,33 @@ class InputSpecialist:
         self._click_attempts = 0
 
     # --- UPGRADE: Now accepts the knowledge base ---
-    def generate_exploratory_action(self, knowledge: dict) -> GameAction:
+    def generate_exploratory_action(
+        self,
+        knowledge: dict,
+        masked: frozenset[GameAction] | set[GameAction] = frozenset(),
+    ) -> GameAction:
         """
-        Generates an action for interface discovery, avoiding already-known mechanics.
+        Generates an action for interface discovery, avoiding already-known mechanics
+        and any actions masked as useless in the current state.
         """
         known_mechanics = knowledge.get('mechanics_model', {}).get('action_effects', {})
 
         # Find keyboard actions that we still know nothing about
         untried_keys = [
             action for action in self._keyboard_actions 
-            if action.name not in known_mechanics or known_mechanics[action.name]['tries'] == 0
+            if action not in masked
+            and (action.name not in known_mechanics or known_mechanics[action.name]['tries'] == 0)
         ]
 
         if untried_keys:
             return untried_keys[0]
 
+        # Clicks are known to do nothing in this game, keep pressing keys instead
+        if GameAction.ACTION6 in masked:
+            usable_keys = [a for a in self._keyboard_actions if a not in masked]
+            if usable_keys:
+                return random.choice(usable_keys)
+
         # If all keys have a known effect, default to exploring clicks
         self._click_attempts += 1
         action = GameAction.ACTION6
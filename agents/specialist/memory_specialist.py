@@ -1,31 +1,51 @@
 # agents/specialist/memory_specialist.py
-from agents.structs import GameAction
+from typing import Any, Optional
+
+from agents.specialist.event_store import EventStore
+from agents.structs import ComplexAction, GameAction
+
 
 class MemorySpecialist:
     """Records a detailed, structured history of all cause-and-effect events."""
-    def __init__(self):
-        self.events = []
-        self.turn_number = 0
-
-    def record_event(self, action: GameAction, delta: dict):
-        self.turn_number += 1
-        
-        action_had_effect = delta.get("pixels_changed", 0) > 0 or delta.get("score_change", 0) != 0
-        
-        action_data = None
-        if hasattr(action, 'data'):
-            action_data = action.data
-        
-        event = {
-            "turn": self.turn_number,
-            "action": {"name": action.name, "data": action_data},
-            "effect_delta": delta,
-            "success": action_had_effect
-        }
-        self.events.append(event)
-    
-    def get_full_history(self):
-        return self.events
-
-    def get_recent_history(self, num_events: int = 20):
-        return self.events[-num_events:]
\ No newline at end of file
+
+    def __init__(self, max_events: int = 100_000, max_details: int = 1_000) -> None:
+        self.store = EventStore(max_events=max_events, max_details=max_details)
+
+    @property
+    def turn_number(self) -> int:
+        return self.store.turn_number
+
+    def record_event(self, action: GameAction, delta: dict[str, Any]) -> dict[str, Any]:
+        """Store the effect of `action` and return the event."""
+        action_had_effect = (
+            delta.get("pixels_changed", 0) > 0 or delta.get("score_change", 0) != 0
+        )
+
+        position = None
+        if isinstance(action.action_data, ComplexAction):
+            position = (action.action_data.x, action.action_data.y)
+
+        turn = self.store.append(action.name, action_had_effect, delta, position)
+        return self.store.event(turn)
+
+    def find_events(
+        self,
+        action: Optional[str] = None,
+        success: Optional[bool] = None,
+        position: Optional[tuple[int, int]] = None,
+        limit: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """Events matching every given filter, e.g. all successful ACTION6 clicks."""
+        return self.store.query(
+            action=action, success=success, position=position, limit=limit
+        )
+
+    def get_full_history(self) -> list[dict[str, Any]]:
+        return self.store.recent(len(self.store))
+
+    def get_recent_history(self, num_events: int = 20) -> list[dict[str, Any]]:
+        return self.store.recent(num_events)
+
+    def to_dict(self) -> dict[str, Any]:
+        """The history in the store's compact, JSON-ready form."""
+        return self.store.to_dict()
@@ -1,49 +1,365 @@
 # agents/specialist/persistent_memory_manager.py
+import copy
 import json
-import os
 import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import IO, Any, Iterator, Optional
+
+from agents.specialist.event_store import EventStore
 
 logger = logging.getLogger(__name__)
 
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS knowledge (
+    game_id TEXT PRIMARY KEY,
+    knowledge TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    x INTEGER,
+    y INTEGER,
+    success INTEGER NOT NULL,
+    pixels_changed INTEGER NOT NULL,
+    score_change INTEGER NOT NULL,
+    delta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_game ON events (game_id, action, success);
+"""
+
+
+def merge_knowledge(
+    stored: dict[str, Any], mine: dict[str, Any], base: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    `stored` plus what this run learned since it loaded `base`.
+
+    Action tries and successes add up, so concurrent runs on the same game
+    all count; effect fingerprints are merged. The strategic model (goal
+    and hypotheses) is this run's, the latest view of the game.
+    """
+    merged = copy.deepcopy(stored) if stored else copy.deepcopy(mine)
+    if not stored:
+        return merged
+    effects = merged.setdefault("mechanics_model", {}).setdefault("action_effects", {})
+    base_effects = base.get("mechanics_model", {}).get("action_effects", {})
+    for action, effect in (
+        mine.get("mechanics_model", {}).get("action_effects", {}).items()
+    ):
+        before = base_effects.get(action, {})
+        target = effects.setdefault(
+            action, {"tries": 0, "successes": 0, "effect_fingerprints": []}
+        )
+        for count in ("tries", "successes"):
+            target[count] = (
+                target.get(count, 0) + effect.get(count, 0) - before.get(count, 0)
+            )
+        fingerprints = target.setdefault("effect_fingerprints", [])
+        for fingerprint in effect.get("effect_fingerprints", []):
+            if fingerprint not in fingerprints:
+                fingerprints.append(fingerprint)
+    if "strategic_model" in mine:
+        merged["strategic_model"] = copy.deepcopy(mine["strategic_model"])
+    return merged
+
+
+class JsonStream:
+    """
+    Reads the fields of a JSON object from a file a chunk at a time, so a
+    field near the start of a large file is read without parsing the rest.
+    """
+
+    def __init__(self, file: IO[str], chunk_size: int = 1 << 16) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        data = self.file.read(self.chunk_size)
+        if not data:
+            return False
+        self.buffer = self.buffer[self.pos :] + data
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """The next character that is not whitespace, "" at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def _expect(self, char: str) -> bool:
+        if self._peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a number may go on in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _find(self, key: str) -> bool:
+        """Move to the value of the top-level `key`, False if there is none."""
+        if not self._expect("{"):
+            raise ValueError("not a JSON object")
+        while not self._expect("}"):
+            name = self._value()
+            if not self._expect(":"):
+                raise ValueError("malformed JSON object")
+            if name == key:
+                return True
+            self._value()
+            self._expect(",")
+        return False
+
+    def field(self, key: str) -> Any:
+        """The value of the top-level `key`, None if there is none."""
+        return self._value() if self._find(key) else None
+
+    def items(self, key: str) -> Iterator[Any]:
+        """The items of the top-level list `key`, one at a time."""
+        if not self._find(key):
+            return
+        if not self._expect("["):
+            # the column store of `EventStore.to_dict`
+            yield from EventStore.from_dict(self._value()).recent(sys.maxsize)
+            return
+        while not self._expect("]"):
+            yield self._value()
+            self._expect(",")
+
+
 class PersistentMemoryManager:
-    """Handles saving and loading of an agent's 'brain' for specific games."""
-    
+    """
+    Handles saving and loading of an agent's 'brain' for specific games.
+
+    Brains live in one SQLite database in WAL mode, so agents playing the
+    same game in parallel (a swarm) can read and write at the same time.
+    Events are appended one at a time as they happen and knowledge is
+    merged in a single transaction, so saving costs the same however long
+    the history gets, and no writer overwrites another's work.
+    """
+
     def __init__(self, memory_dir="agent_brains"):
         self.memory_dir = memory_dir
         if not os.path.exists(self.memory_dir):
             os.makedirs(self.memory_dir)
+        self.run_id = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._base: dict[str, dict[str, Any]] = {}
+        self.db = sqlite3.connect(
+            os.path.join(self.memory_dir, "brains.db"),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,  # autocommit, transactions are explicit
+        )
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
 
     def _get_filepath(self, game_id: str) -> str:
-        """Generates a consistent filename for a game's brain file."""
+        """The JSON brain file of older versions, imported on first load."""
         return os.path.join(self.memory_dir, f"brain_{game_id}.json")
 
-    # --- THE FIX IS HERE: The function now correctly accepts 'knowledge' ---
-    def save_state(self, game_id: str, memory_events: list, knowledge: dict):
-        """Saves the agent's current knowledge and raw memory to a file."""
-        filepath = self._get_filepath(game_id)
-        logger.info(f"Saving agent brain for game '{game_id}' to {filepath}")
-        
-        state_dump = {
-            "knowledge": knowledge,
-            "raw_memory_events": memory_events, # Save raw events for our own analysis
-        }
-        
+    def append_event(self, game_id: str, event: dict[str, Any]) -> None:
+        """Stores one event (in `MemorySpecialist`'s format) right away."""
+        data = event["action"].get("data") or {}
+        delta = event.get("effect_delta", {})
+        row = (
+            game_id,
+            self.run_id,
+            event["turn"],
+            event["action"]["name"],
+            data.get("x"),
+            data.get("y"),
+            int(event["success"]),
+            delta.get("pixels_changed", 0),
+            delta.get("score_change", 0),
+            json.dumps(delta, separators=(",", ":")),
+        )
+        try:
+            with self._lock:
+                self.db.execute(
+                    "INSERT INTO events (game_id, run_id, turn, action, x, y, success,"
+                    " pixels_changed, score_change, delta)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store event for {game_id}: {e}")
+
+    def save_state(self, game_id: str, knowledge: dict):
+        """Merges the agent's current knowledge into the stored brain."""
+        logger.info(f"Saving agent brain for game '{game_id}' to {self.memory_dir}")
+        base = self._base.get(game_id, {})
+        try:
+            with self._lock:
+                # IMMEDIATE takes the write lock before reading, so no other
+                # writer can slip in between the read and the write
+                self.db.execute("BEGIN IMMEDIATE")
+                try:
+                    stored = self._read_knowledge(game_id) or {}
+                    merged = merge_knowledge(stored, knowledge, base)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO knowledge VALUES (?, ?, ?)",
+                        (game_id, json.dumps(merged), time.time()),
+                    )
+                    self.db.execute("COMMIT")
+                except BaseException:
+                    self.db.execute("ROLLBACK")
+                    raise
+            self._base[game_id] = copy.deepcopy(knowledge)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to save brain for {game_id}: {e}")
+
+    def _read_knowledge(self, game_id: str) -> Optional[dict[str, Any]]:
+        row = self.db.execute(
+            "SELECT knowledge FROM knowledge WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_knowledge(self, game_id: str) -> Optional[dict[str, Any]]:
+        """
+        The knowledge model of a game, or None if there is no brain yet.
+
+        Only the knowledge row is read, however many events were stored.
+        A brain file of an older version is read up to its knowledge (which
+        comes before the raw events) and copied into the database, so the
+        file is only opened once.
+        """
         try:
-            with open(filepath, "w") as f:
-                json.dump(state_dump, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save brain file for {game_id}: {e}")
+            with self._lock:
+                knowledge = self._read_knowledge(game_id)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load brain for {game_id}: {e}")
+            knowledge = None
+        if knowledge is None and (knowledge := self._load_legacy(game_id)):
+            try:
+                with self._lock:
+                    self.db.execute(
+                        "INSERT OR IGNORE INTO knowledge VALUES (?, ?, ?)",
+                        (game_id, json.dumps(knowledge), time.time()),
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Failed to import brain file for {game_id}: {e}")
+        if knowledge is not None:
+            self._base[game_id] = copy.deepcopy(knowledge)
+        return knowledge
 
     def load_state(self, game_id: str) -> dict:
-        """Loads the agent's knowledge if a brain file exists."""
+        """Loads the agent's knowledge if a brain exists."""
+        knowledge = self.load_knowledge(game_id)
+        if knowledge is None:
+            logger.info(
+                f"No previous brain found for '{game_id}'. Starting with a blank page."
+            )
+            return {}  # Return empty dict if no brain is found
+        logger.critical(
+            f"--- PREVIOUS BRAIN FOUND for '{game_id}'. Loading past experiences. ---"
+        )
+        return {"knowledge": knowledge}
+
+    def _load_legacy(self, game_id: str) -> Optional[dict[str, Any]]:
         filepath = self._get_filepath(game_id)
-        if os.path.exists(filepath):
-            try:
-                logger.critical(f"--- PREVIOUS BRAIN FOUND for '{game_id}'. Loading past experiences. ---")
-                with open(filepath, "r") as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Failed to load or parse brain file for {game_id}: {e}")
-        
-        logger.info(f"No previous brain found for '{game_id}'. Starting with a blank page.")
-        return {} # Return empty dict if no brain is found
\ No newline at end of file
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with open(filepath, "r") as f:
+                knowledge = JsonStream(f).field("knowledge")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load or parse brain file for {game_id}: {e}")
+            return None
+        return knowledge if isinstance(knowledge, dict) else None
+
+    def iter_events(
+        self,
+        game_id: str,
+        action: Optional[str] = None,
+        success: Optional[bool] = None,
+        batch_size: int = 500,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Streams the stored events of a game, oldest first, for offline
+        analysis: those of an older version's brain file, then those in the
+        database. Rows are fetched `batch_size` at a time.
+        """
+        for event in self._iter_legacy_events(game_id):
+            if (action is None or event["action"]["name"] == action) and (
+                success is None or bool(event["success"]) == success
+            ):
+                yield event
+
+        query = (
+            "SELECT run_id, turn, action, x, y, success, delta FROM events"
+            " WHERE game_id = ?"
+        )
+        params: list[Any] = [game_id]
+        if action is not None:
+            query += " AND action = ?"
+            params.append(action)
+        if success is not None:
+            query += " AND success = ?"
+            params.append(int(success))
+        # a cursor of its own: other threads may use the connection meanwhile
+        cursor = self.db.cursor()
+        cursor.execute(query + " ORDER BY id", params)
+        try:
+            while rows := cursor.fetchmany(batch_size):
+                for run_id, turn, name, x, y, succeeded, delta in rows:
+                    yield {
+                        "turn": turn,
+                        "run_id": run_id,
+                        "action": {
+                            "name": name,
+                            "data": {"x": x, "y": y} if x is not None else None,
+                        },
+                        "effect_delta": json.loads(delta),
+                        "success": bool(succeeded),
+                    }
+        finally:
+            cursor.close()
+
+    def _iter_legacy_events(self, game_id: str) -> Iterator[dict[str, Any]]:
+        filepath = self._get_filepath(game_id)
+        if not os.path.exists(filepath):
+            return
+        try:
+            with open(filepath, "r") as f:
+                yield from JsonStream(f).items("raw_memory_events")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read events of brain file for {game_id}: {e}")
+
+    def event_count(self, game_id: str) -> int:
+        with self._lock:
+            row = self.db.execute(
+                "SELECT COUNT(*) FROM events WHERE game_id = ?", (game_id,)
+            ).fetchone()
+        return int(row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
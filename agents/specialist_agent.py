@@ -5,6 +5,7 @@ from typing import Optional, Any
 import json
 
 from agents.agent import Agent
+from agents.inference import MeteredBackend, get_backend
 from agents.structs import FrameData, GameAction, GameState
 from agents.specialist.input_specialist import InputSpecialist
 from agents.specialist.change_detection_specialist import ChangeDetectionSpecialist
@@ -32,7 +33,7 @@ class SpecialistAgent(Agent):
         self.change_detector = ChangeDetectionSpecialist()
         self.memory = MemorySpecialist()
         self.knowledge = KnowledgeSpecialist()
-        self.llm = LLMSpecialists()
+        self.llm = LLMSpecialists(MeteredBackend(get_backend(), self.usage))
         self.memory_manager = PersistentMemoryManager()
         self.reasoning_logger = ReasoningLogSpecialist()
         
@@ -87,14 +88,20 @@ class SpecialistAgent(Agent):
 
         if self.last_frame and self.last_action and self.last_frame.frame:
             delta = self.change_detector.detect_delta(self.last_frame, latest_frame)
-            self.memory.record_event(self.last_action, delta)
-            last_event = self.memory.events[-1]
+            last_event = self.memory.record_event(self.last_action, delta)
+            self.memory_manager.append_event(self.game_id, last_event)
             self.knowledge.update_mechanics_from_event(last_event)
             if self.phase == AgentPhase.EXPLORATION and last_event['success']:
                 logger.critical(f"--- BREAKTHROUGH! Switching to INVESTIGATION. ---")
                 self.phase = AgentPhase.INVESTIGATION
                 self.current_plan = []
 
+        if latest_frame.state == GameState.GAME_OVER:
+            # nothing but RESET does anything now, no need to consult the LLMs
+            self.last_frame = latest_frame
+            self.last_action = self.action_mask.forced(latest_frame) or GameAction.RESET
+            return self.last_action
+
         if not self.current_plan:
             if len(self.recent_goals) > 3 and len(set(self.recent_goals[-3:])) == 1:
                 logger.critical("--- AGENT BORED: Stuck in a thought loop. Forcing broad exploration. ---")
@@ -126,7 +133,9 @@ class SpecialistAgent(Agent):
                 self.phase = AgentPhase.EXECUTION if self.knowledge.knowledge['strategic_model']['current_goal'] != "Unknown" else AgentPhase.INVESTIGATION
         else:
             logger.info(f"--- In EXPLORATION phase (Turn {self.memory.turn_number + 1}) ---")
-            action_to_take = self.input_specialist.generate_exploratory_action(self.knowledge.get_knowledge_summary())
+            action_to_take = self.input_specialist.generate_exploratory_action(
+                self.knowledge.get_knowledge_summary(), self.action_mask.masked(latest_frame)
+            )
         
         self.last_frame = latest_frame
         self.last_action = action_to_take
@@ -142,9 +151,9 @@ class SpecialistAgent(Agent):
     def cleanup(self, scorecard: Optional[Any] = None) -> None:
         """Called when a game is over. Saves the agent's brain via the manager."""
         logger.info(f"--- Game Over for {self.game_id}. Saving brain. ---")
-        # --- THE FIX IS HERE: The call now matches the manager's function signature ---
+        # events were stored as they happened, only the knowledge is left
         self.memory_manager.save_state(
             game_id=self.game_id,
-            memory_events=self.memory.get_full_history(),
             knowledge=self.knowledge.get_knowledge_summary()
-        )
\ No newline at end of file
+        )
+        self.memory_manager.close()
\ No newline at end of file
@@ -4,10 +4,11 @@ import json
 import logging
 import os
 from threading import Thread
-from typing import TYPE_CHECKING, Optional, Type
+from typing import TYPE_CHECKING, Any, Optional, Type
 
 import requests
 
+from .inference import UsageLedger, current_backend, shutdown_shared_batcher
 from .structs import Scorecard
 
 if TYPE_CHECKING:
@@ -104,6 +105,15 @@ class Swarm:
         if scorecard:
             logger.info("--- FINAL SCORECARD REPORT ---")
             logger.info(json.dumps(scorecard.model_dump(), indent=2))
+        if usage := self.usage_report():
+            logger.info("--- LLM USAGE REPORT ---")
+            logger.info(json.dumps(usage, indent=2))
+
+        if batch_stats := shutdown_shared_batcher():
+            logger.info(f"LLM batching: {json.dumps(batch_stats.as_dict())}")
+        # only a backend some agent used; creating one here could need an API key
+        if (backend := current_backend()) and (backend_report := backend.report()):
+            logger.info(f"LLM backend: {json.dumps(backend_report)}")
 
         # Provide web link to scorecard
         if card_id:
@@ -114,6 +124,19 @@ class Swarm:
 
         return scorecard
 
+    def usage_report(self) -> Optional[dict[str, Any]]:
+        """LLM usage per game and for the whole swarm, or None if no LLM was called."""
+        if not any(a.usage.calls for a in self.agents):
+            return None
+        total = UsageLedger.combine(a.usage for a in self.agents)
+        return {
+            "games": {a.game_id: a.usage_report() for a in self.agents},
+            "swarm": total.report(
+                actions=sum(a.action_counter for a in self.agents),
+                score=sum(a.score for a in self.agents),
+            ),
+        }
+
     def open_scorecard(self) -> str:
         json_str = json.dumps({"tags": self.tags})
 
@@ -1,3 +1,5 @@
+import json
+import logging
 import sqlite3
 from typing import Any, cast
 
@@ -6,17 +8,29 @@ from langgraph.pregel import Pregel
 from langgraph.store.sqlite import SqliteStore
 
 from ...agent import Agent
+from ...inference import ChatBackend, MeteredBackend, get_backend
 from ...structs import FrameData, GameAction, GameState
+from .explanations import ExplanationCache
+from .keys import KeyMatcher
 from .nodes import act, analyze_frame_delta, check_key, init
 from .schema import LLM, AgentState
+from .vision import RenderCache
+
+logger = logging.getLogger()
 
 
 class LangGraph(Agent):
     """A LangGraph agent, using a variety of tools to make decisions."""
 
     MAX_ACTIONS = 20
+    # show the frame delta as one frame with the changes outlined, not two frames
+    DIFF_OVERLAY = False
 
     agent_state: AgentState
+    backend: ChatBackend
+    render_cache: RenderCache
+    key_matcher: KeyMatcher
+    explanation_cache: ExplanationCache
     workflow: Pregel[AgentState, Any, AgentState, AgentState]
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
@@ -32,6 +46,10 @@ class LangGraph(Agent):
             "latest_frame": None,  # type: ignore[typeddict-item]
             "previous_frame": None,
         }
+        self.backend = MeteredBackend(get_backend(), self.usage)
+        self.render_cache = RenderCache()
+        self.key_matcher = KeyMatcher()
+        self.explanation_cache = ExplanationCache()
         self.workflow = self._build_workflow()
 
     @property
@@ -102,9 +120,30 @@ class LangGraph(Agent):
         }
 
         # Execute the workflow
-        output: AgentState = self.workflow.invoke(self.agent_state)
+        output: AgentState = self.workflow.invoke(
+            self.agent_state,
+            {
+                "configurable": {
+                    "backend": self.backend,
+                    "render_cache": self.render_cache,
+                    "key_matcher": self.key_matcher,
+                    "explanation_cache": self.explanation_cache,
+                    "diff_overlay": self.DIFF_OVERLAY,
+                }
+            },
+        )
 
         self.agent_state = output
 
         # Return the selected action
         return cast(GameAction, output["action"])
+
+    def cleanup(self, *args: Any, **kwargs: Any) -> None:
+        if self._cleanup:
+            stats = self.render_cache.stats()
+            logger.info(f"{self.game_id} - render cache: {json.dumps(stats)}")
+            stats = self.key_matcher.stats()
+            logger.info(f"{self.game_id} - key matcher: {json.dumps(stats)}")
+            stats = self.explanation_cache.stats()
+            logger.info(f"{self.game_id} - explanations: {json.dumps(stats)}")
+        super().cleanup(*args, **kwargs)
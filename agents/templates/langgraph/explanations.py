@@ -0,0 +1,114 @@
+"""
+Reusing explanations of frame deltas.
+
+Most steps of a game repeat an effect seen before: the player moves one
+step, bumps into a wall, uses one unit of energy. The delta of such a step
+is reduced to a signature (the action, how each object on the board moved
+and what changed in the status rows) and the model's explanation of the
+first delta with that signature is reused for the ones after it.
+"""
+
+from collections import Counter, OrderedDict
+from typing import Any, Hashable, Optional
+
+from langchain_core.messages import BaseMessage
+
+from langgraph.config import get_config
+
+from ...diffing import diff_frames
+from ...objects import extract_objects, match_objects
+from ...structs import FrameData
+from .vision import HUD_ROWS
+
+Signature = tuple[Hashable, ...]
+
+
+def delta_signature(
+    action: str,
+    previous_frame: FrameData,
+    latest_frame: FrameData,
+    hud_rows: int = HUD_ROWS,
+) -> Signature:
+    """
+    What the delta from `previous_frame` to `latest_frame` did, regardless
+    of where on the board it happened.
+
+    Objects are compared below the status rows: the colour and shape of
+    those that moved or changed shape, with their motion, and of those that
+    appeared or vanished. Status row changes count as colour transitions.
+    """
+    diff = diff_frames(previous_frame.frame, latest_frame.frame, hud_rows)
+    rows, _, before, after = diff.cells()
+    hud = rows < hud_rows
+    hud_changes = tuple(
+        sorted(Counter(zip(before[hud].tolist(), after[hud].tolist())).items())
+    )
+
+    moved: list[tuple[int, str, tuple[float, float], bool]] = []
+    appeared: list[tuple[int, str]] = []
+    vanished: list[tuple[int, str]] = []
+    if diff.board_changed and previous_frame.frame and latest_frame.frame:
+        previous = extract_objects(previous_frame.frame[-1][hud_rows:])
+        current = match_objects(
+            previous, extract_objects(latest_frame.frame[-1][hud_rows:])
+        )
+        for obj in current:
+            if obj.motion is None:
+                appeared.append((obj.color, obj.shape))
+            elif obj.moved or obj.reshaped:
+                moved.append((obj.color, obj.shape, obj.motion, obj.reshaped))
+        ids = {o.id for o in current}
+        vanished = [(o.color, o.shape) for o in previous if o.id not in ids]
+
+    return (
+        action,
+        tuple(sorted(moved)),
+        tuple(sorted(appeared)),
+        tuple(sorted(vanished)),
+        hud_changes,
+        len(latest_frame.frame),
+        latest_frame.state.name,
+        latest_frame.score - previous_frame.score,
+    )
+
+
+class ExplanationCache:
+    """The explanations of the last `maxsize` distinct delta signatures."""
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._explanations: OrderedDict[Signature, BaseMessage] = OrderedDict()
+
+    def get(self, signature: Signature) -> Optional[BaseMessage]:
+        explanation = self._explanations.get(signature)
+        if explanation is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._explanations.move_to_end(signature)
+        return explanation
+
+    def put(self, signature: Signature, explanation: BaseMessage) -> None:
+        self._explanations[signature] = explanation
+        self._explanations.move_to_end(signature)
+        while len(self._explanations) > self.maxsize:
+            self._explanations.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._explanations),
+        }
+
+
+def get_explanation_cache() -> Optional[ExplanationCache]:
+    """The explanation cache in the current graph run's configurable settings."""
+    try:
+        cache = get_config().get("configurable", {}).get("explanation_cache")
+    except RuntimeError:  # called outside of a graph run
+        cache = None
+    return cache if isinstance(cache, ExplanationCache) else None
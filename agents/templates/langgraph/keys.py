@@ -0,0 +1,151 @@
+"""
+Deterministic key and exit door matching.
+
+The key the player holds is drawn in the bottom-left corner of the grid at
+twice the size of the pattern inside the exit door. Both are cut out of
+the final grid, the key is scaled down 2x and the two are compared cell
+by cell, instead of asking a vision model on every step.
+"""
+
+from typing import Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from langgraph.config import get_config
+
+# where the key is drawn, below the bottom wall of the level
+KEY_WINDOW = (slice(53, 64), slice(0, 13))
+# border values of the exit door, tried in order
+DOOR_VALUES = (5, 11)
+
+
+class Pattern:
+    """The cells of a key or door pattern, and the background around them."""
+
+    def __init__(self, cells: np.ndarray, background: int) -> None:
+        self.cells = cells
+        self.background = background
+
+    @property
+    def mask(self) -> np.ndarray:
+        mask: np.ndarray = self.cells != self.background
+        return mask
+
+    @property
+    def colors(self) -> set[int]:
+        return {int(v) for v in np.unique(self.cells[self.mask])}
+
+    def signature(self) -> tuple[bytes, tuple[int, ...], int]:
+        return self.cells.tobytes(), self.cells.shape, self.background
+
+
+class KeyMatch(BaseModel):
+    """How the key compares to the exit door pattern."""
+
+    shape_matches: bool
+    color_matches: bool
+    matches: bool
+
+
+def ring(cells: np.ndarray) -> np.ndarray:
+    """The outermost cells of a 2D array."""
+    if min(cells.shape) <= 2:
+        return cells.ravel()
+    return np.concatenate([cells[0], cells[-1], cells[1:-1, 0], cells[1:-1, -1]])
+
+
+def trim(cells: np.ndarray) -> Optional[Pattern]:
+    """The bounding box of the cells that differ from the most common value
+    on the edge of `cells`, None if there are none."""
+    values, counts = np.unique(ring(cells), return_counts=True)
+    background = int(values[counts.argmax()])
+    rows, cols = np.nonzero(cells != background)
+    if not len(rows):
+        return None
+    return Pattern(
+        cells[rows.min() : rows.max() + 1, cols.min() : cols.max() + 1], background
+    )
+
+
+def find_key(grid: np.ndarray) -> Optional[Pattern]:
+    return trim(grid[KEY_WINDOW])
+
+
+def find_door(grid: np.ndarray) -> Optional[Pattern]:
+    """The pattern inside the exit door: a rectangle mostly bordered by one
+    of `DOOR_VALUES`, found outside the key window."""
+    outside = np.ones(grid.shape, dtype=bool)
+    outside[KEY_WINDOW] = False
+    for value in DOOR_VALUES:
+        rows, cols = np.nonzero((grid == value) & outside)
+        if not len(rows):
+            continue
+        door = grid[rows.min() : rows.max() + 1, cols.min() : cols.max() + 1]
+        if min(door.shape) < 3 or (ring(door) == value).mean() < 0.75:
+            continue  # not a single door, e.g. the value is also used elsewhere
+        return trim(door[1:-1, 1:-1])
+    return None
+
+
+def compare(key: Pattern, door: Pattern) -> KeyMatch:
+    """Compare the key, scaled down to the door pattern's size, to the door."""
+    color_matches = key.colors == door.colors
+    (key_h, key_w), (door_h, door_w) = key.cells.shape, door.cells.shape
+    scale = key_h // door_h
+    if key_h != door_h * scale or key_w != door_w * scale or not scale:
+        return KeyMatch(shape_matches=False, color_matches=color_matches, matches=False)
+    blocks = key.cells.reshape(door_h, scale, door_w, scale)
+    # a key whose blocks are not uniform is no scaled up copy of any pattern
+    if not (blocks == blocks[:, :1, :, :1]).all():
+        return KeyMatch(shape_matches=False, color_matches=color_matches, matches=False)
+    small = Pattern(blocks[:, 0, :, 0], key.background)
+    shape_matches = bool(np.array_equal(small.mask, door.mask))
+    matches = shape_matches and bool(
+        np.array_equal(small.cells[small.mask], door.cells[door.mask])
+    )
+    return KeyMatch(
+        shape_matches=shape_matches, color_matches=color_matches, matches=matches
+    )
+
+
+class KeyMatcher:
+    """
+    Matches the key against the exit door, reusing the last answer until
+    the pixels of either one change.
+    """
+
+    def __init__(self) -> None:
+        self.hits = self.misses = self.not_found = 0
+        self._signature: Optional[tuple[object, ...]] = None
+        self._result: Optional[KeyMatch] = None
+
+    def match(self, grid: list[list[int]]) -> Optional[KeyMatch]:
+        """The comparison, or None if the key or the door is not on screen."""
+        cells = np.asarray(grid)
+        if cells.ndim != 2 or cells.shape[0] < KEY_WINDOW[0].start:
+            self.not_found += 1
+            return None
+        key, door = find_key(cells), find_door(cells)
+        if key is None or door is None:
+            self.not_found += 1
+            return None
+        signature = (*key.signature(), *door.signature())
+        if signature == self._signature and self._result is not None:
+            self.hits += 1
+            return self._result
+        self.misses += 1
+        self._signature, self._result = signature, compare(key, door)
+        return self._result
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "not_found": self.not_found}
+
+
+def get_key_matcher() -> Optional[KeyMatcher]:
+    """The key matcher in the current graph run's configurable settings."""
+    try:
+        matcher = get_config().get("configurable", {}).get("key_matcher")
+    except RuntimeError:  # called outside of a graph run
+        matcher = None
+    return matcher if isinstance(matcher, KeyMatcher) else None
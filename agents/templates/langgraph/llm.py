@@ -1,16 +1,40 @@
 from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
+from pydantic import SecretStr
 
+from langgraph.config import get_config
+
+from ...inference import ChatBackend, get_backend
 from .schema import LLM
 
 
 def get_llm(llm: LLM) -> BaseChatModel:
     """
     Get an LLM instance based on the LLM enum.
+
+    Requests are routed through the `backend` in the run's configurable
+    settings (the agent's metered backend), or the configured backend (see
+    `agents.inference`).
     """
 
+    client = get_run_backend().client
+
     match llm:
         case LLM.OPENAI_GPT_41:
-            return ChatOpenAI(model="gpt-4.1")
+            return ChatOpenAI(
+                model="gpt-4.1",
+                api_key=SecretStr(client.api_key),
+                client=client.chat.completions,
+                root_client=client,
+            )
         case _:
             raise ValueError(f"Unknown LLM: {llm}")
+
+
+def get_run_backend() -> ChatBackend:
+    """The backend for the current graph run."""
+    try:
+        backend = get_config().get("configurable", {}).get("backend")
+    except RuntimeError:  # called outside of a graph run
+        backend = None
+    return backend if isinstance(backend, ChatBackend) else get_backend()
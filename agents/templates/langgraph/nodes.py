@@ -8,7 +8,13 @@ from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 
 from langgraph.config import get_store
 
-from ...structs import GameAction, GameState
+from ...bursts import summarize_burst
+from ...diffing import diff_frames
+from ...rendering import CHANGES_CAPTION
+from ...roi import find_region, roi_enabled, roi_images
+from ...structs import FrameData, GameAction, GameState
+from .explanations import delta_signature, get_explanation_cache
+from .keys import KeyMatcher, get_key_matcher
 from .llm import get_llm
 from .prompts import (
     build_frame_delta_prompt,
@@ -20,7 +26,14 @@ from .prompts import (
 )
 from .schema import AgentState, KeyCheck, Observation
 from .tools import all_tools
-from .vision import render_frame
+from .vision import (
+    HUD_ROWS,
+    SCALE_FACTOR,
+    diff_overlay_enabled,
+    draw_cached,
+    render_cached,
+    render_changes,
+)
 
 
 def act(state: AgentState) -> AgentState:
@@ -35,11 +48,29 @@ def act(state: AgentState) -> AgentState:
     # Build up prompt
     human_message_parts = []
 
-    # Current frame
-    grid = render_frame(latest_frame.frame, "The current state of the game")
-    human_message_parts.append(
-        build_image_message_part(grid),
-    )
+    # Current frame, or a close-up of what changed plus an overview
+    previous_frame = state["previous_frame"]
+    region = None
+    if roi_enabled() and latest_frame.frame:
+        region = find_region(
+            latest_frame.frame[-1],
+            previous_frame.frame[-1]
+            if previous_frame and previous_frame.frame
+            else None,
+            hud_rows=HUD_ROWS,
+        )
+    if region is None or region.mode == "full":
+        grid = render_cached(latest_frame.frame, "The current state of the game")
+        human_message_parts.append(
+            build_image_message_part(grid),
+        )
+    else:
+        drawn = draw_cached(latest_frame.frame)
+        for caption, image, detail in roi_images(
+            drawn, region, SCALE_FACTOR, offset=SCALE_FACTOR
+        ):
+            human_message_parts.append(build_text_message_part(caption))
+            human_message_parts.append(build_image_message_part(image.base64, detail))
 
     # Previous action
     if state["action"]:
@@ -152,6 +183,44 @@ def act_randomly(state: AgentState) -> AgentState:
     return {**state, "action": action}
 
 
+def describe_frame_delta(previous_frame: FrameData, latest_frame: FrameData) -> str:
+    """
+    Describes the changes from the previous frame to the current one.
+    """
+
+    # Compare the final grids; any animation in between is summarized below
+    rows, cols, before, after = diff_frames(
+        previous_frame.frame, latest_frame.frame
+    ).cells()
+    health = rows == 1
+    energy = (rows == 2) & (cols < 54)
+    state_changes = ["Change in heath indicator"] * int(health.sum())
+    state_changes += [
+        "1 energy unit used" if value == 8 else "1 energy unit added"
+        for value in after[energy & ((after == 8) | (after == 6))].tolist()
+    ]
+    moved = ~(health | energy)
+    movements = [
+        f"<{j},{k}>: {a} -> {b}"
+        for j, k, a, b in zip(
+            rows[moved].tolist(),
+            cols[moved].tolist(),
+            before[moved].tolist(),
+            after[moved].tolist(),
+        )
+    ]
+
+    # Build a string describing the changes in the frame
+    deltas_str = "\n".join(state_changes)
+    if movements:
+        deltas_str += "\n\nChanged pixels:\n" + ",".join(movements)
+    else:
+        deltas_str += "\n\nCharacter did not move. Maybe an action was taken towards an unmovable area?"
+    if burst := summarize_burst(latest_frame.frame).describe():
+        deltas_str += f"\n\n{burst}"
+    return deltas_str
+
+
 def analyze_frame_delta(state: AgentState) -> AgentState:
     """
     Analyzes the delta between the previous frame and the current frame.
@@ -166,35 +235,36 @@ def analyze_frame_delta(state: AgentState) -> AgentState:
     if not previous_action or not previous_frame:
         return state
 
-    # Compare pixels of the current frame with the previous frame
-    movements: list[str] = []
-    state_changes: list[str] = []
-
-    for i in range(len(latest_frame.frame)):
-        for j in range(len(latest_frame.frame[i])):
-            for k in range(len(latest_frame.frame[i][j])):
-                if latest_frame.frame[i][j][k] != previous_frame.frame[i][j][k]:
-                    if j == 1:
-                        state_changes.append("Change in heath indicator")
-                    elif j == 2 and k < 54:
-                        if latest_frame.frame[i][j][k] == 8:
-                            state_changes.append("1 energy unit used")
-                        elif latest_frame.frame[i][j][k] == 6:
-                            state_changes.append("1 energy unit added")
-                    else:
-                        movements.append(
-                            f"<{j},{k}>: {previous_frame.frame[i][j][k]} -> {latest_frame.frame[i][j][k]}"
-                        )
+    # An effect seen before gets the explanation it got then
+    cache = get_explanation_cache()
+    if cache is not None:
+        signature = delta_signature(previous_action, previous_frame, latest_frame)
+        if (explanation := cache.get(signature)) is not None:
+            return {
+                **state,
+                "context": [*state["context"], explanation],
+            }
 
-    # Build a string describing the changes in the frame
-    deltas_str = "\n".join(state_changes)
-    if movements:
-        deltas_str += "\n\nChanged pixels:\n" + ",".join(movements)
-    else:
-        deltas_str += "\n\nCharacter did not move. Maybe an action was taken towards an unmovable area?"
+    deltas_str = describe_frame_delta(previous_frame, latest_frame)
 
-    current_image = render_frame(latest_frame.frame, "Current frame")
-    previous_image = render_frame(previous_frame.frame, "Previous frame")
+    if diff_overlay_enabled():
+        images = [
+            build_text_message_part(CHANGES_CAPTION),
+            build_image_message_part(
+                render_changes(
+                    latest_frame.frame, previous_frame.frame, "Current frame"
+                )
+            ),
+        ]
+    else:
+        images = [
+            build_image_message_part(
+                render_cached(latest_frame.frame, "Current frame")
+            ),
+            build_image_message_part(
+                render_cached(previous_frame.frame, "Previous frame")
+            ),
+        ]
 
     # Use LLM to analyze deltas to something more manageable
     response = llm.invoke(
@@ -205,12 +275,13 @@ def analyze_frame_delta(state: AgentState) -> AgentState:
                     build_text_message_part(
                         build_frame_delta_prompt(deltas_str, previous_action),
                     ),
-                    build_image_message_part(current_image),
-                    build_image_message_part(previous_image),
+                    *images,
                 ]
             ),
         ]
     )
+    if cache is not None:
+        cache.put(signature, response)
 
     return {
         **state,
@@ -224,9 +295,19 @@ def check_key(state: AgentState) -> AgentState:
     """
 
     latest_frame = state["latest_frame"]
-    llm = get_llm(state["llm"])
 
-    frame_image = render_frame(latest_frame.frame, "Current frame")
+    # Compare the key and the door cell by cell when both are on screen
+    matcher = get_key_matcher() or KeyMatcher()
+    match = matcher.match(latest_frame.frame[-1]) if latest_frame.frame else None
+    if match is not None:
+        return {
+            **state,
+            "key_matches_door": match.matches,
+        }
+
+    # Otherwise, ask the model
+    llm = get_llm(state["llm"])
+    frame_image = render_cached(latest_frame.frame, "Current frame")
 
     # Build prompt
     user_message_content = build_key_checker_prompt()
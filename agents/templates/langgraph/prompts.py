@@ -3,16 +3,20 @@ Prompts for the LangGraph agent.
 """
 
 from textwrap import dedent
+from typing import Optional
 
 from .schema import Observation
 
 Part = dict[str, str | dict[str, str]]
 
 
-def build_image_message_part(image_b64: str) -> Part:
+def build_image_message_part(image_b64: str, detail: Optional[str] = None) -> Part:
+    image_url = {"url": f"data:image/png;base64,{image_b64}"}
+    if detail:
+        image_url["detail"] = detail
     return {
         "type": "image_url",
-        "image_url": {"url": f"data:image/png;base64,{image_b64}"},
+        "image_url": image_url,
     }
 
 
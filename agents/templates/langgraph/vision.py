@@ -3,12 +3,20 @@ Helpers for working with game frames.
 """
 
 import base64
-import json
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from io import BytesIO
+from typing import Any, Optional, TypeVar
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from langgraph.config import get_config
+
+from ...rendering import Palette, overlay_changes, render_grid
+
 COLOR_PALETTE = {
     0: (0, 0, 0),  # Black
     2: (255, 0, 0),  # Red
@@ -23,6 +31,13 @@ COLOR_PALETTE = {
     # Top of player - 12
 }
 SCALE_FACTOR = 15
+# the top rows hold the health, energy and lives bars
+HUD_ROWS = 4
+
+T = TypeVar("T")
+
+# white for numbers not in the palette
+PALETTE = Palette(COLOR_PALETTE, default=(255, 255, 255))
 
 
 def extract_rect_from_render(
@@ -64,11 +79,18 @@ def render_frame(
     Renders a game frame to a PNG image.
     """
 
-    # Default color (white) if number not in palette
-    default_color = (255, 255, 255)
+    return encode_frame(draw_frame(array_3d, with_highlights), description)
+
+
+def draw_frame(
+    array_3d: list[list[list[int]]], with_highlights: bool = True
+) -> Image.Image:
+    """
+    Draws a game frame with an empty description area, see `encode_frame`.
+    """
 
-    # Convert the 3D array to a NumPy array
-    np_array = np.array(array_3d[0], dtype=np.uint8)
+    # Convert the final grid (the state after any animation burst) to a NumPy array
+    np_array = np.array(array_3d[-1], dtype=np.uint8)
 
     # Original dimensions
     orig_height, orig_width = np_array.shape
@@ -79,48 +101,96 @@ def render_frame(
 
     # Add extra height for description
     description_height = 40
-    img = Image.new("RGB", (scaled_width, scaled_height + description_height))
-    pixels = img.load()
-
-    with open("frame.json", "w") as f:
-        f.write(json.dumps(np_array.tolist()))
-
-    # Fill the image with colors from the palette, scaled
-    for y in range(orig_height):
-        for x in range(orig_width):
-            color_num = np_array[y, x]
-            color = COLOR_PALETTE.get(color_num, default_color)
-            for i in range(SCALE_FACTOR):
-                for j in range(SCALE_FACTOR):
-                    pixels[
-                        (x * SCALE_FACTOR + j) + SCALE_FACTOR,
-                        (y * SCALE_FACTOR + i) + SCALE_FACTOR,
-                    ] = color
+    pixels = np.zeros((scaled_height + description_height, scaled_width, 3), np.uint8)
 
-    draw = ImageDraw.Draw(img)
+    # Fill the cells with colors from the palette, scaled, leaving a one-cell
+    # margin at the top and left for the labels
+    pixels[SCALE_FACTOR:scaled_height, SCALE_FACTOR:scaled_width] = render_grid(
+        np_array, PALETTE, scale=SCALE_FACTOR
+    )
+
+    # Grid lines every SCALE_FACTOR pixels, plus one closing the bottom and right
     line_color = (128, 128, 128)  # Gray
+    pixels[0:scaled_height:SCALE_FACTOR, :] = line_color
+    pixels[scaled_height - 1, :] = line_color
+    pixels[:scaled_height, 0:scaled_width:SCALE_FACTOR] = line_color
+    pixels[:scaled_height, scaled_width - 1] = line_color
 
-    # Horizontal lines
-    for k_h in range(orig_height + 1):
-        y = k_h * SCALE_FACTOR
-        draw.line([(0, y), (scaled_width - 1, y)], fill=line_color, width=1)
-    draw.line(
-        [(0, scaled_height - 1), (scaled_width - 1, scaled_height - 1)],
-        fill=line_color,
-        width=1,
-    )
+    # The row and column numbers only depend on the grid size
+    margins = label_margins(orig_height, orig_width)
+    pixels[:SCALE_FACTOR] = margins[:SCALE_FACTOR]
+    pixels[:scaled_height, :SCALE_FACTOR] = margins[:, :SCALE_FACTOR]
+
+    img = Image.fromarray(pixels)
+    draw = ImageDraw.Draw(img)
+
+    # Draw highlights
+    if with_highlights:
+        add_highlight(
+            draw,
+            ((2, 2), (47, 5)),
+            "Health",
+        )
+        add_highlight(
+            draw,
+            ((52, 1), (64, 5)),
+            "Lives",
+        )
 
-    # Vertical lines
-    for k_v in range(orig_width + 1):
-        x = k_v * SCALE_FACTOR
-        draw.line([(x, 0), (x, scaled_height - 1)], fill=line_color, width=1)
-    draw.line(
-        [(scaled_width - 1, 0), (scaled_width - 1, scaled_height - 1)],
-        fill=line_color,
-        width=1,
+        for label, (x, y) in find_landmarks(np_array):
+            add_highlight(draw, ((x + 1, y + 1), (x + 9, y + 9)), label)
+
+        add_highlight(draw, ((2, 55), (11, 64)), "Key")
+
+    return img
+
+
+def encode_frame(img: Image.Image, description: str) -> str:
+    """
+    Adds the description below a drawn frame and encodes it as a base64 PNG.
+    """
+
+    # Add description text at the bottom, leaving `img` as it was
+    img = img.copy()
+    draw = ImageDraw.Draw(img)
+    description_height = 40
+    scaled_width, scaled_height = img.width, img.height - description_height
+    description_y = scaled_height + (description_height / 2)
+    draw.text(
+        (scaled_width / 2, description_y),
+        description,
+        font=get_font(),
+        fill=(255, 255, 255),
+        anchor="mm",
     )
 
-    font = ImageFont.load_default()
+    # Convert image to base64
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+    return img_str
+
+
+@lru_cache(maxsize=8)
+def label_margins(orig_height: int, orig_width: int) -> np.ndarray:
+    """
+    The grid lines and the row and column numbers of a grid of this size.
+
+    Only the top and left margins (one cell wide) are meant to be copied out.
+    """
+    scaled_width = (orig_width + 1) * SCALE_FACTOR
+    scaled_height = (orig_height + 1) * SCALE_FACTOR
+    pixels = np.zeros((scaled_height, scaled_width, 3), np.uint8)
+    line_color = (128, 128, 128)  # Gray
+    pixels[0:scaled_height:SCALE_FACTOR, :] = line_color
+    pixels[scaled_height - 1, :] = line_color
+    pixels[:, 0:scaled_width:SCALE_FACTOR] = line_color
+    pixels[:, scaled_width - 1] = line_color
+
+    img = Image.fromarray(pixels)
+    draw = ImageDraw.Draw(img)
+    font = get_font()
     text_color = (255, 255, 255)
 
     # Draw column numbers
@@ -151,73 +221,201 @@ def render_frame(
             anchor="mm",
         )
 
-    # Draw highlights
-    if with_highlights:
-        add_highlight(
-            draw,
-            ((2, 2), (47, 5)),
-            "Health",
-        )
-        add_highlight(
-            draw,
-            ((52, 1), (64, 5)),
-            "Lives",
-        )
+    margins = np.asarray(img)
+    margins.flags.writeable = False
+    return margins
 
-        found_player = False
-        found_door = False
-        found_rotator = False
-        for y in range(orig_height):
-            if found_player and found_door and found_rotator:
-                break
-            for x in range(orig_width):
-                if np_array[y, x] == 12 and not found_player:
-                    found_player = True
-                    add_highlight(
-                        draw,
-                        ((x + 1, y + 1), (x + 9, y + 9)),
-                        "Player",
-                    )
-                    break
-                if np_array[y, x] == 5 and not found_door:
-                    found_door = True
-                    add_highlight(
-                        draw,
-                        ((x + 1, y + 1), (x + 9, y + 9)),
-                        "Door",
-                    )
-                    break
-                if (
-                    np_array[y, x] == 9
-                    and np_array[y - 1, x] == 3
-                    and not found_rotator
-                ):
-                    found_rotator = True
-                    add_highlight(
-                        draw,
-                        ((x + 1, y + 1), (x + 9, y + 9)),
-                        "Rotator",
-                    )
-                    break
 
-        add_highlight(draw, ((2, 55), (11, 64)), "Key")
+class RenderCache:
+    """
+    LRU cache of rendered frames, keyed by a hash of the final grid.
 
-    # Add description text at the bottom
-    description_y = scaled_height + (description_height / 2)
-    draw.text(
-        (scaled_width / 2, description_y),
-        description,
-        font=font,
-        fill=text_color,
-        anchor="mm",
+    Nodes render the same frame several times per step (and again as the
+    previous frame in the next step), often with another description. Both
+    the drawn frame and the encoded PNG are kept, so a new description only
+    costs the text and the PNG encoding.
+    """
+
+    def __init__(self, maxsize: int = 16) -> None:
+        self.maxsize = maxsize
+        self.hits = self.partial_hits = self.misses = 0
+        self._drawn: OrderedDict[tuple[bytes, bool], Image.Image] = OrderedDict()
+        self._encoded: OrderedDict[tuple[bytes, bool, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(array_3d: list[list[list[int]]]) -> bytes:
+        grid = np.asarray(array_3d[-1], dtype=np.uint8)
+        digest = hashlib.blake2b(grid.tobytes(), digest_size=16)
+        digest.update(str(grid.shape).encode())
+        return digest.digest()
+
+    def render(
+        self,
+        array_3d: list[list[list[int]]],
+        description: str,
+        with_highlights: bool = True,
+    ) -> str:
+        """`render_frame`, reusing earlier renders of the same grid."""
+        grid_key = self.key(array_3d)
+        with self._lock:
+            encoded = self._get(self._encoded, (grid_key, with_highlights, description))
+            drawn = self._get(self._drawn, (grid_key, with_highlights))
+            if encoded is not None:
+                self.hits += 1
+                return encoded
+            if drawn is not None:
+                self.partial_hits += 1
+            else:
+                self.misses += 1
+        if drawn is None:
+            drawn = draw_frame(array_3d, with_highlights)
+        encoded = encode_frame(drawn, description)
+        with self._lock:
+            self._put(self._drawn, (grid_key, with_highlights), drawn)
+            self._put(self._encoded, (grid_key, with_highlights, description), encoded)
+        return encoded
+
+    def draw(
+        self, array_3d: list[list[list[int]]], with_highlights: bool = True
+    ) -> Image.Image:
+        """`draw_frame`, reusing earlier drawings of the same grid.
+
+        The image is shared with later lookups, so callers must not draw on it.
+        """
+        key = (self.key(array_3d), with_highlights)
+        with self._lock:
+            drawn = self._get(self._drawn, key)
+            if drawn is not None:
+                self.hits += 1
+                return drawn
+            self.misses += 1
+        drawn = draw_frame(array_3d, with_highlights)
+        with self._lock:
+            self._put(self._drawn, key, drawn)
+        return drawn
+
+    def _get(self, cache: "OrderedDict[Any, T]", key: Any) -> Optional[T]:
+        if key not in cache:
+            return None
+        cache.move_to_end(key)
+        return cache[key]
+
+    def _put(self, cache: "OrderedDict[Any, T]", key: Any, value: T) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.maxsize:
+            cache.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.partial_hits + self.misses
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.partial_hits) / lookups, 3)
+            if lookups
+            else 0.0,
+            "entries": len(self._encoded),
+        }
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """The render cache in the current graph run's configurable settings."""
+    try:
+        cache = get_config().get("configurable", {}).get("render_cache")
+    except RuntimeError:  # called outside of a graph run
+        cache = None
+    return cache if isinstance(cache, RenderCache) else None
+
+
+def render_cached(
+    array_3d: list[list[list[int]]], description: str, with_highlights: bool = True
+) -> str:
+    """
+    Renders a game frame through the run's render cache, if it has one.
+    """
+
+    cache = get_render_cache()
+    if cache is None:
+        return render_frame(array_3d, description, with_highlights)
+    return cache.render(array_3d, description, with_highlights)
+
+
+def draw_cached(
+    array_3d: list[list[list[int]]], with_highlights: bool = True
+) -> Image.Image:
+    """
+    Draws a game frame (without a description) through the run's render cache.
+    """
+
+    cache = get_render_cache()
+    if cache is None:
+        return draw_frame(array_3d, with_highlights)
+    return cache.draw(array_3d, with_highlights)
+
+
+def diff_overlay_enabled() -> bool:
+    """Whether the current graph run shows changes on one frame, not two frames."""
+    try:
+        return bool(get_config().get("configurable", {}).get("diff_overlay"))
+    except RuntimeError:  # called outside of a graph run
+        return False
+
+
+def render_changes(
+    array_3d: list[list[list[int]]],
+    previous_3d: list[list[list[int]]],
+    description: str,
+    with_highlights: bool = True,
+) -> str:
+    """
+    Renders a game frame with the cells changed since `previous_3d` outlined.
+    """
+
+    overlaid = overlay_changes(
+        draw_cached(array_3d, with_highlights),
+        array_3d[-1],
+        previous_3d[-1],
+        PALETTE,
+        SCALE_FACTOR,
+        offset=SCALE_FACTOR,
     )
+    return encode_frame(overlaid, description)
 
-    # Convert image to base64
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
 
-    return img_str
+def find_landmarks(grid: np.ndarray) -> list[tuple[str, tuple[int, int]]]:
+    """
+    Finds the top-left cell of the player, the door and the rotator.
+
+    Rows are scanned top to bottom and each row yields at most one landmark,
+    the first cell from the left matching one not found yet.
+    """
+    masks = {
+        "Player": grid == 12,
+        "Door": grid == 5,
+        # a rotator cell has floor above it (the top row wraps to the bottom)
+        "Rotator": (grid == 9) & (np.roll(grid, 1, axis=0) == 3),
+    }
+    found: list[tuple[str, tuple[int, int]]] = []
+    row = 0
+    while masks and row < grid.shape[0]:
+        matches = np.argwhere(np.logical_or.reduce(list(masks.values()))[row:])
+        if not len(matches):
+            break
+        y, x = int(matches[0][0]) + row, int(matches[0][1])
+        label = next(name for name, mask in masks.items() if mask[y, x])
+        found.append((label, (x, y)))
+        del masks[label]
+        row = y + 1
+    return found
+
+
+@lru_cache(maxsize=None)
+def get_font(
+    size: Optional[float] = None,
+) -> ImageFont.ImageFont | ImageFont.FreeTypeFont:
+    return ImageFont.load_default(size=size)
 
 
 def add_highlight(
@@ -249,7 +447,7 @@ def add_highlight(
     draw.text(
         ((x1 + x2) / 2 * SCALE_FACTOR, (y2 + 1) * SCALE_FACTOR),
         label,
-        font=ImageFont.load_default(size=16),
+        font=get_font(16),
         fill=(255, 255, 255),
         anchor="mm",
     )
@@ -1,24 +1,23 @@
 """Uses LangGraph's functional API to build an agent."""
 
-import base64
-import io
 import json
 import logging
 import uuid
 from typing import Any, TypedDict, TypeVar, cast
 
 import langsmith as ls
-import PIL
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.func import entrypoint
 from langgraph.pregel import Pregel
 from langsmith.schemas import Attachment
-from openai import OpenAI
-from openai.types.chat import ChatCompletionMessage
+from openai.types.chat import ChatCompletion, ChatCompletionMessage
 
 from agents.templates.llm_agents import LLM
 
 from ..agent import Agent
+from ..bursts import summarize_burst
+from ..inference import ChatBackend, get_backend
+from ..rendering import render_grids
 from ..structs import FrameData, GameAction
 
 logger = logging.getLogger(__name__)
@@ -49,10 +48,11 @@ def build_agent(
     tools: list[dict[str, Any]] = [],
     reasoning_effort: str | None = None,
     as_image: bool = True,
+    backend: ChatBackend | None = None,
 ) -> Pregel[State, entrypoint.final[ChatCompletionMessage, State]]:
     """Define the agent logic."""
     # Modify this code to add things like reasoning, planning, etc.
-    openai_client = OpenAI()
+    chat_backend = backend or get_backend()
     model_kwargs = {"reasoning_effort": reasoning_effort} if reasoning_effort else {}
 
     @ls.traceable(run_type="prompt")  # type: ignore[misc]
@@ -89,8 +89,8 @@ def build_agent(
         tools: list[dict[str, Any]],
         tool_choice: str = "required",
         **kwargs: Any,
-    ) -> ChatCompletionMessage:
-        return openai_client.chat.completions.create(
+    ) -> ChatCompletion:
+        return chat_backend.create(
             model=model,
             messages=messages,
             tools=tools,
@@ -102,7 +102,8 @@ def build_agent(
     def agent(
         state: State, *, previous: list[dict[str, Any]] | None = None
     ) -> entrypoint.final[ChatCompletionMessage, State]:
-        # TODO: handle the frame bursts; explore + learn
+        # frame bursts are collapsed to their final grid in format_frame
+        # TODO: explore + learn
         # kinda funny bcs this is really just an llm call rn :)
         sys_messages, *convo = prompt(state["latest_frame"], previous or [])
         response = llm(
@@ -138,6 +139,7 @@ class LangGraphFunc(LLM, Agent):
             tools=self.build_tools(),
             reasoning_effort=self.REASONING_EFFORT,
             as_image=self.USE_IMAGE,
+            backend=self.backend,
         )
 
     @ls.traceable  # type: ignore[misc]
@@ -178,27 +180,24 @@ class LangGraphTextOnly(LangGraphFunc, Agent):
 
 
 def format_frame(latest_frame: FrameData, as_image: bool) -> list[dict[str, Any]]:
-    img = g2im(latest_frame.frame) if latest_frame.frame else None
-    if as_image and img:
+    # only the final grid of a burst is shown, the motion before it is summarized
+    burst = summarize_burst(latest_frame.frame)
+    if as_image and latest_frame.frame:
         frame_block = {
             "type": "image_url",
-            "image_url": {
-                "url": f"data:image/png;base64,{base64.b64encode(img).decode('ascii')}",
-            },
+            "image_url": {"url": render_grids([burst.final]).data_url},
         }
     else:
-        if (rt := ls.get_current_run_tree()) and img:
+        if latest_frame.frame and (rt := ls.get_current_run_tree()):
             # Save as an attachment so you can easily view while you develop
             rt.attachments["frame"] = Attachment(
                 mime_type="image/png",
-                data=img,
+                data=render_grids([burst.final]).png,
             )
-        lines = []
-        for i, block in enumerate(latest_frame.frame):
-            lines.append(f"Grid {i}:")
-            for row in block:
-                lines.append(f"  {row}")
-            lines.append("")
+        lines = [f"Grid {len(latest_frame.frame) - 1}:"]
+        for row in burst.final:
+            lines.append(f"  {row}")
+        lines.append("")
         frame_block = {"type": "text", "text": "\n".join(lines)}
     return [
         {
@@ -210,7 +209,7 @@ def format_frame(latest_frame: FrameData, as_image: bool) -> list[dict[str, Any]
 {latest_frame.score}
 
 # Frame:
-""",
+{burst.describe()}""",
         },
         frame_block,
         {
@@ -220,42 +219,3 @@ def format_frame(latest_frame: FrameData, as_image: bool) -> list[dict[str, Any]
 Reply with a few sentences of plain-text strategy observation about the frame to inform your next action.""",
         },
     ]
-
-
-def g2im(g: list[list[list[int]]]) -> bytes:
-    C = [
-        (0, 0, 0),
-        (0, 0, 170),
-        (0, 170, 0),
-        (0, 170, 170),
-        (170, 0, 0),
-        (170, 0, 170),
-        (170, 85, 0),
-        (170, 170, 170),
-        (85, 85, 85),
-        (85, 85, 255),
-        (85, 255, 85),
-        (85, 255, 255),
-        (255, 85, 85),
-        (255, 85, 255),
-        (255, 255, 85),
-        (255, 255, 255),
-    ]
-
-    h, w = len(g[0]), len(g[0][0])
-    good = [block for block in g if len(block) == h and len(block[0]) == w]
-    n = len(good)
-    s = 5 * (n > 1)
-    W = w * n + s * (n - 1)
-
-    im = PIL.Image.new("RGB", (W, h), "white")
-    px = im.load()
-    for i, block in enumerate(good):
-        ox = i * (w + s)
-        for y, row in enumerate(block):
-            for x, val in enumerate(row):
-                px[ox + x, y] = C[val & 15]
-
-    buf = io.BytesIO()
-    im.save(buf, "PNG")
-    return buf.getvalue()
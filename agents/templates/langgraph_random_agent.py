@@ -13,6 +13,7 @@ class RandomAgentState(TypedDict):
     """State for the LangGraph workflow."""
 
     latest_frame: FrameData
+    allowed_actions: list[GameAction]
 
 
 class RandomAgentOutput(TypedDict):
@@ -51,8 +52,10 @@ class LangGraphRandom(Agent):
                 action = GameAction.RESET
                 action.reasoning = "Game not started or over - need to reset"
             else:
-                # Choose a random action that isn't reset
-                available_actions = [a for a in GameAction if a is not GameAction.RESET]
+                # Choose a random action that isn't reset or known to do nothing here
+                available_actions = [
+                    a for a in state["allowed_actions"] if a is not GameAction.RESET
+                ]
                 action = random.choice(available_actions)
 
                 if action.is_simple():
@@ -103,7 +106,12 @@ class LangGraphRandom(Agent):
         # Prepare state for the graph
         initial_state: RandomAgentState = {
             "latest_frame": latest_frame,
+            "allowed_actions": self.action_mask.allowed(latest_frame),
         }
+        masked = self.action_mask.masked(latest_frame)
+        if probe := self.action_space.next_probe(exclude=masked):
+            # still discovering which actions this game responds to
+            initial_state["allowed_actions"] = [probe]
 
         # Execute the workflow
         output: RandomAgentOutput = self.workflow.invoke(initial_state)
@@ -2,12 +2,22 @@ import json
 import logging
 import os
 import textwrap
+import time
 from typing import Any, Optional
 
 import openai
-from openai import OpenAI as OpenAIClient
 
 from ..agent import Agent
+from ..bursts import summarize_burst
+from ..inference import (
+    ChatBackend,
+    DecisionCache,
+    LocalPolicy,
+    MeteredBackend,
+    ModelRouter,
+    ModelTier,
+    get_backend,
+)
 from ..structs import FrameData, GameAction, GameState
 
 logger = logging.getLogger()
@@ -23,8 +33,22 @@ class LLM(Agent):
 
     MESSAGE_LIMIT: int = 10
     MODEL: str = "gpt-4o-mini"
+    # set FAST_MODEL to route routine turns to a cheaper model, see ModelRouter
+    FAST_MODEL: Optional[str] = None
+    FAST_REASONING_EFFORT: Optional[str] = None
+    # set to reuse earlier decisions for repeated states, see DecisionCache
+    DECISION_CACHE_SIMILARITY: Optional[float] = None
+    # path to a policy distilled from recordings, see inference/local_policy.py
+    LOCAL_POLICY: Optional[str] = None
+    LOCAL_POLICY_CONFIDENCE: float = 0.8
     messages: list[dict[str, Any]]
     token_counter: int
+    backend: ChatBackend
+    router: Optional[ModelRouter]
+    decision_cache: Optional[DecisionCache]
+    local_policy: Optional[LocalPolicy]
+    local_decisions: int
+    model_decisions: int
 
     _latest_tool_call_id: str = "call_12345"
 
@@ -32,6 +56,36 @@ class LLM(Agent):
         super().__init__(*args, **kwargs)
         self.messages = []
         self.token_counter = 0
+        self.backend = MeteredBackend(get_backend(), self.usage)
+        self.router = None
+        if self.FAST_MODEL:
+            self.router = ModelRouter(
+                strong=ModelTier(
+                    model=self.MODEL, reasoning_effort=self.REASONING_EFFORT
+                ),
+                fast=ModelTier(
+                    model=self.FAST_MODEL, reasoning_effort=self.FAST_REASONING_EFFORT
+                ),
+            )
+        similarity = os.getenv("LLM_DECISION_CACHE_SIMILARITY")
+        if similarity is not None:
+            self.DECISION_CACHE_SIMILARITY = (
+                None if similarity.lower() == "off" else float(similarity)
+            )
+        self.decision_cache = None
+        if self.DECISION_CACHE_SIMILARITY is not None:
+            self.decision_cache = DecisionCache(
+                similarity=self.DECISION_CACHE_SIMILARITY
+            )
+        self.LOCAL_POLICY = os.getenv("LLM_LOCAL_POLICY", self.LOCAL_POLICY)
+        self.LOCAL_POLICY_CONFIDENCE = float(
+            os.getenv("LLM_LOCAL_POLICY_CONFIDENCE", self.LOCAL_POLICY_CONFIDENCE)
+        )
+        self.local_policy = (
+            LocalPolicy.load(self.LOCAL_POLICY) if self.LOCAL_POLICY else None
+        )
+        self.local_decisions = 0
+        self.model_decisions = 0
 
     @property
     def name(self) -> str:
@@ -60,8 +114,6 @@ class LLM(Agent):
         logging.getLogger("openai").setLevel(logging.CRITICAL)
         logging.getLogger("httpx").setLevel(logging.CRITICAL)
 
-        client = OpenAIClient(api_key=os.environ.get("OPENAI_API_KEY", ""))
-
         functions = self.build_functions()
         tools = self.build_tools()
 
@@ -71,26 +123,7 @@ class LLM(Agent):
             user_prompt = self.build_user_prompt(latest_frame)
             message0 = {"role": "user", "content": user_prompt}
             self.push_message(message0)
-            if self.MODEL_REQUIRES_TOOLS:
-                message1 = {
-                    "role": "assistant",
-                    "tool_calls": [
-                        {
-                            "id": self._latest_tool_call_id,
-                            "type": "function",
-                            "function": {
-                                "name": GameAction.RESET.name,
-                                "arguments": json.dumps({}),
-                            },
-                        }
-                    ],
-                }
-            else:
-                message1 = {
-                    "role": "assistant",
-                    "function_call": {"name": "RESET", "arguments": json.dumps({})},  # type: ignore
-                }
-            self.push_message(message1)
+            self.push_action_message(GameAction.RESET.name, {})
             action = GameAction.RESET
             return action
 
@@ -112,16 +145,43 @@ class LLM(Agent):
             }
         self.push_message(message2)
 
+        forced = self.action_mask.forced(latest_frame)
+        if forced is not None:
+            logger.info(f"Taking forced {forced.name} without asking the model")
+            self.push_action_message(forced.name, {})
+            return forced
+
+        masked = {a.name for a in self.action_mask.masked(latest_frame)}
+        cached = self.decision_cache.lookup(frames) if self.decision_cache else None
+        if cached is not None and cached.action not in masked:
+            logger.info(f"Reusing cached decision {cached.action} {cached.data}")
+            self.push_action_message(cached.action, cached.data)
+            action = GameAction.from_name(cached.action)
+            action.set_data(cached.data)
+            return action
+
+        if self.local_policy is not None:
+            action, data, confidence = self.local_policy.predict(latest_frame)
+            if confidence >= self.LOCAL_POLICY_CONFIDENCE and action.name not in masked:
+                logger.info(f"Local policy chose {action.name} ({confidence:.2f})")
+                self.local_decisions += 1
+                self.push_action_message(action.name, data)
+                action.set_data(data)
+                return action
+        self.model_decisions += 1
+
+        tier = self.route_turn(frames)
+
         if self.DO_OBSERVATION:
             logger.info("Sending to Assistant for observation...")
             try:
                 create_kwargs = {
-                    "model": self.MODEL,
+                    "model": tier.model,
                     "messages": self.messages,
                 }
-                if self.REASONING_EFFORT is not None:
-                    create_kwargs["reasoning_effort"] = self.REASONING_EFFORT
-                response = client.chat.completions.create(**create_kwargs)
+                if tier.reasoning_effort is not None:
+                    create_kwargs["reasoning_effort"] = tier.reasoning_effort
+                response = self.create_completion(**create_kwargs)
             except openai.BadRequestError as e:
                 logger.info(f"Message dump: {self.messages}")
                 raise e
@@ -148,14 +208,14 @@ class LLM(Agent):
             logger.info("Sending to Assistant for action...")
             try:
                 create_kwargs = {
-                    "model": self.MODEL,
+                    "model": tier.model,
                     "messages": self.messages,
                     "tools": tools,
                     "tool_choice": "required",
                 }
-                if self.REASONING_EFFORT is not None:
-                    create_kwargs["reasoning_effort"] = self.REASONING_EFFORT
-                response = client.chat.completions.create(**create_kwargs)
+                if tier.reasoning_effort is not None:
+                    create_kwargs["reasoning_effort"] = tier.reasoning_effort
+                response = self.create_completion(**create_kwargs)
             except openai.BadRequestError as e:
                 logger.info(f"Message dump: {self.messages}")
                 raise e
@@ -186,14 +246,14 @@ class LLM(Agent):
             logger.info("Sending to Assistant for action...")
             try:
                 create_kwargs = {
-                    "model": self.MODEL,
+                    "model": tier.model,
                     "messages": self.messages,
                     "functions": functions,
                     "function_call": "auto",
                 }
-                if self.REASONING_EFFORT is not None:
-                    create_kwargs["reasoning_effort"] = self.REASONING_EFFORT
-                response = client.chat.completions.create(**create_kwargs)
+                if tier.reasoning_effort is not None:
+                    create_kwargs["reasoning_effort"] = tier.reasoning_effort
+                response = self.create_completion(**create_kwargs)
             except openai.BadRequestError as e:
                 logger.info(f"Message dump: {self.messages}")
                 raise e
@@ -218,8 +278,59 @@ class LLM(Agent):
 
         action = GameAction.from_name(action_id)
         action.set_data(data)
+        if self.decision_cache is not None:
+            self.decision_cache.store(frames, action.name, data)
         return action
 
+    def push_action_message(self, name: str, data: dict[str, Any]) -> None:
+        """Push an assistant message calling an action the LLM did not pick this turn."""
+        if self.MODEL_REQUIRES_TOOLS:
+            # each call needs its own id for the tool response that follows
+            self._latest_tool_call_id = f"call_local_{self.action_counter}"
+            message: dict[str, Any] = {
+                "role": "assistant",
+                "tool_calls": [
+                    {
+                        "id": self._latest_tool_call_id,
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(data)},
+                    }
+                ],
+            }
+        else:
+            message = {
+                "role": "assistant",
+                "function_call": {"name": name, "arguments": json.dumps(data)},
+            }
+        self.push_message(message)
+
+    def route_turn(self, frames: list[FrameData]) -> ModelTier:
+        """Pick the model (and reasoning effort) for this turn."""
+        if self.router is None:
+            return ModelTier(model=self.MODEL, reasoning_effort=self.REASONING_EFFORT)
+        signals = self.router.signals(frames, self.action_counter, self.MAX_ACTIONS)
+        return self.router.route(signals)
+
+    def create_completion(self, **kwargs: Any) -> Any:
+        """Send one chat completion request to the agent's backend."""
+        start = time.monotonic()
+        response = self.backend.create(**kwargs)
+        if self.router is not None:
+            usage = getattr(response, "usage", None)
+            self.router.record(
+                ModelTier(
+                    model=kwargs["model"],
+                    reasoning_effort=kwargs.get("reasoning_effort"),
+                ),
+                usage.total_tokens if usage else 0,
+                time.monotonic() - start,
+            )
+        self.capture_reasoning_from_response(response)
+        return response
+
+    def capture_reasoning_from_response(self, response: Any) -> None:
+        """Called with every response, for agents that report reasoning tokens."""
+
     def track_tokens(self, tokens: int, message: str = "") -> None:
         self.token_counter += tokens
         if hasattr(self, "recorder") and not self.is_playback:
@@ -317,7 +428,9 @@ class LLM(Agent):
                 },
             },
         ]
-        return functions
+        # only offer actions that can still do something
+        masked = {a.name for a in self.action_mask.noop_actions(self.frames[-1])}
+        return [f for f in functions if f["name"] not in masked]
 
     def build_tools(self) -> list[dict[str, Any]]:
         """Support models that expect tool_call format."""
@@ -376,18 +489,21 @@ Call exactly one action.
         )
 
     def pretty_print_3d(self, array_3d: list[list[list[Any]]]) -> str:
-        lines = []
-        for i, block in enumerate(array_3d):
-            lines.append(f"Grid {i}:")
-            for row in block:
-                lines.append(f"  {row}")
-            lines.append("")
+        """The final grid of the frame, with any animation before it summarized."""
+        if not array_3d:
+            return ""
+        burst = summarize_burst(array_3d)
+        lines = [burst.describe()] if burst.is_burst else []
+        lines.append(f"Grid {len(array_3d) - 1}:")
+        for row in burst.final:
+            lines.append(f"  {row}")
+        lines.append("")
         return "\n".join(lines)
 
     def cleanup(self, *args: Any, **kwargs: Any) -> None:
         if self._cleanup:
             if hasattr(self, "recorder") and not self.is_playback:
-                meta = {
+                meta: dict[str, Any] = {
                     "llm_user_prompt": self.build_user_prompt(self.frames[-1]),
                     "llm_tools": self.build_tools()
                     if self.MODEL_REQUIRES_TOOLS
@@ -396,7 +512,23 @@ Call exactly one action.
                         self.frames[-1]
                     ),
                 }
+                if self.router is not None:
+                    meta["llm_router"] = self.router.report()
+                if self.decision_cache is not None:
+                    meta["llm_decision_cache"] = self.decision_cache.report()
+                meta["action_mask"] = self.action_mask.report()
+                if self.local_policy is not None:
+                    meta["llm_local_policy"] = {
+                        "local_decisions": self.local_decisions,
+                        "model_decisions": self.model_decisions,
+                    }
                 self.recorder.record(meta)
+            if self.router is not None:
+                logger.info(f"{self.game_id} - model routing: {self.router.report()}")
+            if self.decision_cache is not None:
+                logger.info(
+                    f"{self.game_id} - decision cache: {self.decision_cache.report()}"
+                )
         super().cleanup(*args, **kwargs)
 
 
@@ -441,19 +573,17 @@ class ReasoningLLM(LLM, Agent):
         return action
 
     def track_tokens(self, tokens: int, message: str = "") -> None:
-        """Override to capture reasoning token information from reasoning models."""
+        """Override to keep the latest response content for the reasoning metadata."""
         super().track_tokens(tokens, message)
 
         # Store the response content for reasoning context (avoid empty or JSON strings)
         if message and not message.startswith("{"):
             self._last_response_content = message
-        self._last_reasoning_tokens = tokens
-        self._total_reasoning_tokens += tokens
 
     def capture_reasoning_from_response(self, response: Any) -> None:
         """Helper method to capture reasoning tokens from OpenAI API response.
 
-        This should be called from the parent class if we have access to the raw response.
+        Called by `create_completion` for every response.
         For reasoning models, reasoning tokens are in response.usage.completion_tokens_details.reasoning_tokens
         """
         if hasattr(response, "usage") and hasattr(
@@ -461,7 +591,7 @@ class ReasoningLLM(LLM, Agent):
         ):
             if hasattr(response.usage.completion_tokens_details, "reasoning_tokens"):
                 self._last_reasoning_tokens = (
-                    response.usage.completion_tokens_details.reasoning_tokens
+                    response.usage.completion_tokens_details.reasoning_tokens or 0
                 )
                 self._total_reasoning_tokens += self._last_reasoning_tokens
                 logger.debug(
@@ -516,11 +646,15 @@ class GuidedLLM(LLM, Agent):
 
         action = super().choose_action(frames, latest_frame)
 
+        tier = self.router.last_tier if self.router else None
+
         # Store reasoning metadata in the action.reasoning field
         action.reasoning = {
-            "model": self.MODEL,
+            "model": tier.model if tier else self.MODEL,
             "action_chosen": action.name,
-            "reasoning_effort": self.REASONING_EFFORT,
+            "reasoning_effort": tier.reasoning_effort
+            if tier
+            else self.REASONING_EFFORT,
             "reasoning_tokens": self._last_reasoning_tokens,
             "total_reasoning_tokens": self._total_reasoning_tokens,
             "game_context": {
@@ -539,19 +673,17 @@ class GuidedLLM(LLM, Agent):
         return action
 
     def track_tokens(self, tokens: int, message: str = "") -> None:
-        """Override to capture reasoning token information from o3 models."""
+        """Override to keep the latest response content for the reasoning metadata."""
         super().track_tokens(tokens, message)
 
         # Store the response content for reasoning context (avoid empty or JSON strings)
         if message and not message.startswith("{"):
             self._last_response_content = message
-        self._last_reasoning_tokens = tokens
-        self._total_reasoning_tokens += tokens
 
     def capture_reasoning_from_response(self, response: Any) -> None:
         """Helper method to capture reasoning tokens from OpenAI API response.
 
-        This should be called from the parent class if we have access to the raw response.
+        Called by `create_completion` for every response.
         For o3 models, reasoning tokens are in response.usage.completion_tokens_details.reasoning_tokens
         """
         if hasattr(response, "usage") and hasattr(
@@ -559,7 +691,7 @@ class GuidedLLM(LLM, Agent):
         ):
             if hasattr(response.usage.completion_tokens_details, "reasoning_tokens"):
                 self._last_reasoning_tokens = (
-                    response.usage.completion_tokens_details.reasoning_tokens
+                    response.usage.completion_tokens_details.reasoning_tokens or 0
                 )
                 self._total_reasoning_tokens += self._last_reasoning_tokens
                 logger.debug(
@@ -606,6 +738,13 @@ Call exactly one action.
         )
 
 
+class RoutedGuidedLLM(GuidedLLM, Agent):
+    """GuidedLLM that sends routine turns to a faster model, see ModelRouter."""
+
+    FAST_MODEL = "o4-mini"
+    FAST_REASONING_EFFORT = "low"
+
+
 # Example of a custom LLM agent
 class MyCustomLLM(LLM):
     """Template for creating your own custom LLM agent."""
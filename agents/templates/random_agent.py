@@ -38,9 +38,20 @@ class Random(Agent):
             # if game is not started (at init or after GAME_OVER) we need to reset
             # add a small delay before resetting after GAME_OVER to avoid timeout
             action = GameAction.RESET
+        elif probe := self.action_space.next_probe(
+            exclude=self.action_mask.masked(latest_frame)
+        ):
+            # still discovering which actions this game responds to
+            action = probe
         else:
-            # else choose a random action that isnt reset
-            action = random.choice([a for a in GameAction if a is not GameAction.RESET])
+            # else choose a random action that isnt reset or known to do nothing here
+            action = random.choice(
+                [
+                    a
+                    for a in self.action_mask.allowed(latest_frame)
+                    if a is not GameAction.RESET
+                ]
+            )
 
         if action.is_simple():
             action.reasoning = f"RNG told me to pick {action.value}"
@@ -1,20 +1,48 @@
-import base64
-import io
 import json
 import logging
 import textwrap
-from typing import Any, Dict, List, Literal
+from typing import Any, Dict, List, Literal, Optional
 
-from openai import OpenAI
-from PIL import Image, ImageDraw, ImageFont
 from pydantic import BaseModel, Field
 
+from ..rendering import (
+    CHANGES_CAPTION,
+    GridImage,
+    Palette,
+    overlay_changes,
+    render_zones,
+)
+from ..roi import Region, find_region, overview, roi_enabled, roi_images
 from ..structs import FrameData, GameAction
 from .llm_agents import ReasoningLLM
 
 logger = logging.getLogger(__name__)
 
 
+# Color mapping for grid cells, unknown values are drawn as floor
+KEY_PALETTE = Palette(
+    [
+        "#FFFFFF",
+        "#CCCCCC",
+        "#999999",
+        "#666666",
+        "#333333",
+        "#000000",
+        "#E53AA3",
+        "#FF7BCC",
+        "#F93C31",
+        "#1E93FF",
+        "#88D8F1",
+        "#FFDC00",
+        "#FF851B",
+        "#921231",
+        "#4FCC30",
+        "#A356D6",
+    ],
+    default="#888888",
+)
+
+
 class ReasoningActionResponse(BaseModel):
     """Action response structure for reasoning agent."""
 
@@ -50,112 +78,80 @@ class ReasoningAgent(ReasoningLLM):
     MESSAGE_LIMIT = 5
     REASONING_EFFORT = "high"
     ZONE_SIZE = 16
+    # 12 pixel cells make a 768x768 image for a 64x64 grid, the size the API
+    # scales larger `detail: high` images down to, for the same image tokens
+    CELL_SIZE = 12
+    # palette PNGs are several times smaller and faster to encode
+    PALETTE_PNG = True
+    # earlier screens shown next to the current one
+    PREVIOUS_SCREENS = 1
+    # send a close-up of what changed plus low-detail overviews, see agents.roi
+    ROI_IMAGES = True
+    # the top rows hold the health, energy and lives bars
+    HUD_ROWS = 4
+    # outline the changes on the current screen instead of showing earlier ones
+    DIFF_OVERLAY = False
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self.history: List[ReasoningActionResponse] = []
-        self.screen_history: List[bytes] = []
-        self.max_screen_history = 10  # Limit screen history to prevent memory leak
-        self.client = OpenAI()
+        # data URLs of the screens sent so far, only as many as the prompt shows
+        self.screen_history: List[str] = []
+        self.screen_level = 0
 
     def clear_history(self) -> None:
         """Clear all history when transitioning between levels."""
         self.history = []
         self.screen_history = []
 
+    def release_screens(self, latest_frame: FrameData) -> None:
+        """Forget the screens of earlier levels, they show another map."""
+        if latest_frame.score != self.screen_level:
+            self.screen_level = latest_frame.score
+            self.screen_history = []
+
+    def remember_screen(self, screen: str) -> None:
+        """Keep `screen` for as many prompts as it will be shown in."""
+        if self.PREVIOUS_SCREENS:
+            self.screen_history.append(screen)
+            del self.screen_history[: -self.PREVIOUS_SCREENS]
+        else:
+            self.screen_history.clear()
+
+    def render_screen(
+        self, grid: List[List[int]], cell_size: Optional[int] = None
+    ) -> GridImage:
+        """The grid with colored cells and zone coordinates."""
+        return render_zones(
+            grid,
+            KEY_PALETTE,
+            cell_size=cell_size or self.CELL_SIZE,
+            zone_size=self.ZONE_SIZE,
+            palette_mode=self.PALETTE_PNG,
+        )
+
     def generate_grid_image_with_zone(
-        self, grid: List[List[int]], cell_size: int = 40
+        self, grid: List[List[int]], cell_size: Optional[int] = None
     ) -> bytes:
         """Generate PIL image of the grid with colored cells and zone coordinates."""
-        if not grid or not grid[0]:
-            # Create empty image
-            img = Image.new("RGB", (200, 200), color="black")
-            buffer = io.BytesIO()
-            img.save(buffer, format="PNG")
-            return buffer.getvalue()
-
-        height = len(grid)
-        width = len(grid[0])
-
-        # Create image
-        img = Image.new("RGB", (width * cell_size, height * cell_size), color="white")
-        draw = ImageDraw.Draw(img)
-
-        # Color mapping for grid cells
-        key_colors = {
-            0: "#FFFFFF",
-            1: "#CCCCCC",
-            2: "#999999",
-            3: "#666666",
-            4: "#333333",
-            5: "#000000",
-            6: "#E53AA3",
-            7: "#FF7BCC",
-            8: "#F93C31",
-            9: "#1E93FF",
-            10: "#88D8F1",
-            11: "#FFDC00",
-            12: "#FF851B",
-            13: "#921231",
-            14: "#4FCC30",
-            15: "#A356D6",
-        }
-
-        # Draw grid cells
-        for y in range(height):
-            for x in range(width):
-                color = key_colors.get(grid[y][x], "#888888")  # default: floor
-
-                # Draw cell
-                draw.rectangle(
-                    [
-                        x * cell_size,
-                        y * cell_size,
-                        (x + 1) * cell_size,
-                        (y + 1) * cell_size,
-                    ],
-                    fill=color,
-                    outline="#000000",
-                    width=1,
-                )
-
-        # Draw zone coordinates and borders
-        for y in range(0, height, self.ZONE_SIZE):
-            for x in range(0, width, self.ZONE_SIZE):
-                # Draw zone coordinate label
-                try:
-                    font = ImageFont.load_default()
-                    zone_text = f"({x},{y})"
-                    draw.text(
-                        (x * cell_size + 2, y * cell_size + 2),
-                        zone_text,
-                        fill="#FFFFFF",
-                        font=font,
-                    )
-                except (ImportError, OSError) as e:
-                    logger.debug(f"Could not load font for zone labels: {e}")
-                except Exception as e:
-                    logger.error(f"Failed to draw zone label at ({x},{y}): {e}")
-
-                # Draw zone boundary
-                zone_width = min(self.ZONE_SIZE, width - x) * cell_size
-                zone_height = min(self.ZONE_SIZE, height - y) * cell_size
-                draw.rectangle(
-                    [
-                        x * cell_size,
-                        y * cell_size,
-                        x * cell_size + zone_width,
-                        y * cell_size + zone_height,
-                    ],
-                    fill=None,
-                    outline="#FFD700",  # gold border for zone
-                    width=2,
-                )
-
-        # Convert to bytes
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        return buffer.getvalue()
+        return self.render_screen(grid, cell_size).png
+
+    def previous_grid(self, latest_frame: FrameData) -> Optional[List[List[int]]]:
+        """The final grid of the frame before `latest_frame`, if on the same level."""
+        previous = self.frames[-2] if len(self.frames) > 1 else None
+        if previous is None or not previous.frame:
+            return None
+        return previous.frame[-1] if previous.score == latest_frame.score else None
+
+    def find_screen_region(self, latest_frame: FrameData) -> Optional[Region]:
+        """What of the current screen to show up close, None to show all of it."""
+        if not self.ROI_IMAGES or not roi_enabled() or not latest_frame.frame:
+            return None
+        return find_region(
+            latest_frame.frame[-1],
+            self.previous_grid(latest_frame),
+            hud_rows=self.HUD_ROWS,
+        )
 
     def build_functions(self) -> list[dict[str, Any]]:
         """Build JSON function description of game actions for LLM."""
@@ -165,6 +161,7 @@ class ReasoningAgent(ReasoningLLM):
         if "required" in schema:
             schema["required"].remove("name")
 
+        masked = self.action_mask.noop_actions(self.frames[-1])
         functions: list[dict[str, Any]] = [
             {
                 "name": action.name,
@@ -178,6 +175,7 @@ class ReasoningAgent(ReasoningLLM):
                 GameAction.ACTION4,
                 GameAction.RESET,
             ]
+            if action not in masked
         ]
         return functions
 
@@ -251,7 +249,7 @@ Hint:
         try:
             tools = self.build_tools()
 
-            response = self.client.chat.completions.create(
+            response = self.create_completion(
                 model=self.MODEL,
                 messages=messages,
                 tools=tools,
@@ -261,7 +259,6 @@ Hint:
             self.track_tokens(
                 response.usage.total_tokens, response.choices[0].message.content
             )
-            self.capture_reasoning_from_response(response)
 
             response_message = response.choices[0].message
             tool_calls = response_message.tool_calls
@@ -279,9 +276,31 @@ Hint:
 
     def define_next_action(self, latest_frame: FrameData) -> ReasoningActionResponse:
         """Define next action for the reasoning agent."""
-        # Generate map image
+        # Generate map image, encoded once for this prompt and the next ones
         current_grid = latest_frame.frame[-1] if latest_frame.frame else []
-        map_image = self.generate_grid_image_with_zone(current_grid)
+        map_image = self.render_screen(current_grid)
+        previous_grid = self.previous_grid(latest_frame)
+        overlaid = self.DIFF_OVERLAY and previous_grid is not None
+        if overlaid:
+            map_image = GridImage(
+                overlay_changes(
+                    map_image.image,
+                    current_grid,
+                    previous_grid,
+                    KEY_PALETTE,
+                    self.CELL_SIZE,
+                )
+            )
+        region = self.find_screen_region(latest_frame)
+        if region is None:
+            screens = [("", map_image, "high")]
+            current_screen, previous_detail = map_image, "high"
+        else:
+            screens = roi_images(map_image.image, region, self.CELL_SIZE)
+            # later prompts show this screen as an overview
+            current_screen, previous_detail = screens[0][1], "low"
+            if region.mode == "full":
+                current_screen = GridImage(overview(map_image.image))
 
         # Build messages
         system_prompt = self.build_user_prompt(latest_frame)
@@ -292,18 +311,18 @@ Hint:
         # Build user message with images
         user_message_content: List[Dict[str, Any]] = []
 
-        # Use the last screen from history as the 'previous_screen'
-        previous_screen = self.screen_history[-1] if self.screen_history else None
-
-        if previous_screen:
+        # Show the screens of the previous turns on this level, unless the
+        # current one outlines the changes
+        self.release_screens(latest_frame)
+        for previous_screen in [] if self.DIFF_OVERLAY else self.screen_history:
             user_message_content.extend(
                 [
                     {"type": "text", "text": "Previous screen:"},
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{base64.b64encode(previous_screen).decode()}",
-                            "detail": "high",
+                            "url": previous_screen,
+                            "detail": previous_detail,
                         },
                     },
                 ]
@@ -312,19 +331,21 @@ Hint:
         raw_grid_text = self.pretty_print_3d(latest_frame.frame)
         user_message_text = f"Your previous action was: {json.dumps(latest_action.model_dump() if latest_action else None, indent=2)}\n\nAttached are the visual screen and raw grid data.\n\nRaw Grid:\n{raw_grid_text}\n\nWhat should you do next?"
 
-        current_image_b64 = base64.b64encode(map_image).decode()
-        user_message_content.extend(
-            [
-                {"type": "text", "text": user_message_text},
+        user_message_content.append({"type": "text", "text": user_message_text})
+        if overlaid:
+            user_message_content.append({"type": "text", "text": CHANGES_CAPTION})
+        for caption, screen, detail in screens:
+            if caption:
+                user_message_content.append({"type": "text", "text": caption})
+            user_message_content.append(
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{current_image_b64}",
-                        "detail": "high",
+                        "url": screen.data_url,
+                        "detail": detail,
                     },
                 },
-            ]
-        )
+            )
 
         # Build messages
         messages: List[Dict[str, Any]] = [
@@ -336,9 +357,8 @@ Hint:
         result = self.call_llm_with_structured_output(messages)
 
         # Store current screen for next iteration (after using it)
-        self.screen_history.append(map_image)
-        if len(self.screen_history) > self.max_screen_history:
-            self.screen_history.pop(0)
+        if not self.DIFF_OVERLAY:
+            self.remember_screen(current_screen.data_url)
 
         return result
 
@@ -362,6 +382,18 @@ Hint:
             self.history.append(initial_response)
             return action
 
+        if self.action_mask.forced(latest_frame) is GameAction.RESET:
+            self.history.append(
+                ReasoningActionResponse(
+                    name="RESET",
+                    reason="The game is over, RESET is the only action that does anything.",
+                    short_description="Restart game",
+                    hypothesis=self.history[-1].hypothesis,
+                    aggregated_findings=self.history[-1].aggregated_findings,
+                )
+            )
+            return GameAction.RESET
+
         # Define the next action based on reasoning
         action_response = self.define_next_action(latest_frame)
         self.history.append(action_response)
@@ -1,10 +1,10 @@
 import logging
 import textwrap
 import time
-from typing import Any
+from typing import Any, Callable
 
-from PIL import Image
 from smolagents import (
+    AgentError,
     AgentImage,
     CodeAgent,
     OpenAIServerModel,
@@ -13,6 +13,8 @@ from smolagents import (
     tool,
 )
 
+from agents.inference import BackendClient, ChatBackend
+from agents.rendering import render_grids
 from agents.structs import FrameData, GameAction, GameState
 from agents.templates.llm_agents import LLM
 
@@ -21,6 +23,28 @@ from ..agent import Agent
 logger = logging.getLogger()
 
 
+class BackendServerModel(OpenAIServerModel):  # type: ignore[misc]
+    """An OpenAIServerModel that sends its requests to one of our LLM backends."""
+
+    def __init__(self, model_id: str, backend: ChatBackend, **kwargs: Any) -> None:
+        self.backend = backend
+        super().__init__(model_id, **kwargs)
+
+    def create_client(self) -> BackendClient:
+        return self.backend.client
+
+
+def budget_guard(game: Agent) -> Callable[[Any, Any], None]:
+    """A step callback that interrupts the smolagents run once the game is over its LLM budget."""
+
+    def check(step: Any, agent: Any) -> None:
+        if reason := game.usage.over_budget():
+            logger.warning(f"{game.game_id} - stopping, LLM budget exceeded: {reason}")
+            agent.interrupt()
+
+    return check
+
+
 class SmolCodingAgent(LLM, Agent):
     """An agent that uses CodeAgent from the smolagents library to play games."""
 
@@ -36,7 +60,7 @@ class SmolCodingAgent(LLM, Agent):
     def main(self) -> None:
         """The main function to initialize the agent and play the game until finished."""
         self.timer = time.time()
-        model = OpenAIServerModel(self.MODEL)
+        model = BackendServerModel(self.MODEL, backend=self.backend)
 
         # A CodeAgent calls and manipulates tools as Python functions which enables complex reasoning, algorithms etc.
         # Think BFS, DFS, A*, etc.
@@ -44,6 +68,7 @@ class SmolCodingAgent(LLM, Agent):
             model=model,
             planning_interval=10,
             tools=self.build_tools(),
+            step_callbacks=[budget_guard(self)],
             # Uncomment below to see the agent's raw outputs
             # verbosity_level=LogLevel.DEBUG,
         )
@@ -55,8 +80,12 @@ class SmolCodingAgent(LLM, Agent):
 
         # Start the agent
         prompt = self.build_initial_prompt(self.frames[-1])
-        response = agent.run(prompt, max_steps=self.MAX_ACTIONS)
-        print(response)
+        try:
+            response = agent.run(prompt, max_steps=self.MAX_ACTIONS)
+            print(response)
+        except AgentError:
+            if not self.usage.over_budget():
+                raise
 
         self.cleanup()
 
@@ -72,7 +101,11 @@ class SmolCodingAgent(LLM, Agent):
         """
 
         tools = []
+        # actions this game is known to ignore are left out of the toolbox
+        noops = self.action_mask.noop_actions(self.frames[-1])
         for action in GameAction:
+            if action in noops:
+                continue
             try:
                 tool = self.create_smolagents_tool(action)
                 tools.append(tool)
@@ -256,11 +289,12 @@ class SmolVisionAgent(LLM, Agent):
     def main(self) -> None:
         """The main agent loop. Play the game_id until finished, then exits."""
         self.timer = time.time()
-        model = OpenAIServerModel(self.MODEL)
+        model = BackendServerModel(self.MODEL, backend=self.backend)
 
         agent = ToolCallingAgent(
             model=model,
             tools=self.build_tools(),
+            step_callbacks=[budget_guard(self)],
             # Uncomment below to see the agent's raw outputs
             # verbosity_level=LogLevel.DEBUG,
             planning_interval=10,
@@ -273,8 +307,13 @@ class SmolVisionAgent(LLM, Agent):
 
         # Start the agent
         prompt = self.build_initial_prompt(self.frames[-1])
-        initial_image = self.grid_to_image(self.frames[-1].frame)
-        agent.run(prompt, max_steps=self.MAX_ACTIONS, images=[initial_image])
+        # only the final grid of an animation burst is the state to act on
+        initial_image = render_grids(self.frames[-1].frame[-1:]).image
+        try:
+            agent.run(prompt, max_steps=self.MAX_ACTIONS, images=[initial_image])
+        except AgentError:
+            if not self.usage.over_budget():
+                raise
         self.cleanup()
 
     def is_done(self, frames: list[FrameData], latest_frame: FrameData) -> bool:
@@ -288,7 +327,11 @@ class SmolVisionAgent(LLM, Agent):
             List of all game action tools
         """
         tools = []
+        # actions this game is known to ignore are left out of the toolbox
+        noops = self.action_mask.noop_actions(self.frames[-1])
         for action in GameAction:
+            if action in noops:
+                continue
             try:
                 tool = self.create_smolagents_tool(action)
                 tools.append(tool)
@@ -314,7 +357,7 @@ class SmolVisionAgent(LLM, Agent):
                 f"{self.game_id} - {action.name}: count {self.action_counter}, score {frame.score}, avg fps {self.fps})"
             )
 
-            image = self.grid_to_image(frame.frame)
+            image = render_grids(frame.frame[-1:]).image
 
             # Check if the game is won
             if self.is_done(self.frames, self.frames[-1]):
@@ -405,54 +448,6 @@ class SmolVisionAgent(LLM, Agent):
         else:
             raise ValueError(f"Unknown action type for {game_action.name}")
 
-    def grid_to_image(self, grid: list[list[list[int]]]) -> Image.Image:
-        """Converts a 3D grid of integers into an example PIL image, stacking grid layers horizontally."""
-        color_map = [
-            (0, 0, 0),
-            (0, 0, 170),
-            (0, 170, 0),
-            (0, 170, 170),
-            (170, 0, 0),
-            (170, 0, 170),
-            (170, 85, 0),
-            (170, 170, 170),
-            (85, 85, 85),
-            (85, 85, 255),
-            (85, 255, 85),
-            (85, 255, 255),
-            (255, 85, 85),
-            (255, 85, 255),
-            (255, 255, 85),
-            (255, 255, 255),
-        ]
-
-        height = len(grid[0])
-        width = len(grid[0][0])
-        num_layers = len(grid)
-
-        # Add a small separator between grids if there are multiple layers
-        separator_width = 5 if num_layers > 1 else 0
-        total_width = (width * num_layers) + (separator_width * (num_layers - 1))
-
-        image = Image.new("RGB", (total_width, height), "white")
-        pixels = image.load()
-
-        for i, grid_layer in enumerate(grid):
-            # Check if grid_layer is valid
-            if len(grid_layer) != height or len(grid_layer[0]) != width:
-                logger.warning(
-                    f"Skipping inconsistent grid layer {i} in grid_to_image."
-                )
-                continue
-
-            offset_x = i * (width + separator_width)
-            for y in range(height):
-                for x in range(width):
-                    color_index = grid_layer[y][x] % 16
-                    pixels[x + offset_x, y] = color_map[color_index]
-
-        return image
-
     def build_initial_prompt(self, latest_frame: FrameData) -> str:
         """Customize this method to provide instructions to the LLM."""
         return textwrap.dedent(
@@ -0,0 +1,123 @@
+import pytest
+
+from agents.action_space import ActionSpaceProfile
+from agents.structs import ActionInput, FrameData, GameAction, GameState
+from agents.templates.llm_agents import LLM
+from agents.templates.random_agent import Random
+
+A = [[1, 2], [3, 4]]
+B = [[2, 1], [3, 4]]
+
+
+def frame(grid, action=GameAction.ACTION1, score=0):
+    return FrameData(
+        frame=[grid],
+        state=GameState.NOT_FINISHED,
+        score=score,
+        action_input=ActionInput(id=action),
+    )
+
+
+def make_agent(cls):
+    return cls(
+        card_id="test-card",
+        game_id="test-game",
+        agent_name="test-agent",
+        ROOT_URL="https://example.com",
+        record=False,
+    )
+
+
+@pytest.fixture
+def action_space_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACTION_SPACE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.unit
+class TestActionSpaceProfile:
+    def test_discovery_classifies_actions(self):
+        profile = ActionSpaceProfile("game", min_tries=2)
+        for _ in range(2):
+            profile.observe(frame(A), frame(A, GameAction.ACTION5))
+        profile.observe(frame(A), frame(B, GameAction.ACTION1))
+        profile.observe(frame(A), frame(A, GameAction.ACTION6))
+
+        assert profile.ineffective() == {GameAction.ACTION5}
+        assert profile.is_effective(GameAction.ACTION1)
+        assert profile.undiscovered()[0] is not GameAction.ACTION6  # least tried first
+        assert GameAction.ACTION6 in profile.undiscovered()
+        assert profile.next_probe(exclude={GameAction.ACTION2}) is GameAction.ACTION3
+
+    def test_profile_round_trips_and_is_only_saved_when_changed(self, action_space_dir):
+        profile = ActionSpaceProfile("game", min_tries=1)
+        profile.save()
+        assert not list(action_space_dir.iterdir())
+
+        profile.observe(frame(A), frame(A, GameAction.ACTION5))
+        profile.observe(frame(A), frame(B, GameAction.ACTION2))
+        profile.save()
+        assert [p.name for p in action_space_dir.iterdir()] == ["game.actions.json"]
+
+        loaded = ActionSpaceProfile.load("game", min_tries=1)
+        assert loaded.is_effective(GameAction.ACTION2)
+        assert loaded.effects.get("ACTION5", 0) == 0
+
+    def test_clicks_are_never_ineffective(self):
+        profile = ActionSpaceProfile("game", min_tries=2)
+        for _ in range(5):
+            profile.observe(frame(A), frame(A, GameAction.ACTION6))
+
+        assert profile.ineffective() == set()
+
+    def test_verdicts_are_reopened_on_a_new_run_or_level(self, action_space_dir):
+        profile = ActionSpaceProfile("game", min_tries=2)
+        for _ in range(3):
+            profile.observe(frame(A), frame(A, GameAction.ACTION5))
+        assert profile.ineffective() == {GameAction.ACTION5}
+        profile.save()
+
+        # a new run tries it again before masking it
+        loaded = ActionSpaceProfile.load("game", min_tries=2)
+        assert loaded.ineffective() == set()
+        assert GameAction.ACTION5 in loaded.undiscovered()
+        loaded.observe(frame(A), frame(A, GameAction.ACTION5))
+        assert loaded.ineffective() == {GameAction.ACTION5}
+
+        # so does a new level
+        loaded.observe(frame(A), frame(B, GameAction.ACTION1, score=1))
+        assert loaded.ineffective() == set()
+
+    def test_unreadable_profile_is_ignored(self, action_space_dir):
+        (action_space_dir / "game.actions.json").write_text("{not json")
+        assert ActionSpaceProfile.load("game").tries == {}
+
+
+@pytest.mark.unit
+class TestAgentsUseActionSpace:
+    def test_saved_profile_shrinks_tools_and_sampling(self, action_space_dir):
+        first = make_agent(Random)
+        first.append_frame(frame(A, GameAction.RESET))
+        for _ in range(first.action_space.min_tries):
+            first.append_frame(frame(A, GameAction.ACTION5))
+            first.append_frame(frame(A, GameAction.ACTION6))
+        first.action_space.save()
+
+        llm = make_agent(LLM)
+        # reopened for one more try in the new run
+        assert "ACTION5" in [f["name"] for f in llm.build_functions()]
+        llm.append_frame(frame(A, GameAction.RESET))
+        llm.append_frame(frame(A, GameAction.ACTION5))
+        names = [f["name"] for f in llm.build_functions()]
+        assert "ACTION5" not in names and "ACTION6" in names
+
+        rng_agent = make_agent(Random)
+        rng_agent.action_space.observe(frame(A), frame(A, GameAction.ACTION5))
+        latest = frame(B)
+        picks = {rng_agent.choose_action([latest], latest) for _ in range(100)}
+        assert GameAction.ACTION5 not in picks
+
+    def test_random_probes_undiscovered_actions_first(self, action_space_dir):
+        agent = make_agent(Random)
+        latest = frame(A)
+        assert agent.choose_action([latest], latest) is GameAction.ACTION1
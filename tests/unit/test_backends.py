@@ -0,0 +1,288 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import BaseModel
+
+from agents.inference import (
+    BatchingBackend,
+    HedgedBackend,
+    OpenAIBackend,
+    StubBackend,
+    current_backend,
+    get_backend,
+    set_backend,
+    shutdown_shared_batcher,
+)
+from agents.structs import GameAction, GameState
+from agents.templates.llm_agents import LLM, GuidedLLM
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": "",
+            "parameters": {"type": "object", "properties": {}},
+        },
+    }
+    for name in ["ACTION1", "ACTION2", "ACTION3"]
+]
+
+
+class Position(BaseModel):
+    x: int
+    y: int
+
+
+class Verdict(BaseModel):
+    ok: bool
+    where: Position
+
+
+def make_agent(cls, backend):
+    agent = cls(
+        card_id="test-card",
+        game_id="test-game",
+        agent_name="test-agent",
+        ROOT_URL="https://example.com",
+        record=False,
+    )
+    agent.backend = backend
+    return agent
+
+
+@pytest.mark.unit
+class TestStubBackend:
+    def test_same_seed_same_answers(self):
+        def run(seed):
+            backend = StubBackend(seed=seed)
+            return [
+                backend.create(model="m", messages=[], tools=TOOLS)
+                .choices[0]
+                .message.tool_calls[0]
+                .function.name
+                for _ in range(10)
+            ]
+
+        assert run(1) == run(1)
+        assert set(run(1)) <= {"ACTION1", "ACTION2", "ACTION3"}
+
+    def test_scripted_calls_come_first(self):
+        backend = StubBackend(
+            script=[
+                {"name": "ACTION3"},
+                {"name": "ACTION6", "arguments": {"x": "1", "y": "2"}},
+            ]
+        )
+        first = backend.create(model="m", messages=[], tools=TOOLS)
+        second = backend.create(model="m", messages=[], tools=TOOLS)
+
+        assert first.choices[0].message.tool_calls[0].function.name == "ACTION3"
+        call = second.choices[0].message.tool_calls[0].function
+        assert call.name == "ACTION6"
+        assert json.loads(call.arguments) == {"x": "1", "y": "2"}
+
+    def test_plain_and_structured_responses(self):
+        backend = StubBackend(content="hello")
+        plain = backend.create(model="m", messages=[{"role": "user", "content": "hi"}])
+        assert plain.choices[0].message.content == "hello"
+        assert plain.usage.total_tokens > 0
+
+        structured = backend.create(
+            model="m",
+            messages=[],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "x",
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "ok": {"type": "boolean"},
+                            "why": {"type": "string", "minLength": 10},
+                        },
+                    },
+                },
+            },
+        )
+        data = json.loads(structured.choices[0].message.content)
+        assert isinstance(data["ok"], bool)
+        assert len(data["why"]) >= 10
+
+    def test_pydantic_structured_output(self):
+        from langchain_openai import ChatOpenAI
+
+        backend = StubBackend()
+        llm = ChatOpenAI(
+            model="m",
+            api_key="unused",
+            client=backend.client.chat.completions,
+            root_client=backend.client,
+        )
+        result = llm.with_structured_output(Verdict).invoke("is there a key?")
+
+        assert isinstance(result, Verdict)
+        assert isinstance(result.ok, bool)
+        assert isinstance(result.where, Position)
+
+    def test_openai_backend_parses_with_the_real_client(self, monkeypatch):
+        backend = OpenAIBackend(api_key="test")
+        calls = []
+        monkeypatch.setattr(
+            backend._openai.beta.chat.completions,
+            "parse",
+            lambda **kwargs: calls.append(kwargs) or "parsed",
+        )
+
+        assert (
+            backend.client.beta.chat.completions.parse(
+                model="m", messages=[], response_format=Verdict
+            )
+            == "parsed"
+        )
+        assert calls[0]["response_format"] is Verdict
+
+    def test_latency_is_applied(self):
+        slept = []
+        backend = StubBackend(latency=0.25, sleep=slept.append)
+        backend.create(model="m", messages=[])
+        backend.create_batch([{"model": "m", "messages": []}] * 3)
+        assert slept == [0.25, 0.25]
+
+
+@pytest.mark.unit
+class TestAgentsOnStubBackend:
+    def test_llm_function_call_loop(self, sample_frame):
+        agent = make_agent(LLM, StubBackend(script=[{"name": "ACTION4"}]))
+
+        sample_frame.state = GameState.NOT_PLAYED
+        assert agent.choose_action([sample_frame], sample_frame) == GameAction.RESET
+
+        sample_frame.state = GameState.NOT_FINISHED
+        action = agent.choose_action([sample_frame], sample_frame)
+        assert action == GameAction.ACTION4
+        assert agent.token_counter > 0
+
+    def test_llm_tool_call_loop(self, sample_frame):
+        agent = make_agent(
+            GuidedLLM,
+            StubBackend(
+                script=[{"name": "ACTION6", "arguments": {"x": "5", "y": "7"}}]
+            ),
+        )
+
+        agent.choose_action([sample_frame], sample_frame)
+        action = agent.choose_action([sample_frame], sample_frame)
+        assert action == GameAction.ACTION6
+        assert (action.action_data.x, action.action_data.y) == (5, 7)
+
+
+@pytest.fixture
+def fresh_backend():
+    shutdown_shared_batcher()
+    set_backend(None)
+    yield
+    shutdown_shared_batcher()
+    set_backend(None)
+
+
+@pytest.mark.unit
+class TestGetBackend:
+    def test_batching_backend_is_hedged_too(self, monkeypatch, fresh_backend):
+        monkeypatch.setenv("LLM_BATCH_URL", "http://127.0.0.1:9/batch")
+        monkeypatch.setenv("LLM_HEDGE_PERCENTILE", "90")
+
+        backend = get_backend()
+        assert isinstance(backend, HedgedBackend)
+        assert isinstance(backend.backend, BatchingBackend)
+        assert get_backend() is backend
+
+        # a new shared batcher gets a new backend
+        shutdown_shared_batcher()
+        assert get_backend() is not backend
+
+    def test_batches_can_go_to_the_stub(self, monkeypatch, fresh_backend):
+        monkeypatch.setenv("LLM_BATCH_URL", "stub")
+        monkeypatch.setenv("LLM_BATCH_WAIT_MS", "200")
+
+        backend = get_backend()
+        assert isinstance(backend, BatchingBackend)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(
+                pool.map(lambda _: backend.create(model="m", messages=[]), range(4))
+            )
+        assert all(r.choices[0].message.content for r in responses)
+        assert backend.batcher.stats.batches < 4
+
+    def test_current_backend_does_not_create_one(self, monkeypatch, fresh_backend):
+        monkeypatch.setenv("LLM_BACKEND", "stub")
+        assert current_backend() is None
+        backend = get_backend()
+        assert current_backend() is backend
+
+
+class SlowOnce(StubBackend):
+    """Stub whose n-th call stalls, to simulate a tail-latency outlier."""
+
+    def __init__(self, slow_call, stall, **kwargs):
+        super().__init__(**kwargs)
+        self.slow_call = slow_call
+        self.stall = stall
+
+    def create(self, **kwargs):
+        response = super().create(**kwargs)
+        if self.calls == self.slow_call:
+            time.sleep(self.stall)
+        return response
+
+
+@pytest.mark.unit
+class TestHedgedBackend:
+    def test_no_hedging_until_warmed_up(self):
+        backend = HedgedBackend(StubBackend(), min_samples=5)
+        for _ in range(4):
+            backend.create(model="m", messages=[])
+        assert backend.hedge_delay() is None
+        backend.create(model="m", messages=[])
+        time.sleep(0.05)  # latency is recorded by a done-callback
+        assert backend.hedge_delay() is not None
+
+    def test_slow_call_is_hedged_and_duplicate_wins(self):
+        inner = SlowOnce(slow_call=6, stall=2.0, latency=0.01)
+        backend = HedgedBackend(inner, min_samples=5, max_hedge_rate=1.0)
+        for _ in range(5):
+            backend.create(model="m", messages=[])
+        time.sleep(0.05)
+
+        start = time.monotonic()
+        response = backend.create(model="m", messages=[])
+        assert time.monotonic() - start < 1.0
+        assert response.choices[0].message.content
+
+        report = backend.report()
+        assert report["hedged"] == 1
+        assert report["hedge_wins"] == 1
+        assert report["win_rate"] == 1.0
+        assert report["abandoned"] == 1
+
+    def test_alternate_model_and_budget_cap(self):
+        inner = SlowOnce(slow_call=3, stall=0.5, latency=0.01)
+        backend = HedgedBackend(
+            inner,
+            alternate_model="fast-model",
+            min_samples=2,
+            max_hedge_rate=1.0,
+            max_extra_tokens=1,
+        )
+        backend.create(model="m", messages=[])
+        backend.create(model="m", messages=[])
+        time.sleep(0.05)
+
+        response = backend.create(model="m", messages=[])
+        assert response.model == "fast-model"
+
+        time.sleep(0.6)  # let the abandoned primary finish
+        assert backend.extra_tokens > 0
+        assert backend.hedge_delay() is None
@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+from openai.types.chat import ChatCompletion
+
+from agents.inference.batching import HTTPBatchTransport, RequestBatcher
+
+
+def make_completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@pytest.fixture
+def stub_server():
+    batch_sizes: list[int] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            batch_sizes.append(len(body["requests"]))
+            responses = []
+            for req in body["requests"]:
+                content = req["messages"][0]["content"]
+                if content == "fail":
+                    responses.append({"error": "boom"})
+                elif content == "too many":
+                    responses.append(
+                        {"error": {"message": "slow down"}, "status_code": 429}
+                    )
+                else:
+                    responses.append(make_completion(f"echo {content}"))
+            payload = json.dumps({"responses": responses}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/batch", batch_sizes
+    server.shutdown()
+    server.server_close()
+
+
+def ask(batcher: RequestBatcher, text: str) -> str:
+    response = batcher.create(
+        model="stub", messages=[{"role": "user", "content": text}]
+    )
+    return response.choices[0].message.content
+
+
+@pytest.mark.unit
+class TestRequestBatcher:
+    def test_concurrent_requests_share_a_batch(self, stub_server):
+        url, batch_sizes = stub_server
+        batcher = RequestBatcher(
+            HTTPBatchTransport(url), max_batch_size=8, max_wait=0.5
+        )
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            answers = list(pool.map(lambda i: ask(batcher, str(i)), range(8)))
+        batcher.close()
+
+        assert answers == [f"echo {i}" for i in range(8)]
+        assert sum(batch_sizes) == 8
+        assert len(batch_sizes) < 8
+        stats = batcher.stats.as_dict()
+        assert stats["requests"] == 8
+        assert 0 < stats["fill_rate"] <= 1
+        assert stats["max_queue_delay_ms"] <= 1000
+
+    def test_lone_request_waits_at_most_max_wait(self, stub_server):
+        url, batch_sizes = stub_server
+        batcher = RequestBatcher(
+            HTTPBatchTransport(url), max_batch_size=8, max_wait=0.05
+        )
+
+        start = time.monotonic()
+        assert ask(batcher, "hi") == "echo hi"
+        batcher.close()
+
+        assert time.monotonic() - start < 1.0
+        assert batch_sizes == [1]
+        assert batcher.stats.fill_rate == pytest.approx(1 / 8)
+
+    def test_errors_are_routed_to_the_failing_request(self, stub_server):
+        url, _ = stub_server
+        batcher = RequestBatcher(
+            HTTPBatchTransport(url), max_batch_size=2, max_wait=0.5
+        )
+
+        ok = batcher.submit(
+            {"model": "stub", "messages": [{"role": "user", "content": "ok"}]}
+        )
+        bad = batcher.submit(
+            {"model": "stub", "messages": [{"role": "user", "content": "fail"}]}
+        )
+
+        assert ok.result().choices[0].message.content == "echo ok"
+        with pytest.raises(openai.InternalServerError):
+            bad.result()
+        batcher.close()
+
+    def test_errors_keep_the_openai_error_class(self, stub_server):
+        url, _ = stub_server
+        batcher = RequestBatcher(
+            HTTPBatchTransport(url), max_batch_size=1, max_wait=0.01
+        )
+
+        with pytest.raises(openai.RateLimitError, match="slow down") as e:
+            ask(batcher, "too many")
+        assert e.value.status_code == 429
+        batcher.close()
+
+    def test_batches_are_sent_while_one_is_in_flight(self):
+        in_flight = []
+        most = [0]
+        lock = threading.Lock()
+
+        def slow(batch):
+            with lock:
+                in_flight.append(1)
+                most[0] = max(most[0], len(in_flight))
+            time.sleep(0.3)
+            with lock:
+                in_flight.pop()
+            return [ChatCompletion.model_validate(make_completion("ok")) for _ in batch]
+
+        batcher = RequestBatcher(slow, max_batch_size=1, max_wait=0.01)
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda i: ask(batcher, str(i)), range(3)))
+        batcher.close()
+
+        assert most[0] == 3
+        assert time.monotonic() - start < 0.8
+
+    def test_no_request_is_left_unanswered_by_close(self):
+        completion = ChatCompletion.model_validate(make_completion("ok"))
+        batcher = RequestBatcher(lambda batch: [completion] * len(batch), max_wait=0.01)
+        futures = []
+
+        def keep_submitting():
+            while True:
+                try:
+                    futures.append(batcher.submit({"model": "stub", "messages": []}))
+                except RuntimeError:
+                    return
+                time.sleep(0.001)
+
+        thread = threading.Thread(target=keep_submitting)
+        thread.start()
+        time.sleep(0.05)
+        batcher.close()
+        thread.join()
+
+        assert futures
+        for future in futures:
+            assert future.result(timeout=2).choices[0].message.content == "ok"
+
+    def test_transport_failure_fails_whole_batch(self):
+        def broken(batch):
+            raise ConnectionError("down")
+
+        batcher = RequestBatcher(broken, max_batch_size=4, max_wait=0.01)
+        with pytest.raises(ConnectionError):
+            batcher.create(model="stub", messages=[])
+        batcher.close()
@@ -0,0 +1,132 @@
+import base64
+import io
+import json
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from agents.benchmarks import (
+    TokenCounter,
+    diff,
+    format_table,
+    image_tokens,
+    measure_request,
+    render,
+    synthetic_frames,
+)
+from agents.benchmarks.prompts import main, run_benchmark
+from agents.templates.langgraph.vision import find_landmarks
+
+
+def data_url(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height)).save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.mark.unit
+class TestTokenEstimates:
+    def test_image_tokens_follow_the_tile_formula(self):
+        assert image_tokens(1024, 1024) == 765
+        assert image_tokens(2048, 4096) == 1105
+        assert image_tokens(2048, 4096, detail="low") == 85
+
+    def test_request_counts_text_images_and_tools(self):
+        counter = TokenCounter()
+        request = {
+            "messages": [
+                {"role": "system", "content": "You are playing a game."},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "Current screen:"},
+                        {"type": "image_url", "image_url": {"url": data_url(512, 512)}},
+                        {
+                            "type": "image_url",
+                            "image_url": {"url": data_url(512, 512), "detail": "low"},
+                        },
+                    ],
+                },
+            ],
+        }
+        sample = measure_request(request, counter)
+        assert (sample.calls, sample.images, sample.image_tokens) == (1, 2, 255 + 85)
+
+        tools = [{"type": "function", "function": {"name": "ACTION1"}}]
+        with_tools = measure_request({**request, "tools": tools}, counter)
+        assert with_tools.text_tokens > sample.text_tokens
+
+
+@pytest.mark.unit
+class TestPromptBenchmark:
+    def test_corpus_is_deterministic(self):
+        first, second = synthetic_frames(12), synthetic_frames(12)
+        assert [f.frame for f in first] == [f.frame for f in second]
+        assert len(first[10].frame) == 3
+
+    def test_builders_are_measured(self):
+        results = run_benchmark(
+            synthetic_frames(4),
+            ["LLM", "ReasoningAgent", "format_frame(text)", "format_frame(image)"],
+        )
+        rows = results["builders"]
+        assert rows["LLM"]["turns"] == 3  # the first RESET is free
+        assert rows["LLM"]["image_tokens"] == 0
+        assert rows["ReasoningAgent"]["images"] > 1
+        assert rows["format_frame(image)"]["images"] == 1
+        assert (
+            rows["format_frame(text)"]["text_tokens"]
+            > rows["format_frame(image)"]["text_tokens"]
+        )
+
+    def test_table_compares_against_baseline(self, tmp_path, monkeypatch, capsys):
+        baseline = tmp_path / "baseline.json"
+        argv = ["x", "--frames", "3", "--builders", "format_frame(text)"]
+        monkeypatch.setattr(sys, "argv", [*argv, "--save-baseline", str(baseline)])
+        main()
+        assert "format_frame(text)" in json.loads(baseline.read_text())["builders"]
+
+        monkeypatch.setattr(sys, "argv", [*argv, "--baseline", str(baseline)])
+        main()
+        assert "(+0%)" in capsys.readouterr().out
+
+        table = format_table({"a": {"x": 150.0}}, [("x", "x")], {"a": {"x": 100.0}})
+        assert "150 (+50%)" in table
+
+
+@pytest.mark.unit
+class TestRenderBenchmark:
+    def test_render_frame_matches_the_reference(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        results = render.run_benchmark(synthetic_frames(11)[9:], repeat=1)
+
+        row = results["renderers"]["render_frame"]
+        assert row["identical"] == 1.0
+        assert row["speedup"] > 1
+        assert not list(tmp_path.iterdir())  # nothing written to the cwd
+
+    def test_landmarks_follow_the_row_scan(self):
+        grid = np.full((6, 6), 3)
+        grid[1, 4] = grid[1, 5] = 12  # player, first cell only
+        grid[1, 1] = 5  # same row as the player and further left: door wins
+        grid[3, 2] = 12
+        grid[4, 0] = 9  # rotator, floor above
+        grid[0, 3] = 9  # floor above via the wrap to the last row
+        assert find_landmarks(grid) == [
+            ("Rotator", (3, 0)),
+            ("Door", (1, 1)),
+            ("Player", (2, 3)),
+        ]
+
+
+@pytest.mark.unit
+class TestDiffBenchmark:
+    def test_comparisons_match_the_cell_loops(self):
+        results = diff.run_benchmark(synthetic_frames(12), repeat=1)
+
+        assert results["pairs"] == 11
+        for name in ("detect_delta", "frame_delta"):
+            assert results["comparisons"][name]["identical"] == 1.0
+        assert "reference_ms" not in results["comparisons"]["diff_frames"]
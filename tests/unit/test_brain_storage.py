@@ -0,0 +1,166 @@
+import json
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from agents.inference import set_backend
+from agents.specialist.event_store import EventStore
+from agents.specialist.knowledge_specialist import KnowledgeSpecialist
+from agents.specialist.persistent_memory_manager import (
+    JsonStream,
+    PersistentMemoryManager,
+    merge_knowledge,
+)
+from agents.specialist_agent import SpecialistAgent
+
+
+def knowledge(tries, successes, goal="Find the door.", fingerprints=()):
+    brain = KnowledgeSpecialist().knowledge
+    brain["mechanics_model"]["action_effects"]["ACTION1"] = {
+        "tries": tries,
+        "successes": successes,
+        "effect_fingerprints": list(fingerprints),
+    }
+    brain["strategic_model"]["current_goal"] = goal
+    return brain
+
+
+def event(turn, success=True):
+    return {
+        "turn": turn,
+        "action": {"name": "ACTION6", "data": {"x": turn, "y": 2}},
+        "effect_delta": {"pixels_changed": int(success), "score_change": 0},
+        "success": success,
+    }
+
+
+@pytest.mark.unit
+class TestBrainStorage:
+    def test_round_trip(self, tmp_path):
+        manager = PersistentMemoryManager(str(tmp_path))
+        assert manager.load_state("ls20") == {}
+        manager.save_state("ls20", knowledge(3, 1))
+
+        loaded = PersistentMemoryManager(str(tmp_path)).load_state("ls20")
+        assert loaded["knowledge"] == knowledge(3, 1)
+
+    def test_concurrent_runs_merge_their_counts(self, tmp_path):
+        manager = PersistentMemoryManager(str(tmp_path))
+        manager.save_state("ls20", knowledge(10, 4, fingerprints=["1 pixels changed."]))
+
+        first = PersistentMemoryManager(str(tmp_path))
+        second = PersistentMemoryManager(str(tmp_path))
+        first.load_state("ls20")
+        second.load_state("ls20")
+        first.save_state("ls20", knowledge(15, 6, fingerprints=["1 pixels changed."]))
+        second.save_state(
+            "ls20", knowledge(13, 4, "Use the key.", ["2 pixels changed."])
+        )
+        second.save_state(
+            "ls20", knowledge(13, 4, "Use the key.", ["2 pixels changed."])
+        )  # saving again adds nothing
+
+        merged = manager.load_state("ls20")["knowledge"]
+        effect = merged["mechanics_model"]["action_effects"]["ACTION1"]
+        assert (effect["tries"], effect["successes"]) == (18, 6)
+        assert effect["effect_fingerprints"] == [
+            "1 pixels changed.",
+            "2 pixels changed.",
+        ]
+        assert merged["strategic_model"]["current_goal"] == "Use the key."
+
+    def test_events_are_appended_from_many_threads(self, tmp_path):
+        managers = [PersistentMemoryManager(str(tmp_path)) for _ in range(4)]
+
+        def play(manager):
+            for turn in range(1, 26):
+                manager.append_event("ls20", event(turn, success=turn % 5 == 0))
+
+        threads = [threading.Thread(target=play, args=(m,)) for m in managers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert managers[0].event_count("ls20") == 100
+        assert managers[0].event_count("ft09") == 0
+
+    def test_old_brain_files_are_read(self, tmp_path):
+        with open(os.path.join(tmp_path, "brain_ls20.json"), "w") as f:
+            json.dump({"knowledge": knowledge(2, 2), "raw_memory_events": []}, f)
+        manager = PersistentMemoryManager(str(tmp_path))
+        assert manager.load_state("ls20")["knowledge"] == knowledge(2, 2)
+
+        manager.save_state("ls20", knowledge(3, 2))
+        stored = PersistentMemoryManager(str(tmp_path)).load_state("ls20")
+        assert stored["knowledge"] == knowledge(3, 2)
+
+    def test_merge_without_a_stored_brain(self):
+        assert merge_knowledge({}, knowledge(1, 1), {}) == knowledge(1, 1)
+
+    def test_knowledge_is_read_without_the_events(self, tmp_path):
+        brain = json.dumps({"knowledge": knowledge(2, 1), "raw_memory_events": []})
+        # everything after the knowledge is never parsed
+        with open(os.path.join(tmp_path, "brain_ls20.json"), "w") as f:
+            f.write(brain[: brain.rindex("[")] + "[not json at all")
+        manager = PersistentMemoryManager(str(tmp_path))
+        assert manager.load_knowledge("ls20") == knowledge(2, 1)
+
+        os.remove(os.path.join(tmp_path, "brain_ls20.json"))  # imported already
+        assert manager.load_knowledge("ls20") == knowledge(2, 1)
+        assert manager.load_knowledge("ft09") is None
+
+    def test_events_stream_from_old_files_and_the_database(self, tmp_path):
+        with open(os.path.join(tmp_path, "brain_ls20.json"), "w") as f:
+            json.dump({"knowledge": {}, "raw_memory_events": [event(1), event(2)]}, f)
+        manager = PersistentMemoryManager(str(tmp_path))
+        for turn in range(1, 6):
+            manager.append_event("ls20", event(turn, success=turn > 3))
+
+        events = manager.iter_events("ls20", batch_size=2)
+        assert next(events) == event(1)
+        assert [e["turn"] for e in events] == [2, 1, 2, 3, 4, 5]
+        assert [e["turn"] for e in manager.iter_events("ls20", success=False)] == [
+            1,
+            2,
+            3,
+        ]
+        streamed = list(manager.iter_events("ls20", action="ACTION6", success=True))
+        assert [e["turn"] for e in streamed][-2:] == [4, 5]
+        assert streamed[-1]["run_id"] == manager.run_id
+        assert streamed[-1]["action"]["data"] == {"x": 5, "y": 2}
+
+    def test_stream_reads_fields_across_chunks(self, tmp_path):
+        store = EventStore()
+        store.append("ACTION1", True, {"pixels_changed": 12345, "score_change": 0})
+        path = tmp_path / "brain.json"
+        path.write_text(
+            json.dumps({"version": 123456, "raw_memory_events": store.to_dict()})
+        )
+        with open(path) as f:
+            assert JsonStream(f, chunk_size=3).field("version") == 123456
+        with open(path) as f:
+            items = list(JsonStream(f, chunk_size=5).items("raw_memory_events"))
+        assert items == store.recent(1)
+        with open(path) as f:
+            assert JsonStream(f).field("knowledge") is None
+
+    def test_agent_cleanup_closes_the_database(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("LLM_BACKEND", "stub")
+        set_backend(None)
+        agent = SpecialistAgent(
+            card_id="test-card",
+            game_id="ls20",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.cleanup()
+        set_backend(None)
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            agent.memory_manager.event_count("ls20")
+        reloaded = PersistentMemoryManager().load_knowledge("ls20")
+        assert reloaded == agent.knowledge.get_knowledge_summary()
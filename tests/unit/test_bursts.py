@@ -0,0 +1,46 @@
+import pytest
+
+from agents.bursts import summarize_burst
+from agents.structs import FrameData
+from agents.templates.langgraph_functional_agent import format_frame
+from agents.templates.llm_agents import LLM
+
+
+def slide(steps):
+    """A 4x6 grid with a 1-cell object moving one column to the right per grid."""
+    grids = []
+    for col in range(steps):
+        grid = [[0] * 6 for _ in range(4)]
+        grid[1][col] = 5
+        grids.append(grid)
+    return grids
+
+
+@pytest.mark.unit
+class TestBursts:
+    def test_summary_of_motion(self):
+        burst = summarize_burst(slide(4))
+
+        assert burst.is_burst and burst.final == slide(4)[-1]
+        assert burst.net_changed == 2  # the start and end cell
+        assert burst.transient_changed == 2  # the cells passed through
+        assert burst.bbox == (1, 0, 1, 3)
+        assert burst.steps == [(2, 1.0, 0.5), (2, 1.0, 1.5), (2, 1.0, 2.5)]
+        assert "Animation of 4 grids" in burst.describe()
+
+    def test_single_grid_is_not_a_burst(self):
+        burst = summarize_burst(slide(1))
+        assert not burst.is_burst
+        assert burst.describe() == ""
+        assert summarize_burst([]).final == []
+
+    def test_prompts_show_only_the_final_grid(self):
+        frame = FrameData(frame=slide(3))
+
+        text = LLM.pretty_print_3d(None, frame.frame)
+        assert "Grid 2:" in text and "Grid 0:" not in text
+        assert text.startswith("Animation of 3 grids")
+
+        blocks = format_frame(frame, as_image=False)
+        assert "Grid 0:" not in blocks[1]["text"]
+        assert "Animation of 3 grids" in blocks[0]["text"]
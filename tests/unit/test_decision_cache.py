@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from agents.inference import DecisionCache, StubBackend
+from agents.structs import ActionInput, FrameData, GameAction, GameState
+from agents.templates.llm_agents import GuidedLLM
+
+
+def frame(grid, action=GameAction.ACTION1, data=None):
+    return FrameData(
+        frame=[np.asarray(grid).tolist()],
+        state=GameState.NOT_FINISHED,
+        action_input=ActionInput(id=action, data=data or {}),
+    )
+
+
+def level(player_x=0):
+    grid = np.full((16, 16), 8)
+    grid[4:8, player_x : player_x + 4] = 4
+    return grid
+
+
+@pytest.mark.unit
+class TestDecisionCache:
+    def test_exact_state_and_context_hits(self):
+        cache = DecisionCache()
+        frames = [frame(level(0)), frame(level(1))]
+        assert cache.lookup(frames) is None
+        cache.store(frames, "ACTION4", {})
+
+        frames += [frame(level(0)), frame(level(1))]
+        hit = cache.lookup(frames)
+        assert hit is not None and hit.action == "ACTION4"
+        assert cache.report()["hits"] == 1
+        assert cache.hit_rate == pytest.approx(0.5)
+
+    def test_different_action_context_misses(self):
+        cache = DecisionCache()
+        frames = [frame(level(0)), frame(level(1))]
+        cache.store(frames, "ACTION4", {})
+
+        other = [frame(level(0)), frame(level(1), GameAction.ACTION6, {"x": 1})]
+        assert cache.lookup(other) is None
+
+    def test_decision_that_changed_nothing_is_dropped(self):
+        cache = DecisionCache()
+        frames = [frame(level(0)), frame(level(1))]
+        cache.lookup(frames)
+        cache.store(frames, "ACTION1", {})  # walks into a wall
+
+        frames.append(frame(level(1)))
+        cache.lookup(frames)
+        assert cache.report()["entries"] == 0
+
+    def test_decisions_are_reused_a_limited_number_of_times(self):
+        cache = DecisionCache(max_reuses=2)
+        frames = [frame(level(0)), frame(level(1))]
+        cache.store(frames, "ACTION4", {})
+        assert cache.lookup(frames) is not None
+        assert cache.lookup(frames) is not None
+        assert cache.lookup(frames) is None
+
+    def test_similarity_threshold(self):
+        exact = DecisionCache(similarity=1.0)
+        near = DecisionCache(similarity=0.95)
+        frames = [frame(level(0)), frame(level(1))]
+        for cache in (exact, near):
+            cache.store(frames, "ACTION4", {})
+
+        almost = level(1)
+        almost[15, 15] = 3  # e.g. the energy bar ticked down
+        frames = [frame(level(0)), frame(almost)]
+        assert exact.lookup(frames) is None
+        hit = near.lookup(frames)
+        assert hit is not None and hit.action == "ACTION4"
+        assert near.report()["near_hits"] == 1
+
+
+@pytest.mark.unit
+class TestLLMDecisionCache:
+    def test_cache_is_off_by_default(self):
+        agent = GuidedLLM(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        assert agent.decision_cache is None
+
+    def test_repeated_state_skips_the_model(self, monkeypatch):
+        monkeypatch.setenv("LLM_DECISION_CACHE_SIMILARITY", "1.0")
+        agent = GuidedLLM(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.backend = StubBackend(script=[{"name": "ACTION4"}])
+
+        frames = [frame(level(0), GameAction.RESET)]
+        agent.choose_action(frames, frames[-1])
+        frames.append(frame(level(1), GameAction.ACTION4))
+        assert agent.choose_action(frames, frames[-1]) == GameAction.ACTION4
+        calls = agent.backend.calls
+
+        frames += [
+            frame(level(0), GameAction.RESET),
+            frame(level(1), GameAction.ACTION4),
+        ]
+        agent.action_counter = 3
+        assert agent.choose_action(frames, frames[-1]) == GameAction.ACTION4
+        assert agent.backend.calls == calls
+
+        # the replayed call must be answered by a tool message with a matching id
+        tool_call = agent.messages[-1]["tool_calls"][0]
+        assert tool_call["id"] == agent._latest_tool_call_id
+        assert tool_call["function"]["name"] == "ACTION4"
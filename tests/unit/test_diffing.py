@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from agents.benchmarks import reference, synthetic_frames
+from agents.diffing import diff_frames
+from agents.specialist.change_detection_specialist import ChangeDetectionSpecialist
+from agents.structs import FrameData, GameState
+from agents.templates.langgraph.nodes import describe_frame_delta
+
+
+def grid(changes=(), size=8, value=0):
+    cells = [[value] * size for _ in range(size)]
+    for y, x, v in changes:
+        cells[y][x] = v
+    return cells
+
+
+@pytest.mark.unit
+class TestFrameDiff:
+    def test_counts_boxes_and_transitions(self):
+        diff = diff_frames([grid()], [grid([(0, 1, 5), (3, 2, 7), (6, 4, 7)])], 2)
+
+        assert diff.changed == 3
+        assert (diff.hud_changed, diff.board_changed) == (1, 2)
+        assert diff.bbox == (0, 1, 6, 4)
+        assert diff.board_bbox == (3, 2, 6, 4)
+        assert diff.transitions() == {(0, 5): 1, (0, 7): 2}
+        assert diff.mask.shape == (8, 8) and diff.mask[3, 2]
+        rows, cols, before, after = diff.cells()
+        assert rows.tolist() == [0, 3, 6] and cols.tolist() == [1, 2, 4]
+        assert before.tolist() == [0, 0, 0] and after.tolist() == [5, 7, 7]
+
+    def test_every_grid_of_a_burst_is_compared(self):
+        burst = [grid([(1, 1, 4)]), grid([(1, 1, 4), (2, 2, 4)]), grid([(2, 2, 4)])]
+        diff = diff_frames([grid(), grid([(5, 5, 9)])], burst)
+
+        # compared with the final grid of the earlier frame only
+        assert diff.changed == 2
+        assert diff.transient_changed == 1
+        assert diff.steps == [2, 1, 1]
+        assert diff.touched[1, 1] and not diff.mask[1, 1]
+
+    def test_sizes_and_empty_frames(self):
+        assert diff_frames([], [grid()]).changed == 0
+        assert diff_frames([grid()], []).bbox is None
+        assert diff_frames([grid()], [[]]).report()["cells"] == []
+
+        smaller = diff_frames([grid([(1, 1, 3)])], [grid(size=4)])
+        assert smaller.mask.shape == (4, 4) and smaller.changed == 1
+        array = diff_frames([np.array(grid())], [np.array(grid([(7, 7, 2)]))])
+        assert array.bbox == (7, 7, 7, 7)
+
+    def test_specialist_reports_the_burst(self):
+        def frame(grids, score=0):
+            return FrameData(frame=grids, score=score, state=GameState.NOT_FINISHED)
+
+        before = frame([grid([(4, 4, 3)])])
+        after = frame([grid([(4, 4, 3), (0, 0, 1)]), grid([(5, 5, 2)])], score=1)
+        delta = ChangeDetectionSpecialist().detect_delta(before, after)
+
+        assert delta["pixels_changed"] == 2
+        assert delta["transient_pixels_changed"] == 1  # the cell at (0, 0)
+        assert delta["transitions"] == {"0->2": 1, "3->0": 1}
+        assert delta["specific_changes"] == [
+            {"pos": (4, 4), "before": 3, "after": 0},
+            {"pos": (5, 5), "before": 0, "after": 2},
+        ]
+        assert (delta["score_change"], delta["game_state_change"]) == (1, None)
+
+    def test_delta_text_matches_the_cell_loop(self):
+        frames = synthetic_frames(12)
+        for previous, latest in zip(frames, frames[1:]):
+            text = describe_frame_delta(previous, latest)
+            assert text.startswith(
+                reference.frame_delta(previous.frame[-1], latest.frame[-1])
+            )
+
+        hud = grid([(1, 3, 1), (2, 0, 8), (2, 1, 6), (2, 2, 7)], size=64)
+        text = describe_frame_delta(
+            FrameData(frame=[grid(size=64)]), FrameData(frame=[hud])
+        )
+        assert text == reference.frame_delta(grid(size=64), hud)
+        assert text.startswith(
+            "Change in heath indicator\n1 energy unit used\n1 energy unit added\n\n"
+            "Character did not move."
+        )
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from agents.specialist.event_store import EventStore
+from agents.specialist.memory_specialist import MemorySpecialist
+from agents.structs import GameAction
+
+
+def delta(pixels, score=0):
+    return {"pixels_changed": pixels, "score_change": score, "specific_changes": []}
+
+
+def click(x, y):
+    action = GameAction.ACTION6
+    action.set_data({"x": x, "y": y})
+    return action
+
+
+@pytest.mark.unit
+class TestEventStore:
+    def test_events_keep_the_memory_format(self):
+        memory = MemorySpecialist()
+        event = memory.record_event(GameAction.ACTION1, delta(3))
+        assert event == {
+            "turn": 1,
+            "action": {"name": "ACTION1", "data": None},
+            "effect_delta": delta(3),
+            "success": True,
+        }
+        memory.record_event(click(5, 7), delta(0))
+        assert memory.turn_number == 2
+        assert memory.get_recent_history(1)[0]["action"]["data"] == {"x": 5, "y": 7}
+        assert [e["turn"] for e in memory.get_full_history()] == [1, 2]
+
+    def test_queries_use_the_indexes(self):
+        memory = MemorySpecialist()
+        memory.record_event(click(1, 1), delta(0))
+        memory.record_event(click(1, 1), delta(4))
+        memory.record_event(GameAction.ACTION2, delta(2))
+        memory.record_event(click(2, 3), delta(5, score=1))
+
+        store = memory.store
+        assert store.turns(action="ACTION6", success=True) == [2, 4]
+        assert store.turns(position=(1, 1)) == [1, 2]
+        assert store.turns(position=(1, 1), success=False) == [1]
+        assert store.turns(success=True, limit=2) == [3, 4]
+        assert store.turns(action="ACTION5") == []
+        clicks = memory.find_events(action="ACTION6", success=True, limit=1)
+        assert clicks[0]["effect_delta"]["score_change"] == 1
+        assert store.counts()["ACTION6"] == {"tries": 3, "successes": 2}
+
+    def test_retention_is_bounded(self):
+        store = EventStore(max_events=10, max_details=3)
+        for turn in range(25):
+            store.append("ACTION6", turn % 2 == 0, delta(turn), (turn % 3, 0))
+
+        assert store.turn_number == 25
+        assert len(store) <= 10 and store.first_turn > 1
+        assert store.turns(position=(0, 0))[0] >= store.first_turn
+        assert store.recent(3)[0]["effect_delta"] == delta(22)
+        # older events only keep the numbers in the columns
+        assert store.event(store.first_turn)["effect_delta"] == {
+            "pixels_changed": store.first_turn - 1,
+            "score_change": 0,
+        }
+        with pytest.raises(IndexError):
+            store.event(1)
+
+    def test_round_trip_through_json(self):
+        store = EventStore(max_details=2)
+        for turn in range(6):
+            store.append(
+                "ACTION6" if turn % 2 else "ACTION3",
+                turn > 2,
+                delta(turn),
+                (turn, 1) if turn % 2 else None,
+            )
+
+        loaded = EventStore.from_dict(
+            json.loads(json.dumps(store.to_dict())), max_details=2
+        )
+        assert loaded.recent(6) == json.loads(json.dumps(store.recent(6)))
+        assert loaded.turns(action="ACTION6", success=True) == [4, 6]
+        assert loaded.turns(position=(3, 1)) == [4]
@@ -0,0 +1,61 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents.benchmarks import synthetic_frames
+from agents.benchmarks.prompts import run_benchmark
+from agents.structs import FrameData, GameState
+from agents.templates.langgraph.explanations import ExplanationCache, delta_signature
+
+
+def frame(player, energy_used=0, size=16):
+    """A board with a 2x2 player at (row, column) and an energy bar in row 2."""
+    grid = [[3] * size for _ in range(size)]
+    grid[2] = [8] * energy_used + [6] * (size - energy_used)
+    row, col = player
+    for y in range(row, row + 2):
+        grid[y][col : col + 2] = [12, 12]
+    return FrameData(frame=[grid], state=GameState.NOT_FINISHED)
+
+
+@pytest.mark.unit
+class TestDeltaSignature:
+    def test_same_effect_anywhere_has_the_same_signature(self):
+        left = delta_signature("ACTION3", frame((6, 8), 1), frame((6, 6), 2))
+        again = delta_signature("ACTION3", frame((10, 12), 4), frame((10, 10), 5))
+        assert left == again
+
+        assert left != delta_signature("ACTION4", frame((6, 8), 1), frame((6, 6), 2))
+        right = delta_signature("ACTION3", frame((6, 8), 1), frame((6, 10), 2))
+        assert left != right
+        no_energy = delta_signature("ACTION3", frame((6, 8), 1), frame((6, 6), 1))
+        assert left != no_energy
+
+    def test_wall_bumps_match(self):
+        bump = delta_signature("ACTION1", frame((6, 8), 1), frame((6, 8), 2))
+        assert bump == delta_signature("ACTION1", frame((9, 4), 3), frame((9, 4), 4))
+        assert bump[1:4] == ((), (), ())  # nothing moved, appeared or vanished
+
+
+@pytest.mark.unit
+class TestExplanationCache:
+    def test_hits_and_eviction(self):
+        cache = ExplanationCache(maxsize=2)
+        assert cache.get(("a",)) is None
+        cache.put(("a",), AIMessage(content="moved left"))
+        assert cache.get(("a",)).content == "moved left"
+        cache.put(("b",), AIMessage(content="b"))
+        cache.put(("c",), AIMessage(content="c"))
+        assert cache.get(("a",)) is None
+        assert cache.stats() == {
+            "hits": 1,
+            "misses": 2,
+            "hit_rate": 0.333,
+            "entries": 2,
+        }
+
+    def test_repeated_deltas_skip_the_model(self):
+        results = run_benchmark(synthetic_frames(30), ["langgraph"])
+        rows = results["builders"]
+        # one model call per novel effect, one act call per frame
+        assert rows["langgraph.act"]["turns"] == 30
+        assert rows["langgraph.analyze_frame_delta"]["turns"] < 29 / 2
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from agents.benchmarks import synthetic_frames
+from agents.templates.langgraph.keys import KeyMatcher, compare, find_door, find_key
+
+
+def level(key, door, key_color=9):
+    """A level whose key and door hold the given shapes (lists of 0 and 1)."""
+    grid = np.full((64, 64), 8)
+    grid[53:] = 10
+    grid[8:15, 40:47] = 5  # the door: a border around its pattern
+    grid[9:14, 41:46] = 8
+    door = np.where(door, 9, 8)
+    grid[10 : 10 + len(door), 42 : 42 + len(door[0])] = door
+    key = np.where(key, key_color, 10).repeat(2, axis=0).repeat(2, axis=1)
+    grid[55 : 55 + len(key), 2 : 2 + len(key[0])] = key
+    return grid
+
+
+SHAPE = [[1, 0, 1], [1, 1, 1], [0, 1, 0]]
+
+
+@pytest.mark.unit
+class TestKeyMatching:
+    def test_key_is_compared_to_the_door_at_half_size(self):
+        grid = level(SHAPE, SHAPE)
+        assert find_key(grid).cells.shape == (6, 6)
+        assert find_door(grid).cells.shape == (3, 3)
+        assert compare(find_key(grid), find_door(grid)).matches
+
+        rotated = level(np.rot90(SHAPE).tolist(), SHAPE)
+        result = compare(find_key(rotated), find_door(rotated))
+        assert (result.shape_matches, result.color_matches) == (False, True)
+
+        recolored = level(SHAPE, SHAPE, key_color=2)
+        result = compare(find_key(recolored), find_door(recolored))
+        assert (result.shape_matches, result.color_matches) == (True, False)
+        assert not result.matches
+
+        smaller = level([[1, 1], [1, 0]], SHAPE)
+        assert not compare(find_key(smaller), find_door(smaller)).shape_matches
+
+    def test_answer_is_reused_until_the_key_or_door_changes(self):
+        matcher = KeyMatcher()
+        grid = level(SHAPE, SHAPE)
+        assert matcher.match(grid.tolist()).matches
+        grid[30, 30] = 12  # the player moved
+        assert matcher.match(grid.tolist()).matches
+        rotated = level(np.rot90(SHAPE).tolist(), SHAPE)
+        assert not matcher.match(rotated.tolist()).matches
+        no_door = np.full((64, 64), 8)
+        assert matcher.match(no_door.tolist()) is None
+        assert matcher.stats() == {"hits": 1, "misses": 2, "not_found": 1}
+
+        frame = synthetic_frames(1)[0]
+        assert KeyMatcher().match(frame.frame[-1]).matches
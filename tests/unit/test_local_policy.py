@@ -0,0 +1,111 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from agents.inference import LocalPolicy, StubBackend
+from agents.inference.local_policy import decision_pairs, frame_features, main
+from agents.structs import ActionInput, FrameData, GameAction, GameState
+from agents.templates.llm_agents import LLM
+
+
+def grid(player_x):
+    g = np.full((64, 64), 8)
+    g[20:24, player_x : player_x + 4] = 4
+    return g.tolist()
+
+
+def frame_event(player_x, action, state=GameState.NOT_FINISHED, data=None):
+    frame = FrameData(
+        game_id="ls20-abc",
+        frame=[grid(player_x)],
+        state=state,
+        action_input=ActionInput(id=action, data=data or {}),
+    )
+    return {"timestamp": "t", "data": json.loads(frame.model_dump_json())}
+
+
+def recording():
+    """Walk right from x=0 to x=32 in steps of 8, twice, then click once."""
+    events = [frame_event(0, GameAction.RESET)]
+    for _ in range(2):
+        for x in range(8, 40, 8):
+            events.append(frame_event(x, GameAction.ACTION4))
+        events.append({"timestamp": "t", "data": {"tokens": 10}})
+        events.append(frame_event(0, GameAction.ACTION3))
+    events.append(frame_event(0, GameAction.ACTION6, data={"x": 3, "y": 4}))
+    return events
+
+
+@pytest.mark.unit
+class TestLocalPolicy:
+    def test_pairs_map_each_frame_to_the_next_action(self):
+        pairs = decision_pairs(recording())
+        assert len(pairs) == 11
+        first_frame, first_action, _ = pairs[0]
+        assert first_frame.frame[0] == grid(0)
+        assert first_action is GameAction.ACTION4
+        assert pairs[-1][1:] == (GameAction.ACTION6, {"x": 3, "y": 4})
+        assert decision_pairs(recording(), game="ft09") == []
+
+    def test_features_are_block_histograms(self):
+        features = frame_features([grid(0)], block=4)
+        assert features.shape == (16 * 16 * 16,)
+        assert features.reshape(256, 16).sum(axis=1) == pytest.approx(1.0)
+
+    def test_known_states_are_confident_and_unknown_ones_are_not(self):
+        policy = LocalPolicy.fit(decision_pairs(recording()), k=2)
+
+        seen = FrameData(frame=[grid(8)])
+        action, _, confidence = policy.predict(seen)
+        assert action is GameAction.ACTION4
+        assert confidence == pytest.approx(1.0)
+
+        unseen = FrameData(frame=[np.zeros((64, 64), dtype=int).tolist()])
+        assert policy.predict(unseen)[2] == 0.0
+
+    def test_save_load_and_cli(self, tmp_path, monkeypatch, capsys):
+        path = tmp_path / "game.recording.jsonl"
+        path.write_text("\n".join(json.dumps(e) for e in recording()))
+        out = tmp_path / "policy.npz"
+        monkeypatch.setattr(
+            sys, "argv", ["x", str(tmp_path), "-o", str(out), "-k", "2"]
+        )
+
+        main()
+
+        assert "11 decisions" in capsys.readouterr().out
+        policy = LocalPolicy.load(str(out))
+        assert policy.k == 2 and len(policy) == 11
+        assert policy.evaluate(threshold=0.5)["samples"] == 11
+
+
+@pytest.mark.unit
+class TestLLMLocalPolicy:
+    def test_confident_states_skip_the_model(self, tmp_path, monkeypatch):
+        out = tmp_path / "policy.npz"
+        LocalPolicy.fit(decision_pairs(recording()), k=2).save(str(out))
+        monkeypatch.setenv("LLM_LOCAL_POLICY", str(out))
+        monkeypatch.setenv("LLM_DECISION_CACHE_SIMILARITY", "off")
+
+        agent = LLM(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.backend = StubBackend(script=[{"name": "ACTION2"}])
+        known = FrameData(frame=[grid(8)], state=GameState.NOT_FINISHED)
+        agent.choose_action([known], known)
+
+        assert agent.choose_action([known], known) is GameAction.ACTION4
+        assert agent.backend.calls == 0
+
+        unknown = FrameData(
+            frame=[np.zeros((64, 64), dtype=int).tolist()],
+            state=GameState.NOT_FINISHED,
+        )
+        assert agent.choose_action([unknown], unknown) is GameAction.ACTION2
+        assert (agent.local_decisions, agent.model_decisions) == (1, 1)
@@ -0,0 +1,88 @@
+import pytest
+
+from agents.inference import StubBackend
+from agents.masking import ActionMask
+from agents.structs import ActionInput, FrameData, GameAction, GameState
+from agents.templates.llm_agents import LLM
+from agents.templates.random_agent import Random
+
+
+def frame(grid, action=GameAction.ACTION1, state=GameState.NOT_FINISHED, score=0):
+    return FrameData(
+        frame=[grid],
+        state=state,
+        score=score,
+        action_input=ActionInput(id=action),
+    )
+
+
+WALL = [[1, 2], [3, 4]]
+MOVED = [[2, 1], [3, 4]]
+
+
+def make_agent(cls):
+    return cls(
+        card_id="test-card",
+        game_id="test-game",
+        agent_name="test-agent",
+        ROOT_URL="https://example.com",
+        record=False,
+    )
+
+
+@pytest.mark.unit
+class TestActionMask:
+    def test_only_reset_when_game_is_not_running(self):
+        mask = ActionMask()
+        over = frame(WALL, state=GameState.GAME_OVER)
+        assert mask.allowed(over) == [GameAction.RESET]
+        assert mask.forced(over) is GameAction.RESET
+        assert mask.forced(frame(WALL)) is None
+
+    def test_noop_is_masked_only_from_the_same_state(self):
+        mask = ActionMask()
+        mask.observe(frame(WALL), frame(WALL, GameAction.ACTION1))
+        mask.observe(frame(WALL), frame(MOVED, GameAction.ACTION2))
+
+        assert mask.masked(frame(WALL)) == {GameAction.ACTION1}
+        assert mask.masked(frame(MOVED)) == set()
+
+    def test_score_change_clicks_and_resets_are_not_noops(self):
+        mask = ActionMask()
+        mask.observe(frame(WALL), frame(WALL, GameAction.ACTION1, score=1))
+        mask.observe(frame(WALL), frame(WALL, GameAction.ACTION6))
+        mask.observe(frame(WALL), frame(WALL, GameAction.RESET))
+        assert mask.masked(frame(WALL)) == set()
+
+
+@pytest.mark.unit
+class TestAgentsUseMask:
+    def test_agent_learns_from_appended_frames(self):
+        agent = make_agent(Random)
+        agent.append_frame(frame(WALL, GameAction.RESET))
+        agent.append_frame(frame(WALL, GameAction.ACTION3))
+
+        for _ in range(50):
+            assert agent.choose_action(agent.frames, agent.frames[-1]) not in (
+                GameAction.ACTION3,
+                GameAction.RESET,
+            )
+
+    def test_llm_tools_are_narrowed(self):
+        agent = make_agent(LLM)
+        agent.append_frame(frame(WALL, GameAction.RESET))
+        agent.append_frame(frame(WALL, GameAction.ACTION1))
+
+        names = [f["name"] for f in agent.build_functions()]
+        assert "ACTION1" not in names
+        assert "ACTION2" in names
+
+    def test_llm_resets_after_game_over_without_a_model_call(self):
+        agent = make_agent(LLM)
+        agent.backend = StubBackend()
+        agent.choose_action(agent.frames, agent.frames[-1])
+
+        agent.append_frame(frame(WALL, GameAction.ACTION1, state=GameState.GAME_OVER))
+        assert agent.choose_action(agent.frames, agent.frames[-1]) is GameAction.RESET
+        assert agent.backend.calls == 0
+        assert agent.messages[-1]["function_call"]["name"] == "RESET"
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from agents.benchmarks import synthetic_frames
+from agents.objects import (
+    ObjectTracker,
+    extract_objects,
+    label_components,
+    match_objects,
+)
+from agents.specialist.change_detection_specialist import ChangeDetectionSpecialist
+
+
+def board(*blocks, size=12):
+    """A grid of 0 with (top, left, height, width, colour) blocks drawn in."""
+    grid = np.zeros((size, size), dtype=int)
+    for top, left, height, width, color in blocks:
+        grid[top : top + height, left : left + width] = color
+    return grid
+
+
+@pytest.mark.unit
+class TestObjects:
+    def test_components_follow_colour_and_connectivity(self):
+        grid = board((1, 1, 2, 2, 3), (3, 3, 2, 2, 3), (0, 8, 4, 1, 5))
+        # a U shape: one component only through the bottom row
+        grid[6:9, 6] = grid[6:9, 8] = grid[8, 7] = 7
+
+        labels, count = label_components(grid)
+        assert count == 5  # background, the 5 bar, two 3 blocks, the U
+        assert labels[1, 1] != labels[3, 3]
+        assert labels[6, 6] == labels[6, 8]
+        assert label_components(grid, connectivity=8)[1] == 4
+        assert np.array_equal(labels[0], [0] * 8 + [1] + [0] * 3)
+
+    def test_descriptors(self):
+        objects = extract_objects(board((2, 3, 2, 4, 6), (8, 1, 1, 1, 6)))
+
+        assert [o.area for o in objects] == [8, 1]
+        block = objects[0]
+        assert (block.color, block.bbox, block.size) == (6, (2, 3, 3, 6), (2, 4))
+        assert block.centroid == (2.5, 4.5)
+        assert block.shape != objects[1].shape
+        same = extract_objects(board((5, 5, 2, 4, 2)))[0]
+        assert same.shape == block.shape  # anywhere, in any colour
+
+        assert len(extract_objects(board((2, 3, 2, 4, 6)), min_area=9)) == 0
+        assert extract_objects(board(), ignore_background=False)[0].area == 144
+        assert extract_objects([]) == []
+
+    def test_objects_keep_their_ids_and_get_motion(self):
+        before = extract_objects(
+            board((1, 1, 2, 2, 4), (6, 6, 2, 2, 4), (9, 0, 1, 5, 8))
+        )
+        after = match_objects(
+            before,
+            extract_objects(board((1, 1, 2, 2, 4), (6, 8, 2, 2, 4), (9, 0, 1, 3, 8))),
+        )
+
+        assert [o.id for o in after] == [0, 1, 2]
+        assert after[1].motion == (0.0, 2.0) and after[1].moved
+        assert not after[0].moved
+        assert after[2].reshaped and after[2].motion == (0.0, -1.0)
+
+        far = match_objects(after, extract_objects(board((1, 1, 2, 2, 5))))
+        assert far[0].id == 3 and far[0].motion is None
+
+    def test_tracker_follows_the_player(self):
+        tracker = ObjectTracker()
+        frames = synthetic_frames(6)
+        tracker.update(frames[0].frame[-1])
+        player = next(o for o in tracker.objects if o.color == 12)
+        for frame in frames[1:]:
+            tracker.update(frame.frame[-1])
+            assert next(o for o in tracker.objects if o.color == 12).id == player.id
+        assert tracker.next_id > player.id
+        assert not tracker.vanished
+
+    def test_window_keeps_grid_coordinates(self):
+        grid = np.array(board((1, 1, 2, 2, 5), (6, 6, 2, 3, 7)))
+        inside = extract_objects(grid, window=(4, 4, 9, 9))
+        assert [o.to_dict() for o in inside] == [
+            o.to_dict() for o in extract_objects(grid) if o.color == 7
+        ]
+        assert extract_objects(grid.tolist(), window=(4, 4, 9, 9))[0].bbox == (
+            6,
+            6,
+            7,
+            8,
+        )
+
+    def test_specialist_reports_moved_objects_when_asked(self):
+        frames = synthetic_frames(3)
+        specialist = ChangeDetectionSpecialist()
+        assert "moved_objects" not in specialist.detect_delta(frames[1], frames[2])
+
+        specialist.TRACK_OBJECTS = True
+        delta = specialist.detect_delta(frames[1], frames[2])
+        colors = {o["color"] for o in delta["moved_objects"]}
+        assert 12 in colors
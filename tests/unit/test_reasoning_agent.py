@@ -0,0 +1,111 @@
+import pytest
+
+from agents.benchmarks import synthetic_frames
+from agents.inference import StubBackend
+from agents.templates.reasoning_agent import ReasoningAgent
+
+
+class RecordingStub(StubBackend):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return super().create(**kwargs)
+
+
+def image_urls(request):
+    content = request["messages"][-1]["content"]
+    return [part["image_url"]["url"] for part in content if part["type"] == "image_url"]
+
+
+@pytest.mark.unit
+class TestScreenHistory:
+    def test_screens_are_encoded_once_and_released_on_new_levels(self):
+        agent = ReasoningAgent(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.backend = backend = RecordingStub()
+        agent.decision_cache = None
+        agent.ROI_IMAGES = False
+        frames = synthetic_frames(4)
+        frames[3].score = 1  # a new level
+
+        for frame in frames:
+            agent.append_frame(frame)
+            agent.choose_action(agent.frames, frame)
+
+        # the first turn is a RESET, the second has no earlier screen
+        first, second, third = (image_urls(r) for r in backend.requests)
+        assert len(first) == 1
+        assert second == [first[0], second[1]]
+        assert third == [third[0]]  # the last level's screen was released
+        assert agent.screen_history == [third[0]]
+        assert third[0].startswith("data:image/png;base64,")
+
+    def test_only_previous_screens_are_kept(self):
+        agent = ReasoningAgent(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.PREVIOUS_SCREENS = 2
+        for screen in "abc":
+            agent.remember_screen(screen)
+        assert agent.screen_history == ["b", "c"]
+
+        agent.PREVIOUS_SCREENS = 0
+        agent.remember_screen("d")
+        assert agent.screen_history == []
+
+    def test_changed_region_is_sent_up_close(self, monkeypatch):
+        monkeypatch.setenv("VISION_ROI", "on")
+        agent = ReasoningAgent(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.backend = backend = RecordingStub()
+        agent.decision_cache = None
+        for frame in synthetic_frames(3):
+            agent.append_frame(frame)
+            agent.choose_action(agent.frames, frame)
+
+        content = backend.requests[-1]["messages"][-1]["content"]
+        details = [
+            p["image_url"]["detail"] for p in content if p["type"] == "image_url"
+        ]
+        # the previous screen and the overview at low detail, the close-up at high
+        assert details == ["low", "low", "high"]
+        assert any("Close-up of rows" in p.get("text", "") for p in content)
+
+    def test_diff_overlay_replaces_the_previous_screen(self):
+        agent = ReasoningAgent(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        agent.backend = backend = RecordingStub()
+        agent.decision_cache = None
+        agent.ROI_IMAGES = False
+        agent.DIFF_OVERLAY = True
+        for frame in synthetic_frames(3):
+            agent.append_frame(frame)
+            agent.choose_action(agent.frames, frame)
+
+        content = backend.requests[-1]["messages"][-1]["content"]
+        assert len(image_urls(backend.requests[-1])) == 1
+        assert not any(p.get("text") == "Previous screen:" for p in content)
+        assert any("outlined" in p.get("text", "") for p in content)
+        assert agent.screen_history == []
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from agents.benchmarks import reference, synthetic_frames
+from agents.benchmarks.render import pixels
+from agents.rendering import (
+    ARC_PALETTE,
+    Palette,
+    overlay_changes,
+    render_grid,
+    render_grids,
+    render_zones,
+)
+from agents.structs import FrameData
+from agents.templates.langgraph_functional_agent import format_frame
+from agents.templates.reasoning_agent import KEY_PALETTE
+
+
+@pytest.mark.unit
+class TestRendering:
+    def test_palettes_wrap_or_fall_back_to_the_default(self):
+        assert ARC_PALETTE([[0, 17]]).tolist() == [[[0, 0, 0], [0, 0, 170]]]
+
+        palette = Palette({1: "#FF0000"}, default=(1, 2, 3))
+        assert palette([[1, 2, -1]]).tolist() == [[[255, 0, 0], [1, 2, 3], [1, 2, 3]]]
+        with pytest.raises(ValueError):
+            Palette({1: "#FF0000"})
+
+    def test_scale_and_gridlines(self):
+        pixels = render_grid([[15, 15], [15, 15]], scale=3, gridlines="#000000")
+        assert pixels.shape == (6, 6, 3)
+        lines = np.zeros((6, 6), dtype=bool)
+        lines[::3, :] = lines[:, ::3] = True
+        assert (pixels.sum(axis=2) == 0).tolist() == lines.tolist()
+
+    def test_grids_are_laid_out_side_by_side(self):
+        grid = [[1] * 4] * 3
+        image = render_grids([grid, [[2]], grid]).image
+        assert image.size == (4 + 5 + 4, 3)  # the 1x1 grid is skipped
+        assert image.getpixel((5, 0)) == (255, 255, 255)
+
+    def test_png_is_encoded_on_first_use(self):
+        image = render_grids([[[1] * 4] * 4])
+        assert "png" not in vars(image)
+        assert image.data_url.startswith("data:image/png;base64,")
+        assert "png" in vars(image)
+
+        text = format_frame(FrameData(frame=[[[1] * 4] * 4]), as_image=False)
+        assert [block["type"] for block in text] == ["text"] * 3
+
+    def test_zones_match_the_per_cell_renderer(self):
+        grid = synthetic_frames(1)[0].frame[-1]
+        for cell_size in (12, 5):
+            rgb = render_zones(grid, KEY_PALETTE, cell_size)
+            expected = reference.generate_grid_image_with_zone(grid, cell_size)
+            assert np.array_equal(pixels(rgb.png), pixels(expected))
+
+        rgb = render_zones(grid, KEY_PALETTE, 12)
+        palette = render_zones(grid, KEY_PALETTE, 12, palette_mode=True)
+        assert palette.image.mode == "P"
+        assert len(palette.png) < len(rgb.png)
+        # only the (not anti-aliased) zone labels differ
+        differs = (pixels(palette.png) != pixels(rgb.png)).any(axis=2)
+        assert differs.sum() < 0.01 * differs.size
+
+    def test_overlay_outlines_changed_cells_only(self):
+        previous = np.full((8, 8), 3)
+        grid = previous.copy()
+        grid[2:4, 2:4] = 12
+        image = render_zones(grid, KEY_PALETTE, 6, zone_size=8, palette_mode=True)
+
+        overlaid = overlay_changes(image.image, grid, previous, KEY_PALETTE, 6)
+        assert overlaid.mode == "P"
+        before, after = pixels(image.image), pixels(overlaid)
+        differs = (before != after).any(axis=2)
+        assert differs[12:24, 12:24].any()
+        differs[12:24, 12:24] = False
+        assert not differs.any()
+        assert tuple(after[12, 15]) == (255, 0, 255)  # the outline
+        assert tuple(after[13, 13]) != (255, 0, 255)  # no lines between cells
+        # the middle of a changed cell mixes in the previous color
+        ghost = 0.6 * before[14, 14] + 0.4 * KEY_PALETTE.lut[3]
+        assert np.abs(after[14, 14] - ghost).max() <= 1
+
+        rgb = overlay_changes(
+            image.image.convert("RGB"), grid, previous, KEY_PALETTE, 6
+        )
+        assert np.array_equal(pixels(rgb), after)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from agents.rendering import render_grid
+from agents.roi import find_region, roi_enabled, roi_images
+
+
+def board():
+    grid = np.full((64, 64), 3)
+    grid[40:44, 20:24] = 9
+    grid[40, 20:24] = 12  # the player
+    return grid
+
+
+@pytest.mark.unit
+class TestRegion:
+    def test_roi_is_opt_in(self, monkeypatch):
+        monkeypatch.delenv("VISION_ROI", raising=False)
+        assert not roi_enabled()
+        monkeypatch.setenv("VISION_ROI", "on")
+        assert roi_enabled()
+
+    def test_detail_follows_how_much_changed(self):
+        previous = board()
+        assert find_region(previous).mode == "full"  # nothing to compare with
+
+        moved = np.full((64, 64), 3)
+        moved[40:44, 24:28] = 9
+        moved[40, 24:28] = 12
+        moved[2, 50] = 8  # a status bar ticking down
+        region = find_region(moved, previous, hud_rows=4)
+        assert region.mode == "crop"
+        assert (region.changed, region.hud_changed) == (32, 1)
+        assert region.top <= 40 and region.bottom >= 43
+        assert region.left <= 20 and region.right >= 27
+        assert region.top >= 4  # the status bar does not widen the region
+        assert region.cells < 0.25 * moved.size
+
+        still = previous.copy()
+        still[2, 50] = 8
+        assert find_region(still, previous, hud_rows=4).mode == "still"
+        assert find_region(np.zeros((64, 64)), previous).mode == "full"
+
+    def test_regions_grow_to_the_minimum_size_inside_the_board(self):
+        previous = np.zeros((64, 64), dtype=int)
+        grid = previous.copy()
+        grid[0, 63] = 1
+        region = find_region(grid, previous, focus=(), margin=2, min_size=16)
+        assert (region.top, region.bottom) == (0, 15)
+        assert (region.left, region.right) == (48, 63)
+
+    def test_crop_is_the_region_of_the_rendered_board(self):
+        previous = board()
+        grid = previous.copy()
+        grid[10, 10] = 4
+        region = find_region(grid, previous)
+        scale, offset = 3, 6
+        pixels = np.zeros((64 * scale + 2 * offset,) * 2 + (3,), dtype=np.uint8)
+        pixels[offset:-offset, offset:-offset] = render_grid(grid, scale=scale)
+
+        overview, crop = roi_images(Image.fromarray(pixels), region, scale, offset)
+        assert overview[2] == "low" and max(overview[1].image.size) <= 512
+        assert crop[2] == "high" and "rows" in crop[0]
+        cells = grid[region.top : region.bottom + 1, region.left : region.right + 1]
+        assert np.array_equal(
+            np.asarray(crop[1].image), render_grid(cells, scale=scale)
+        )
@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from agents.inference import ModelRouter, ModelTier, StubBackend
+from agents.structs import FrameData, GameState
+from agents.templates.llm_agents import GuidedLLM, RoutedGuidedLLM
+
+STRONG = ModelTier(model="o3", reasoning_effort="high")
+FAST = ModelTier(model="o4-mini", reasoning_effort="low")
+
+
+def frame(grid, score=0, state=GameState.NOT_FINISHED):
+    return FrameData(frame=[np.asarray(grid).tolist()], score=score, state=state)
+
+
+def level(player_x=0):
+    grid = np.full((64, 64), 8)
+    grid[0, :] = 10
+    grid[20:24, player_x : player_x + 4] = 4
+    return grid
+
+
+def route(router, frames, actions_taken=0, max_actions=80):
+    return router.route(router.signals(frames, actions_taken, max_actions))
+
+
+@pytest.mark.unit
+class TestModelRouter:
+    def test_new_layout_escalates_then_routine_moves_are_fast(self):
+        router = ModelRouter(STRONG, FAST)
+        frames = [frame(level(0))]
+        assert route(router, frames) == STRONG
+
+        frames.append(frame(level(1)))
+        assert route(router, frames) == FAST
+        assert router.decisions == {"novel": 1, "routine": 1}
+
+    def test_reset_after_game_over_is_fast(self):
+        router = ModelRouter(STRONG, FAST)
+        frames = [frame(level(0), state=GameState.GAME_OVER)]
+        assert route(router, frames) == FAST
+
+    def test_score_change_and_large_change_escalate(self):
+        router = ModelRouter(STRONG, FAST, large_change=20)
+        frames = [frame(level(0))]
+        route(router, frames)
+
+        frames.append(frame(level(0), score=1))
+        assert route(router, frames) == STRONG
+
+        frames.append(frame(level(1), score=1))
+        assert route(router, frames) == FAST
+
+        # a teleport: same layout, but many cells changed
+        frames.append(frame(level(30), score=1))
+        assert route(router, frames) == STRONG
+        assert router.decisions["large_change"] == 1
+
+    def test_repeated_noops_escalate(self):
+        router = ModelRouter(STRONG, FAST, escalate_after_noops=2)
+        frames = [frame(level(0))]
+        route(router, frames)
+
+        frames.append(frame(level(0)))
+        assert route(router, frames) == FAST
+        frames.append(frame(level(0)))
+        assert route(router, frames) == STRONG
+        assert router.decisions["stuck"] == 1
+
+    def test_low_budget_escalates(self):
+        router = ModelRouter(STRONG, FAST, low_budget=0.1)
+        frames = [frame(level(0))]
+        route(router, frames)
+        frames.append(frame(level(1)))
+        assert route(router, frames, actions_taken=75, max_actions=80) == STRONG
+
+    def test_report_estimates_savings(self):
+        router = ModelRouter(STRONG, FAST)
+        router.record(STRONG, tokens=1000, seconds=10.0)
+        router.record(FAST, tokens=200, seconds=1.0)
+        router.record(FAST, tokens=200, seconds=1.0)
+
+        report = router.report()
+        assert report["tokens_saved"] == 1600
+        assert report["seconds_saved"] == pytest.approx(18.0)
+        assert report["tiers"]["o4-mini:low"]["calls"] == 2
+
+
+@pytest.mark.unit
+class TestGuidedLLMRouting:
+    def test_guided_llm_is_not_routed(self):
+        agent = GuidedLLM(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        assert agent.router is None
+
+    def test_turns_are_sent_to_the_routed_model(self):
+        agent = RoutedGuidedLLM(
+            card_id="test-card",
+            game_id="test-game",
+            agent_name="test-agent",
+            ROOT_URL="https://example.com",
+            record=False,
+        )
+        models = []
+
+        class Spy(StubBackend):
+            def create(self, **kwargs):
+                models.append((kwargs["model"], kwargs.get("reasoning_effort")))
+                return super().create(**kwargs)
+
+        agent.backend = Spy()
+        frames = [frame(level(0))]
+        agent.choose_action(frames, frames[-1])  # initial RESET, no LLM call
+
+        agent.choose_action(frames, frames[-1])
+        frames.append(frame(level(1)))
+        action = agent.choose_action(frames, frames[-1])
+
+        assert models == [("o3", "high")] * 2 + [("o4-mini", "low")] * 2
+        assert action.reasoning["model"] == "o4-mini"
+        assert agent.router.report()["tokens_saved"] is not None
@@ -0,0 +1,98 @@
+import pytest
+from openai.types.completion_usage import CompletionTokensDetails, PromptTokensDetails
+
+from agents.inference import CallUsage, MeteredBackend, StubBackend, UsageLedger
+from agents.templates.llm_agents import GuidedLLM
+
+PRICES = {"gpt-4o-mini": (0.15, 0.075, 0.60)}
+
+
+class ReasoningStub(StubBackend):
+    """Stub that reports cached and reasoning tokens like the OpenAI API."""
+
+    def create(self, **kwargs):
+        response = super().create(**kwargs)
+        response.usage.prompt_tokens_details = PromptTokensDetails(cached_tokens=3)
+        response.usage.completion_tokens_details = CompletionTokensDetails(
+            reasoning_tokens=7
+        )
+        return response
+
+
+def make_agent(cls):
+    return cls(
+        card_id="test-card",
+        game_id="test-game",
+        agent_name="test-agent",
+        ROOT_URL="https://example.com",
+        record=False,
+    )
+
+
+@pytest.mark.unit
+class TestUsageLedger:
+    def test_call_usage_reads_token_details_and_prices_snapshots(self):
+        response = ReasoningStub().create(model="gpt-4o-mini-2024-07-18", messages=[])
+        call = CallUsage.from_response(response, "gpt-4o-mini-2024-07-18", 0.5)
+
+        assert (call.cached_tokens, call.reasoning_tokens) == (3, 7)
+        assert call.total_tokens == response.usage.total_tokens
+        expected = (
+            (call.prompt_tokens - 3) * 0.15 + 3 * 0.075 + call.completion_tokens * 0.6
+        ) / 1e6
+        assert call.cost(PRICES) == pytest.approx(expected)
+        assert CallUsage(model="my-model").cost(PRICES) is None
+
+    def test_metered_backend_records_every_call(self):
+        seen = []
+        ledger = UsageLedger(prices=PRICES, listener=seen.append)
+        backend = MeteredBackend(StubBackend(), ledger)
+        backend.create(model="gpt-4o-mini", messages=[])
+        backend.create(model="local", messages=[])
+        backend.create(model="local", messages=[])
+
+        report = ledger.report(actions=4, score=2)
+        assert [c.model for c in seen] == ["gpt-4o-mini", "local", "local"]
+        assert report["calls"] == 3
+        assert report["by_model"]["local"]["calls"] == 2
+        assert report["tokens_per_action"] == round(report["total_tokens"] / 4, 1)
+        assert report["tokens_per_score_point"] == round(report["total_tokens"] / 2, 1)
+        assert report["unpriced_models"] == ["local"]
+        assert report["cost_usd"] > 0
+
+    def test_budget_and_combine(self):
+        first = UsageLedger(max_tokens=100, prices=PRICES)
+        first.record(CallUsage(model="gpt-4o-mini", prompt_tokens=60))
+        assert first.over_budget() is None
+        first.record(CallUsage(model="gpt-4o-mini", prompt_tokens=50))
+        assert "110 of 100" in first.over_budget()
+
+        second = UsageLedger(prices=PRICES)
+        second.record(CallUsage(model="o3", completion_tokens=5))
+        combined = UsageLedger.combine([first, second])
+        assert (combined.calls, combined.total_tokens) == (3, 115)
+
+
+@pytest.mark.unit
+class TestAgentUsage:
+    def test_llm_agents_meter_their_calls_and_capture_reasoning(self, sample_frame):
+        agent = make_agent(GuidedLLM)
+        agent.backend = MeteredBackend(ReasoningStub(), agent.usage)
+
+        agent.choose_action([sample_frame], sample_frame)
+        action = agent.choose_action([sample_frame], sample_frame)
+
+        assert agent.usage.calls == 2  # observation and action
+        assert agent.usage_report()["reasoning_tokens"] == 14
+        assert action.reasoning["reasoning_tokens"] == 7
+        assert action.reasoning["total_reasoning_tokens"] == 14
+
+    def test_game_stops_once_over_budget(self):
+        agent = make_agent(GuidedLLM)
+        agent.usage.max_tokens = 10
+        agent.usage.record(CallUsage(model="o3", prompt_tokens=20))
+
+        agent.main()
+
+        assert agent.action_counter == 0
+        assert agent.usage_report()["budget"]["exceeded"]
@@ -0,0 +1,44 @@
+import pytest
+
+from agents.benchmarks import synthetic_frames
+from agents.templates.langgraph.vision import RenderCache, render_frame
+
+
+@pytest.mark.unit
+class TestRenderCache:
+    def test_same_grid_is_rendered_once(self):
+        first, second = synthetic_frames(2)
+        cache = RenderCache()
+
+        current = cache.render(first.frame, "Current frame")
+        assert current == render_frame(first.frame, "Current frame")
+        assert cache.render(first.frame, "Current frame") == current
+        # a copy of the grid hits too: the key is the content
+        copy = [[row[:] for row in grid] for grid in first.frame]
+        assert cache.render(copy, "Current frame") == current
+        # another description reuses the drawing
+        previous = cache.render(first.frame, "Previous frame")
+        assert previous == render_frame(first.frame, "Previous frame")
+        cache.render(second.frame, "Current frame")
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["partial_hits"], stats["misses"]) == (2, 1, 2)
+        assert stats["hit_rate"] == 0.6
+
+    def test_least_recently_used_frames_are_evicted(self):
+        frames = synthetic_frames(3)
+        cache = RenderCache(maxsize=2)
+        for frame in frames:
+            cache.render(frame.frame, "Current frame")
+        cache.render(frames[0].frame, "Current frame")
+
+        assert cache.stats()["misses"] == 4
+        assert cache.stats()["entries"] == 2
+
+    def test_drawings_are_shared_with_renders(self):
+        frame = synthetic_frames(1)[0]
+        cache = RenderCache()
+        cache.render(frame.frame, "Current frame")
+        drawn = cache.draw(frame.frame)
+        assert cache.draw(frame.frame) is drawn
+        assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)